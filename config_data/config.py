@@ -6,7 +6,7 @@ from environs import Env
 
 logger = logging.getLogger(__name__)
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -23,11 +23,45 @@ class DatabaseConfig:
     database: str
     host: str
     port: int = 5432
+    pool_min_size: int = 2
+    pool_max_size: int = 10
+    statement_cache_size: int = 256
+    max_inactive_connection_lifetime: float = 300.0  # Простаивающие соединения закрываются, секунды
+    statement_timeout: int = 30_000                  # Миллисекунды, 0 — без ограничения
 
 @dataclass
 class TgBot:
     token: str
 
+@dataclass
+class WebhookConfig:
+    enabled: bool = False        # False — long polling
+    base_url: str = ""           # Публичный https-адрес бота (адрес балансировщика)
+    path: str = "/webhook"
+    secret: str = ""             # X-Telegram-Bot-Api-Secret-Token
+    host: str = "0.0.0.0"        # Где слушает aiohttp
+    port: int = 8080
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url.rstrip('/')}{self.path}"
+
+@dataclass
+class SyncConfig:
+    """Автосинхронизация с Google Sheets, интервалы в секундах, 0 — выключена"""
+    tasks_interval: int = 300
+    volunteers_interval: int = 600
+    assignments_interval: int = 300
+    max_backoff: int = 1800  # Предельная пауза после ошибок квоты Google API
+
+    @property
+    def intervals(self) -> dict[str, int]:
+        return {
+            "tasks": self.tasks_interval,
+            "volunteers": self.volunteers_interval,
+            "assignments": self.assignments_interval,
+        }
+
 @dataclass
 class Config:
     tg_bot: TgBot
@@ -36,6 +70,9 @@ class Config:
     spot_duration: int
     api_cred: str
     debug_auth: bool = False 
+    fsm_cache_ttl: int = 600  # 0 — без локального кеша FSM (несколько воркеров без sticky-сессий)
+    webhook: WebhookConfig = field(default_factory=WebhookConfig)
+    sync: SyncConfig = field(default_factory=SyncConfig)
 
 def load_config() -> Config:
     env = Env()
@@ -48,7 +85,12 @@ def load_config() -> Config:
             password=env.str("DB_PASS"),
             database=env.str("DB_NAME"),
             host=env.str("DB_HOST"),
-            port=env.int("DB_PORT", 5432)
+            port=env.int("DB_PORT", 5432),
+            pool_min_size=env.int("DB_POOL_MIN_SIZE", 2),
+            pool_max_size=env.int("DB_POOL_MAX_SIZE", 10),
+            statement_cache_size=env.int("DB_STATEMENT_CACHE_SIZE", 256),
+            max_inactive_connection_lifetime=env.float("DB_MAX_INACTIVE_CONNECTION_LIFETIME", 300.0),
+            statement_timeout=env.int("DB_STATEMENT_TIMEOUT_MS", 30_000)
         ),
         event=EventConfig(
             start_date=env.datetime("EVENT_START_DATE"),
@@ -57,5 +99,20 @@ def load_config() -> Config:
         ),
         debug_auth=env.bool("DEBUG_AUTH", False),
         spot_duration=env.int("SPOT_TASK_EXPIRY_MINUTES", 30),
-        api_cred=env.str("API_CRED")
+        fsm_cache_ttl=env.int("FSM_CACHE_TTL", 600),
+        api_cred=env.str("API_CRED"),
+        webhook=WebhookConfig(
+            enabled=env.bool("WEBHOOK_ENABLED", False),
+            base_url=env.str("WEBHOOK_BASE_URL", ""),
+            path=env.str("WEBHOOK_PATH", "/webhook"),
+            secret=env.str("WEBHOOK_SECRET", ""),
+            host=env.str("WEBHOOK_HOST", "0.0.0.0"),
+            port=env.int("WEBHOOK_PORT", 8080)
+        ),
+        sync=SyncConfig(
+            tasks_interval=env.int("SYNC_TASKS_INTERVAL", 300),
+            volunteers_interval=env.int("SYNC_VOLUNTEERS_INTERVAL", 600),
+            assignments_interval=env.int("SYNC_ASSIGNMENTS_INTERVAL", 300),
+            max_backoff=env.int("SYNC_MAX_BACKOFF", 1800)
+        )
     )
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Микробенчмарк отображения строк в модели.
+
+    python -m database.bench_mapping [rows]
+
+Сравнивает на rows строках (по умолчанию 100 000) таблицы task:
+ручную сборку по именам колонок, Model(**dict(row)) и database.row_mapping,
+а также память списка обычных dataclass-объектов и slotted-моделей.
+База не нужна: строки имитируют asyncpg.Record (индекс и имя колонки, keys()).
+Доступ по имени у имитации — метод на Python, у настоящего Record он на C,
+так что разрыв с ручной сборкой в проде меньше, чем в этом замере.
+"""
+import dataclasses
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from database.pg_model import Task
+from database.row_mapping import converter_for, map_rows
+
+COLUMNS = ('task_id', 'title', 'description', 'start_day', 'start_time',
+           'end_day', 'end_time', 'created_at', 'updated_at', 'completed_at', 'status')
+
+
+class FakeRecord(tuple):
+    """Неизменяемая строка с доступом по индексу и по имени, как asyncpg.Record"""
+    __slots__ = ()
+    _index = {name: i for i, name in enumerate(COLUMNS)}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._index[key]
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return iter(COLUMNS)
+
+
+# Та же модель без slots/frozen — как было до row_mapping
+PlainTask = dataclasses.make_dataclass(
+    'PlainTask', [(f.name, f.type, f) for f in dataclasses.fields(Task)]
+)
+
+
+def make_rows(count: int) -> List[FakeRecord]:
+    now = datetime.now()
+    return [
+        FakeRecord((i, f'Task {i}', 'description', 1, '10:00', 1, '12:00', now, None, None, None))
+        for i in range(count)
+    ]
+
+
+def by_name(rows) -> list:
+    return [
+        PlainTask(
+            task_id=row['task_id'], title=row['title'], description=row['description'],
+            start_day=row['start_day'], start_time=row['start_time'],
+            end_day=row['end_day'], end_time=row['end_time'], created_at=row['created_at'],
+            updated_at=row['updated_at'], completed_at=row['completed_at']
+        ) for row in rows
+    ]
+
+
+def from_dict(rows) -> list:
+    fields = {f.name for f in dataclasses.fields(PlainTask)}
+    return [PlainTask(**{k: v for k, v in dict(row).items() if k in fields}) for row in rows]
+
+
+def mapped(rows) -> list:
+    return map_rows(Task, rows)
+
+
+def timed(fn: Callable, rows, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def allocated(fn: Callable, rows) -> int:
+    """Сколько байт занимает результат fn(rows), пока он жив"""
+    gc.collect()
+    tracemalloc.start()
+    result = fn(rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def run(count: int) -> List[Tuple[str, float, int]]:
+    rows = make_rows(count)
+    converter_for(Task, COLUMNS)  # компиляция конвертера не входит в замер
+    return [
+        (name, timed(fn, rows), allocated(fn, rows))
+        for name, fn in (('row[name] -> dataclass', by_name),
+                         ('Model(**dict(row))', from_dict),
+                         ('row_mapping, slots', mapped))
+    ]
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{count} rows of task")
+    for name, seconds, size in run(count):
+        print(f"{name:<24} {seconds * 1000:8.1f} ms  {seconds / count * 1e9:7.0f} ns/row  "
+              f"{size / 1024 / 1024:7.1f} MiB  {size / count:5.0f} B/row")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
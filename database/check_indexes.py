@@ -0,0 +1,107 @@
+"""
+Проверка, что горячие запросы используют индексы.
+
+    python -m database.check_indexes
+
+Для каждого запроса берется EXPLAIN с выключенным enable_seqscan: на маленьких
+таблицах планировщик честно выбирает Seq Scan, но если он остается и при
+enable_seqscan = off, значит подходящего индекса нет. Код возврата 1, если
+хотя бы один запрос сканирует таблицу целиком.
+"""
+import asyncio
+import json
+import sys
+from datetime import datetime
+from typing import Any, Iterator, List, Tuple
+
+import asyncpg
+
+from config_data.config import load_config
+from database.migrations import apply_migrations
+from database.pg_model import TASK_DAY_CONDITION
+from database.pool import STATEMENTS
+
+# (название, запрос, параметры) — запросы в том виде, в каком их выполняет pg_model
+HOT_QUERIES: List[Tuple[str, str, tuple]] = [
+    ("Assignment.get_by_task",
+     STATEMENTS['assignments_by_task'], (1,)),
+    ("Assignment.get_by_volunteer",
+     STATEMENTS['assignments_by_volunteer'], (1,)),
+    ("Assignment.get_active_with_volunteers",
+     """
+     SELECT a.*, u.tg_username, u.name, u.role
+     FROM assignment a
+     JOIN users u ON u.tg_id = a.tg_id
+     WHERE a.task_id = $1 AND a.status != 'cancelled'
+     ORDER BY a.assign_id
+     """, (1,)),
+    ("User.get_by_role",
+     STATEMENTS['users_by_role'], ("admin",)),
+    ("User.get_by_username",
+     "SELECT * FROM users WHERE tg_username = $1", ("username",)),
+    ("SpotTaskResponse.get_by_task",
+     "SELECT * FROM spot_task_response WHERE spot_task_id = $1", (1,)),
+    ("SpotTask.get_active",
+     STATEMENTS['spot_tasks_active'], ()),
+    ("Task.get_active",
+     "SELECT * FROM task WHERE ends_at > $1 ORDER BY starts_at, task_id", (datetime.now(),)),
+    ("Task.get_by_day",
+     f"SELECT t.* FROM task t WHERE {TASK_DAY_CONDITION} ORDER BY t.starts_at, t.task_id", (1,)),
+]
+
+
+def iter_plan_nodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get('Plans', []):
+        yield from iter_plan_nodes(child)
+
+
+async def find_seq_scans(conn: asyncpg.Connection, query: str, args: tuple) -> List[str]:
+    """Возвращает таблицы, которые запрос читает последовательным сканированием"""
+    raw = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args)
+    plan: Any = json.loads(raw) if isinstance(raw, str) else raw
+    return [
+        node.get('Relation Name', '?')
+        for node in iter_plan_nodes(plan[0]['Plan'])
+        if node['Node Type'] == 'Seq Scan'
+    ]
+
+
+async def check_indexes(pool: asyncpg.Pool) -> List[Tuple[str, List[str]]]:
+    """Список (запрос, таблицы с Seq Scan) для запросов без подходящего индекса"""
+    failures = []
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute('SET LOCAL enable_seqscan = off')
+            for name, query, args in HOT_QUERIES:
+                tables = await find_seq_scans(conn, query, args)
+                if tables:
+                    failures.append((name, tables))
+    return failures
+
+
+async def main() -> int:
+    config = load_config()
+    pool = await asyncpg.create_pool(
+        user=config.db.user,
+        password=config.db.password,
+        database=config.db.database,
+        host=config.db.host,
+        port=config.db.port
+    )
+    try:
+        version = await apply_migrations(pool)
+        print(f"Schema version: {version}")
+        failures = await check_indexes(pool)
+    finally:
+        await pool.close()
+
+    for name, query, _ in HOT_QUERIES:
+        failed = dict(failures).get(name)
+        status = f"FAIL (Seq Scan on {', '.join(failed)})" if failed else "OK"
+        print(f"{name}: {status}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,148 @@
+import asyncio
+import copy
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import asyncpg
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+FSM_STATE_TTL = 24 * 60 * 60    # Незавершенный сценарий живет сутки
+FSM_CACHE_TTL = 10 * 60         # Локальный кеш чтений
+FSM_CACHE_SIZE = 10_000
+FSM_CLEANUP_INTERVAL = 60 * 60  # Как часто удалять устаревшие записи
+
+
+class PgStorage(BaseStorage):
+    """
+    FSM-хранилище aiogram в таблице fsm_state (см. database.migrations).
+    Состояние и данные лежат одной строкой, data — JSONB (кодек задает
+    database.pool.create_pool). Запись идет сразу
+    в базу (upsert) и в локальный кеш, поэтому чтения в рамках одного
+    процесса не ходят в базу.
+
+    Кеш не знает о записях других процессов: при нескольких воркерах без
+    sticky-маршрутизации апдейтов по пользователю нужно ставить cache_ttl=0.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        state_ttl: int = FSM_STATE_TTL,
+        cache_ttl: int = FSM_CACHE_TTL,
+        key_builder: Optional[KeyBuilder] = None
+    ):
+        self.pool = pool
+        self.state_ttl = state_ttl
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        # key -> (state, data)
+        self.cache: Optional[TTLCache] = TTLCache(maxsize=FSM_CACHE_SIZE, ttl=cache_ttl) if cache_ttl > 0 else None
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запускает периодическое удаление устаревших состояний"""
+        if not self._cleanup_task:
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+
+    async def close(self) -> None:
+        if self._cleanup_task:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
+
+    # ---- Чтение
+
+    async def _load(self, key: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        if self.cache is not None and key in self.cache:
+            return self.cache[key]
+
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                '''
+                SELECT state, data FROM fsm_state
+                WHERE key = $1 AND updated_at > NOW() - make_interval(secs => $2)
+                ''',
+                key, self.state_ttl
+            )
+        record = (row['state'], row['data']) if row else (None, {})
+        if self.cache is not None:
+            self.cache[key] = record
+        return record
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._load(self.key_builder.build(key))
+        return state
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._load(self.key_builder.build(key))
+        return copy.deepcopy(data)
+
+    # ---- Запись
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self.key_builder.build(key)
+        state = state.state if isinstance(state, State) else state
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                '''
+                INSERT INTO fsm_state (key, state, updated_at)
+                VALUES ($1, $2, NOW())
+                ON CONFLICT (key) DO UPDATE
+                SET state = EXCLUDED.state,
+                    -- данные устаревшего сценария не воскрешаем
+                    data = CASE WHEN fsm_state.updated_at > NOW() - make_interval(secs => $3)
+                                THEN fsm_state.data ELSE '{}'::jsonb END,
+                    updated_at = EXCLUDED.updated_at
+                RETURNING data
+                ''',
+                storage_key, state, self.state_ttl
+            )
+        if self.cache is not None:
+            self.cache[storage_key] = (state, row['data'])
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        storage_key = self.key_builder.build(key)
+        data = copy.deepcopy(data)
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                '''
+                INSERT INTO fsm_state (key, data, updated_at)
+                VALUES ($1, $2::jsonb, NOW())
+                ON CONFLICT (key) DO UPDATE
+                SET data = EXCLUDED.data,
+                    state = CASE WHEN fsm_state.updated_at > NOW() - make_interval(secs => $3)
+                                 THEN fsm_state.state END,
+                    updated_at = EXCLUDED.updated_at
+                RETURNING state
+                ''',
+                storage_key, data, self.state_ttl
+            )
+        if self.cache is not None:
+            self.cache[storage_key] = (row['state'], data)
+
+    # ---- TTL
+
+    async def cleanup(self) -> int:
+        """Удаляет устаревшие и пустые записи, возвращает их количество"""
+        async with self.pool.acquire() as conn:
+            result = await conn.execute(
+                '''
+                DELETE FROM fsm_state
+                WHERE updated_at < NOW() - make_interval(secs => $1)
+                   OR (state IS NULL AND data = '{}'::jsonb)
+                ''',
+                self.state_ttl
+            )
+        return int(result.split()[-1])
+
+    async def _cleanup_loop(self) -> None:
+        while True:
+            try:
+                deleted = await self.cleanup()
+                if deleted:
+                    logger.info(f"Removed {deleted} stale FSM states")
+            except Exception as e:
+                logger.error(f"FSM state cleanup failed: {e}")
+            await asyncio.sleep(FSM_CLEANUP_INTERVAL)
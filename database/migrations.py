@@ -0,0 +1,311 @@
+import logging
+from typing import List, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg_advisory_lock, чтобы два процесса бота не накатывали миграции одновременно
+MIGRATIONS_LOCK_KEY = 726_300_001
+
+# (version, description, statements). Миграции только добавляются в конец,
+# уже примененные не редактируются.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "Reconcile postgres_schema.py with pg_schema.sql", [
+        # postgres_schema.py создавал task.status NOT NULL, а модель его не заполняет
+        '''
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema()
+                  AND table_name = 'task' AND column_name = 'status'
+            ) THEN
+                ALTER TABLE task ALTER COLUMN status DROP NOT NULL;
+            END IF;
+        END $$
+        ''',
+        # Task.import_from_csv использует ON CONFLICT (title)
+        '''
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM task GROUP BY title HAVING COUNT(*) > 1) THEN
+                CREATE UNIQUE INDEX IF NOT EXISTS task_title_key ON task (title);
+            ELSE
+                RAISE WARNING 'task has duplicate titles, unique index on title skipped';
+            END IF;
+        END $$
+        ''',
+        'ALTER TABLE assignment ADD COLUMN IF NOT EXISTS notification_scheduled BOOLEAN DEFAULT FALSE',
+        '''
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM assignment GROUP BY task_id, tg_id HAVING COUNT(*) > 1) THEN
+                CREATE UNIQUE INDEX IF NOT EXISTS assignment_task_id_tg_id_key ON assignment (task_id, tg_id);
+            ELSE
+                RAISE WARNING 'assignment has duplicate (task_id, tg_id) rows, unique index skipped';
+                CREATE INDEX IF NOT EXISTS idx_assignment_task_tg ON assignment (task_id, tg_id);
+            END IF;
+        END $$
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS spot_task (
+            spot_task_id   SERIAL PRIMARY KEY,
+            name           TEXT NOT NULL,
+            description    TEXT NOT NULL,
+            created_at     TIMESTAMP NOT NULL DEFAULT NOW(),
+            expires_at     TIMESTAMP NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS spot_task_response (
+            response_id    SERIAL PRIMARY KEY,
+            spot_task_id   INTEGER NOT NULL REFERENCES spot_task(spot_task_id) ON DELETE CASCADE,
+            volunteer_id   BIGINT NOT NULL REFERENCES users(tg_id) ON DELETE CASCADE,
+            response       VARCHAR(16) NOT NULL CHECK (response IN ('accepted', 'declined', 'none')),
+            responded_at   TIMESTAMP NOT NULL DEFAULT NOW(),
+            message_id     INTEGER NOT NULL,
+            UNIQUE (spot_task_id, volunteer_id)
+        )
+        ''',
+        # Индекс из pg_schema.sql на несуществующую колонку task.status не переносим
+        'DROP INDEX IF EXISTS idx_task_status',
+    ]),
+    (2, "Indexes for hot query paths", [
+        # Assignment.get_by_volunteer, проверки занятости волонтера
+        'CREATE INDEX IF NOT EXISTS idx_assignment_tg_id ON assignment (tg_id)',
+        # Assignment.get_active_with_volunteers / update_active_by_task
+        '''
+        CREATE INDEX IF NOT EXISTS idx_assignment_task_active
+            ON assignment (task_id) INCLUDE (tg_id, assign_id)
+            WHERE status != 'cancelled'
+        ''',
+        'DROP INDEX IF EXISTS idx_assignment_status',
+        # User.get_by_role — админы для рассылок, волонтеры для спот-заданий
+        'CREATE INDEX IF NOT EXISTS idx_users_role ON users (role) INCLUDE (tg_id, tg_username, name)',
+        # SpotTaskResponse.get_by_task
+        '''
+        CREATE INDEX IF NOT EXISTS idx_spot_task_response_spot_task
+            ON spot_task_response (spot_task_id) INCLUDE (volunteer_id, response, message_id)
+        ''',
+        # SpotTask.get_active
+        'CREATE INDEX IF NOT EXISTS idx_spot_task_expires_at ON spot_task (expires_at)',
+    ]),
+    (3, "FSM storage", [
+        # database.fsm_storage.PgStorage
+        '''
+        CREATE TABLE IF NOT EXISTS fsm_state (
+            key         TEXT PRIMARY KEY,
+            state       TEXT,
+            data        JSONB NOT NULL DEFAULT '{}'::jsonb,
+            updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_fsm_state_updated_at ON fsm_state (updated_at)',
+    ]),
+    (4, "Scheduler job store", [
+        # services.job_store.AsyncpgJobStore; формат совпадает с SQLAlchemyJobStore,
+        # поэтому уже сохраненные задачи подхватываются как есть
+        '''
+        CREATE TABLE IF NOT EXISTS apscheduler_jobs (
+            id             VARCHAR(191) PRIMARY KEY,
+            next_run_time  DOUBLE PRECISION,
+            job_state      BYTEA NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS ix_apscheduler_jobs_next_run_time ON apscheduler_jobs (next_run_time)',
+    ]),
+    (5, "Spot task expiry sweeper", [
+        # services.spot_cleanup.SpotExpirySweeper
+        'ALTER TABLE spot_task ADD COLUMN IF NOT EXISTS cleaned_at TIMESTAMP',
+        # Уже истекшие задания чистили per-message job'ы
+        'UPDATE spot_task SET cleaned_at = expires_at WHERE expires_at <= NOW() AND cleaned_at IS NULL',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_spot_task_uncleaned
+            ON spot_task (expires_at) WHERE cleaned_at IS NULL
+        ''',
+    ]),
+    (6, "Spot task response summaries", [
+        # services.spot_responses.SpotResponseAggregator
+        '''
+        CREATE TABLE IF NOT EXISTS spot_task_summary (
+            spot_task_id  INTEGER NOT NULL REFERENCES spot_task(spot_task_id) ON DELETE CASCADE,
+            admin_id      BIGINT NOT NULL,
+            message_id    INTEGER NOT NULL,
+            PRIMARY KEY (spot_task_id, admin_id)
+        )
+        ''',
+    ]),
+    (7, "Sheet sync change tracking", [
+        # services.sheet_sync: выгрузка в таблицу берет только строки с revision
+        # больше последней выгруженной, sheet_sync_row хранит хеш строки таблицы
+        'CREATE SEQUENCE IF NOT EXISTS sync_revision_seq',
+        "ALTER TABLE task ADD COLUMN IF NOT EXISTS revision BIGINT NOT NULL DEFAULT nextval('sync_revision_seq')",
+        'ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP',
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS revision BIGINT NOT NULL DEFAULT nextval('sync_revision_seq')",
+        '''
+        CREATE OR REPLACE FUNCTION track_row_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                IF NEW IS NOT DISTINCT FROM OLD THEN
+                    RETURN NEW;
+                END IF;
+                NEW.updated_at := NOW();
+            END IF;
+            NEW.revision := nextval('sync_revision_seq');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        ''',
+        'DROP TRIGGER IF EXISTS task_track_change ON task',
+        '''
+        CREATE TRIGGER task_track_change BEFORE INSERT OR UPDATE ON task
+            FOR EACH ROW EXECUTE FUNCTION track_row_change()
+        ''',
+        'DROP TRIGGER IF EXISTS users_track_change ON users',
+        '''
+        CREATE TRIGGER users_track_change BEFORE INSERT OR UPDATE ON users
+            FOR EACH ROW EXECUTE FUNCTION track_row_change()
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_task_revision ON task (revision)',
+        'CREATE INDEX IF NOT EXISTS idx_users_revision ON users (revision)',
+        '''
+        CREATE TABLE IF NOT EXISTS sheet_sync_state (
+            entity     TEXT PRIMARY KEY,
+            revision   BIGINT NOT NULL DEFAULT 0,
+            synced_at  TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS sheet_sync_row (
+            entity   TEXT NOT NULL,
+            key      TEXT NOT NULL,
+            row_num  INTEGER NOT NULL,
+            hash     TEXT NOT NULL,
+            PRIMARY KEY (entity, key)
+        )
+        ''',
+    ]),
+    (8, "Absolute task and assignment timestamps", [
+        # Дата начала мероприятия из конфига, записывается при запуске (EventSettings.apply)
+        '''
+        CREATE TABLE IF NOT EXISTS event_settings (
+            id          BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+            start_date  TIMESTAMP NOT NULL
+        )
+        ''',
+        '''
+        CREATE OR REPLACE FUNCTION event_timestamp(day INTEGER, hhmm TEXT) RETURNS TIMESTAMP AS $$
+            SELECT start_date + (day - 1) * INTERVAL '1 day' + hhmm::interval FROM event_settings
+        $$ LANGUAGE sql STABLE
+        ''',
+        '''
+        CREATE OR REPLACE FUNCTION fill_event_timestamps() RETURNS trigger AS $$
+        BEGIN
+            NEW.starts_at := event_timestamp(NEW.start_day, NEW.start_time);
+            NEW.ends_at := event_timestamp(NEW.end_day, NEW.end_time);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        ''',
+        'ALTER TABLE task ADD COLUMN IF NOT EXISTS starts_at TIMESTAMP',
+        'ALTER TABLE task ADD COLUMN IF NOT EXISTS ends_at TIMESTAMP',
+        'ALTER TABLE assignment ADD COLUMN IF NOT EXISTS starts_at TIMESTAMP',
+        'ALTER TABLE assignment ADD COLUMN IF NOT EXISTS ends_at TIMESTAMP',
+        'DROP TRIGGER IF EXISTS task_event_timestamps ON task',
+        '''
+        CREATE TRIGGER task_event_timestamps
+            BEFORE INSERT OR UPDATE OF start_day, start_time, end_day, end_time ON task
+            FOR EACH ROW EXECUTE FUNCTION fill_event_timestamps()
+        ''',
+        'DROP TRIGGER IF EXISTS assignment_event_timestamps ON assignment',
+        '''
+        CREATE TRIGGER assignment_event_timestamps
+            BEFORE INSERT OR UPDATE OF start_day, start_time, end_day, end_time ON assignment
+            FOR EACH ROW EXECUTE FUNCTION fill_event_timestamps()
+        ''',
+        # Task.get_active / get_by_day и сортировка списков
+        'CREATE INDEX IF NOT EXISTS idx_task_ends_at ON task (ends_at) INCLUDE (starts_at)',
+        'CREATE INDEX IF NOT EXISTS idx_task_starts_at ON task (starts_at)',
+        # Ближайшие назначения волонтера
+        'CREATE INDEX IF NOT EXISTS idx_assignment_tg_id_starts_at ON assignment (tg_id, starts_at)',
+    ]),
+    (9, "Keyset pagination of tasks", [
+        # Task.get_overview_page: ORDER BY / WHERE (starts_at, task_id) > (...)
+        'CREATE INDEX IF NOT EXISTS idx_task_starts_at_task_id ON task (starts_at, task_id)',
+        'DROP INDEX IF EXISTS idx_task_starts_at',
+    ]),
+    (10, "Snapshot-safe sheet sync watermark", [
+        # revision берется из sequence до коммита: транзакция, закоммиченная позже
+        # выгрузки с большей revision, пропускалась навсегда. Теперь строка помнит
+        # xid изменившей ее транзакции, а выгрузка сохраняет xmin своего снимка
+        # (sheet_sync_state.revision) и в следующий раз читает все строки с xid
+        # не меньше него — включая незавершенные на тот момент транзакции
+        "ALTER TABLE task ADD COLUMN IF NOT EXISTS changed_xid xid8 NOT NULL DEFAULT '0'",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS changed_xid xid8 NOT NULL DEFAULT '0'",
+        '''
+        CREATE OR REPLACE FUNCTION track_row_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                IF NEW IS NOT DISTINCT FROM OLD THEN
+                    RETURN NEW;
+                END IF;
+                NEW.updated_at := NOW();
+            END IF;
+            NEW.revision := nextval('sync_revision_seq');
+            NEW.changed_xid := pg_current_xact_id();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_task_changed_xid ON task (changed_xid)',
+        'CREATE INDEX IF NOT EXISTS idx_users_changed_xid ON users (changed_xid)',
+        # Сохраненные revision больше не сравнимы с xid: одна повторная проверка
+        # всех строк, неизмененные отсекаются по хешу
+        'UPDATE sheet_sync_state SET revision = 0',
+    ]),
+]
+
+
+async def get_schema_version(conn: asyncpg.Connection) -> int:
+    exists = await conn.fetchval("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not exists:
+        return 0
+    return await conn.fetchval('SELECT COALESCE(MAX(version), 0) FROM schema_migrations')
+
+
+async def apply_migrations(pool: asyncpg.Pool) -> int:
+    """
+    Накатывает недостающие миграции, каждую в своей транзакции.
+    Возвращает текущую версию схемы.
+    """
+    async with pool.acquire() as conn:
+        # Построение индексов и ожидание блокировки не ограничиваем statement_timeout пула
+        await conn.execute('SET statement_timeout = 0')
+        await conn.execute('SELECT pg_advisory_lock($1)', MIGRATIONS_LOCK_KEY)
+        try:
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version     INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at  TIMESTAMP NOT NULL DEFAULT NOW()
+                )
+            ''')
+            version = await get_schema_version(conn)
+
+            for migration_version, description, statements in MIGRATIONS:
+                if migration_version <= version:
+                    continue
+                async with conn.transaction():
+                    for statement in statements:
+                        await conn.execute(statement)
+                    await conn.execute(
+                        'INSERT INTO schema_migrations (version, description) VALUES ($1, $2)',
+                        migration_version, description
+                    )
+                version = migration_version
+                logger.info(f"Applied migration {migration_version}: {description}")
+
+            return version
+        finally:
+            await conn.execute('SELECT pg_advisory_unlock($1)', MIGRATIONS_LOCK_KEY)
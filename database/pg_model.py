@@ -1,17 +1,34 @@
 import asyncpg
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
 from utils.event_time import EventTime, EventTimeManager
+from database.row_mapping import fetch, fetchrow, map_row, map_rows
+from database.pool import prepared_fetch, prepared_fetchrow
 import logging
 import csv
 from io import StringIO
 
-async def create_pool(**kwargs) -> asyncpg.Pool:
-    """Create a connection pool for PostgreSQL"""
-    return await asyncpg.create_pool(**kwargs)
+# Подписчики на изменения users/pending_users (см. services.user_directory).
+# listener(event, payload), event: "user" (User), "pending" (PendingUser),
+# "pending_deleted" (tg_username), "reload" (None — изменено много записей сразу)
+_user_change_listeners: List[Callable[[str, Any], None]] = []
 
-@dataclass
+def add_user_change_listener(listener: Callable[[str, Any], None]) -> None:
+    _user_change_listeners.append(listener)
+
+def remove_user_change_listener(listener: Callable[[str, Any], None]) -> None:
+    if listener in _user_change_listeners:
+        _user_change_listeners.remove(listener)
+
+def notify_user_change(event: str, payload: Any = None) -> None:
+    for listener in list(_user_change_listeners):
+        try:
+            listener(event, payload)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"User change listener failed on '{event}': {e}")
+
+@dataclass(frozen=True, slots=True)
 class User:
     tg_id: int
     tg_username: str
@@ -30,27 +47,18 @@ class User:
                 ''',
                 tg_id, tg_username, name, role
             )
-        return User(tg_id=tg_id, tg_username=tg_username, name=name, role=role)
+        user = User(tg_id=tg_id, tg_username=tg_username, name=name, role=role)
+        notify_user_change("user", user)
+        return user
 
     @staticmethod
     async def get_by_tg_id(pool: asyncpg.Pool, tg_id: int) -> Optional['User']:
         async with pool.acquire() as conn:
-            row = await conn.fetchrow('SELECT * FROM users WHERE tg_id = $1', tg_id)
-            if row:
-                return User(tg_id=row['tg_id'], 
-                          tg_username=row['tg_username'], 
-                          name=row['name'], 
-                          role=row['role'])
-        return None
+            return map_row(User, await prepared_fetchrow(conn, 'user_by_tg_id', tg_id))
 
     @staticmethod
     async def get_all(pool: asyncpg.Pool) -> List['User']:
-        async with pool.acquire() as conn:
-            rows = await conn.fetch('SELECT * FROM users')
-            return [User(tg_id=row['tg_id'],
-                        tg_username=row['tg_username'],
-                        name=row['name'],
-                        role=row['role']) for row in rows]
+        return await fetch(pool, User, 'SELECT * FROM users')
 
     @staticmethod
     async def update_role(pool: asyncpg.Pool, tg_id: int, new_role: str) -> Optional['User']:
@@ -59,49 +67,58 @@ class User:
                 'UPDATE users SET role = $1 WHERE tg_id = $2',
                 new_role, tg_id
             )
-        return await User.get_by_tg_id(pool, tg_id)
+        user = await User.get_by_tg_id(pool, tg_id)
+        if user:
+            notify_user_change("user", user)
+        return user
 
     @staticmethod
     async def get_by_role(pool: asyncpg.Pool, role: str) -> List['User']:
         """Get all users with specified role"""
         async with pool.acquire() as conn:
-            rows = await conn.fetch(
-                '''
-                SELECT * FROM users WHERE role = $1
-                ''',
-                role
-            )
-            return [User(**dict(row)) for row in rows]
+            return map_rows(User, await prepared_fetch(conn, 'users_by_role', role))
 
     @staticmethod
     async def get_by_role_and_status(pool, role: str, status: str) -> List['User']:
-        async with pool.acquire() as conn:
-            rows = await conn.fetch(
-                """
-                SELECT * FROM users 
-                WHERE role = $1 AND status = $2
-                ORDER BY name
-                """,
-                role, status
-            )
-            return [User(**dict(row)) for row in rows]
+        return await fetch(
+            pool, User,
+            """
+            SELECT * FROM users 
+            WHERE role = $1 AND status = $2
+            ORDER BY name
+            """,
+            role, status
+        )
+
+    @staticmethod
+    async def get_by_tg_ids(pool: asyncpg.Pool, tg_ids: List[int]) -> List['User']:
+        """Get several users in one query"""
+        return await fetch(pool, User, 'SELECT * FROM users WHERE tg_id = ANY($1::bigint[])', tg_ids)
 
     @staticmethod
     async def get_by_username(pool: asyncpg.Pool, tg_username: str) -> Optional['User']:
         """Get user by Telegram username"""
+        return await fetchrow(pool, User, 'SELECT * FROM users WHERE tg_username = $1', tg_username)
+
+    @staticmethod
+    async def get_changed_since(pool: asyncpg.Pool, watermark: int) -> tuple[List['User'], int]:
+        """
+        Users changed by transactions with xid >= watermark, and the watermark
+        for the next call (see SheetSyncState.read_changed)
+        """
+        return await SheetSyncState.read_changed(pool, User, 'users', watermark)
+
+    @staticmethod
+    async def get_ids(pool: asyncpg.Pool) -> set[int]:
         async with pool.acquire() as conn:
-            row = await conn.fetchrow(
-                'SELECT * FROM users WHERE tg_username = $1',
-                tg_username
-            )
-            if row:
-                return User(
-                    tg_id=row['tg_id'],
-                    tg_username=row['tg_username'],
-                    name=row['name'],
-                    role=row['role']
-                )
-        return None
+            return {row['tg_id'] for row in await conn.fetch('SELECT tg_id FROM users')}
+
+    @staticmethod
+    async def get_username_map(pool: asyncpg.Pool) -> dict[str, int]:
+        """Get {tg_username: tg_id} for all users in one query"""
+        async with pool.acquire() as conn:
+            rows = await conn.fetch('SELECT tg_username, tg_id FROM users')
+            return {row['tg_username']: row['tg_id'] for row in rows}
 
     @staticmethod
     async def update(pool: asyncpg.Pool, tg_id: int, **kwargs) -> Optional['User']:
@@ -127,17 +144,15 @@ class User:
                 RETURNING *
             """
             
-            row = await conn.fetchrow(query, *values)
-            if row:
-                return User(
-                    tg_id=row['tg_id'],
-                    tg_username=row['tg_username'],
-                    name=row['name'],
-                    role=row['role']
-                )
-            return None
+            user = await fetchrow(conn, User, query, *values)
+            if user:
+                notify_user_change("user", user)
+            return user
 
-@dataclass
+# Задание идет в день $1, если пересекается с его сутками (многодневные тоже)
+TASK_DAY_CONDITION = "t.starts_at < event_timestamp($1 + 1, '00:00') AND t.ends_at > event_timestamp($1, '00:00')"
+
+@dataclass(frozen=True, slots=True)
 class Task:
     task_id: int
     title: str
@@ -149,6 +164,8 @@ class Task:
     created_at: datetime
     updated_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    starts_at: Optional[datetime] = None  # Считаются в БД из start_day/start_time (миграция 8)
+    ends_at: Optional[datetime] = None
 
     @staticmethod
     async def create(pool: asyncpg.Pool, title: str, description: str, 
@@ -171,62 +188,143 @@ class Task:
                 end_event_time.day, end_event_time.time,
                 created_at
             )
-            return Task(
-                task_id=row['task_id'],
-                title=row['title'],
-                description=row['description'],
-                start_day=row['start_day'],
-                start_time=row['start_time'],
-                end_day=row['end_day'],
-                end_time=row['end_time'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at'],
-                completed_at=row['completed_at']
-            )
+            return map_row(Task, row)
 
     def get_absolute_times(self, event_manager: EventTimeManager) -> tuple[datetime, datetime]:
         """Возвращает абсолютные даты начала и конца задания"""
+        if self.starts_at and self.ends_at:
+            return self.starts_at, self.ends_at
         start = event_manager.to_absolute_time(EventTime(self.start_day, self.start_time))
         end = event_manager.to_absolute_time(EventTime(self.end_day, self.end_time))
         return start, end
 
     @staticmethod
     async def get_all(pool: asyncpg.Pool) -> List['Task']:
+        return await fetch(pool, Task, 'SELECT * FROM task')
+    
+    @staticmethod
+    async def get_active(pool: asyncpg.Pool, now: datetime) -> List['Task']:
+        """Незавершенные задания (ends_at > now), по времени начала"""
+        return await fetch(pool, Task, 'SELECT * FROM task WHERE ends_at > $1 ORDER BY starts_at, task_id', now)
+
+    @staticmethod
+    async def get_by_day(pool: asyncpg.Pool, day: int) -> List['Task']:
+        """Задания, которые идут в день мероприятия day, по времени начала"""
+        return await fetch(pool, Task, f'SELECT t.* FROM task t WHERE {TASK_DAY_CONDITION} ORDER BY t.starts_at, t.task_id', day)
+
+    @staticmethod
+    async def get_by_volunteer(pool: asyncpg.Pool, tg_id: int) -> List['Task']:
+        """Задания с неотмененными назначениями волонтера, по времени начала"""
+        return await fetch(
+            pool, Task,
+            '''
+            SELECT t.* FROM task t
+            JOIN assignment a ON a.task_id = t.task_id
+            WHERE a.tg_id = $1 AND a.status != 'cancelled'
+            ORDER BY t.starts_at, t.task_id
+            ''',
+            tg_id
+        )
+
+    @staticmethod
+    async def get_active_with_volunteers(pool: asyncpg.Pool, now: datetime) -> List['TaskOverview']:
+        """
+        Возвращает незавершенные задания вместе с волонтерами одним запросом,
+        отсортированные по времени начала.
+        """
+        return await Task._get_overviews(pool, 't.ends_at > $1', now)
+
+    @staticmethod
+    async def get_by_day_with_volunteers(pool: asyncpg.Pool, day: int) -> List['TaskOverview']:
+        """Задания дня мероприятия day вместе с волонтерами одним запросом"""
+        return await Task._get_overviews(pool, TASK_DAY_CONDITION, day)
+
+    @staticmethod
+    async def get_overview_page(pool: asyncpg.Pool, view: str, value: Any = None, *,
+                                after: Optional[tuple[datetime, int]] = None,
+                                before: Optional[tuple[datetime, int]] = None,
+                                limit: int = 8) -> tuple[List['TaskOverview'], bool]:
+        """
+        Страница списка заданий с волонтерами по ключу (starts_at, task_id).
+        view: 'active' (value — текущее время), 'day' (value — день), 'all'.
+        after/before — ключ последнего/первого задания соседней страницы.
+        Возвращает (задания по времени начала, есть ли еще задания в сторону запроса).
+        """
+        condition, args = {
+            'active': ('t.ends_at > $1', (value,)),
+            'day': (TASK_DAY_CONDITION, (value,)),
+            'all': ('TRUE', ()),
+        }[view]
+        cursor = after or before
+        if cursor:
+            n = len(args)
+            condition += f" AND (t.starts_at, t.task_id) {'>' if after else '<'} (${n + 1}, ${n + 2})"
+            args += tuple(cursor)
+
+        overviews = await Task._get_overviews(
+            pool, condition, *args, descending=bool(before), limit=limit + 1
+        )
+        more = len(overviews) > limit
+        overviews = overviews[:limit]
+        if before:
+            overviews.reverse()
+        return overviews, more
+
+    @staticmethod
+    async def _get_overviews(pool: asyncpg.Pool, condition: str, *args, descending: bool = False,
+                             limit: Optional[int] = None) -> List['TaskOverview']:
+        order = 'DESC' if descending else 'ASC'
         async with pool.acquire() as conn:
-            rows = await conn.fetch('SELECT * FROM task')
+            rows = await conn.fetch(
+                f'''
+                SELECT t.*, v.volunteer_names, v.volunteer_usernames
+                FROM task t
+                -- Волонтеры собираются только для заданий, попавших в LIMIT
+                CROSS JOIN LATERAL (
+                    SELECT COALESCE(array_agg(u.name ORDER BY a.assign_id), '{{}}') AS volunteer_names,
+                           COALESCE(array_agg(u.tg_username ORDER BY a.assign_id), '{{}}') AS volunteer_usernames
+                    FROM assignment a
+                    JOIN users u ON u.tg_id = a.tg_id
+                    WHERE a.task_id = t.task_id AND a.status != 'cancelled'
+                ) v
+                WHERE {condition}
+                ORDER BY t.starts_at {order}, t.task_id {order}
+                {f'LIMIT {int(limit)}' if limit else ''}
+                ''',
+                *args
+            )
             return [
-                Task(
-                    task_id=row['task_id'],
-                    title=row['title'],
-                    description=row['description'],
-                    start_day=row['start_day'],
-                    start_time=row['start_time'],
-                    end_day=row['end_day'],
-                    end_time=row['end_time'],
-                    created_at=row['created_at'],
-                    updated_at=row['updated_at'],
-                    completed_at=row['completed_at']
-                ) for row in rows
+                TaskOverview(
+                    task=task,
+                    volunteers=[
+                        TaskVolunteer(name=name, tg_username=username)
+                        for name, username in zip(row['volunteer_names'], row['volunteer_usernames'])
+                    ]
+                ) for task, row in zip(map_rows(Task, rows), rows)
             ]
-    
+
     @staticmethod
-    async def get_by_id(pool: asyncpg.Pool, task_id: int) -> Optional['Task']:
+    async def get_by_ids(pool: asyncpg.Pool, task_ids: List[int]) -> dict[int, 'Task']:
+        """Get {task_id: Task} for the given ids in one query"""
+        tasks = await fetch(pool, Task, 'SELECT * FROM task WHERE task_id = ANY($1::int[])', task_ids)
+        return {task.task_id: task for task in tasks}
+
+    @staticmethod
+    async def get_changed_since(pool: asyncpg.Pool, watermark: int) -> tuple[List['Task'], int]:
+        """
+        Tasks changed by transactions with xid >= watermark, and the watermark
+        for the next call (see SheetSyncState.read_changed)
+        """
+        return await SheetSyncState.read_changed(pool, Task, 'task', watermark)
+
+    @staticmethod
+    async def get_ids(pool: asyncpg.Pool) -> set[int]:
         async with pool.acquire() as conn:
-            row = await conn.fetchrow('SELECT * FROM task WHERE task_id = $1', task_id)
-            if row:
-                return Task(
-                    task_id=row['task_id'],
-                    title=row['title'],
-                    description=row['description'],
-                    start_day=row['start_day'],
-                    start_time=row['start_time'],
-                    end_day=row['end_day'],
-                    end_time=row['end_time'],
-                    created_at=row['created_at'],
-                    updated_at=row['updated_at'],
-                    completed_at=row['completed_at']
-                )
-        return None
+            return {row['task_id'] for row in await conn.fetch('SELECT task_id FROM task')}
+
+    @staticmethod
+    async def get_by_id(pool: asyncpg.Pool, task_id: int) -> Optional['Task']:
+        return await fetchrow(pool, Task, 'SELECT * FROM task WHERE task_id = $1', task_id)
 
     @staticmethod
     async def update(pool: asyncpg.Pool, task_id: int, **kwargs) -> Optional['Task']:
@@ -253,8 +351,7 @@ class Task:
                 RETURNING *
             """
             
-            row = await conn.fetchrow(query, *values)
-            return Task.from_db_row(row) if row else None
+            return await fetchrow(conn, Task, query, *values)
 
     @staticmethod
     async def update_from_sheet(pool: asyncpg.Pool, task_id: int, title: str, description: str,
@@ -275,23 +372,85 @@ class Task:
                 end_day, end_time,
                 task_id
             )
-            return Task.from_db_row(row) if row else None
+            return map_row(Task, row)
+
+    @staticmethod
+    async def bulk_upsert_from_sheet(pool: asyncpg.Pool, rows: List[tuple]) -> tuple[dict[int, int], int, int]:
+        """
+        Применяет строки таблицы одной транзакцией.
+        rows: (row_num, task_id | None, title, description, start_day, start_time, end_day, end_time).
+        Строки без task_id (или с task_id, которого нет в БД) сначала ищутся по
+        названию — так повтор импорта после неудачной записи id в таблицу не
+        создает дубликат, — остальные создают новые задания.
+        Возвращает ({row_num: task_id} для строк без id в таблице,
+        число созданных заданий, число обновленных заданий).
+        """
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute('''
+                    CREATE TEMP TABLE tmp_task_import (
+                        row_num     INTEGER NOT NULL,
+                        task_id     INTEGER,
+                        title       TEXT NOT NULL,
+                        description TEXT,
+                        start_day   INTEGER NOT NULL,
+                        start_time  TEXT NOT NULL,
+                        end_day     INTEGER NOT NULL,
+                        end_time    TEXT NOT NULL
+                    ) ON COMMIT DROP
+                ''')
+                await conn.copy_records_to_table(
+                    'tmp_task_import',
+                    records=rows,
+                    columns=['row_num', 'task_id', 'title', 'description',
+                             'start_day', 'start_time', 'end_day', 'end_time']
+                )
+                # Unknown ids are treated as new tasks, new tasks get ids from the task sequence
+                await conn.execute('''
+                    UPDATE tmp_task_import i SET task_id = NULL
+                    WHERE task_id IS NOT NULL
+                      AND NOT EXISTS (SELECT 1 FROM task t WHERE t.task_id = i.task_id)
+                ''')
+                matched = await conn.fetch('''
+                    UPDATE tmp_task_import i SET task_id = t.task_id
+                    FROM task t
+                    WHERE i.task_id IS NULL AND t.title = i.title
+                    RETURNING i.row_num, i.task_id
+                ''')
+                created = await conn.fetch('''
+                    UPDATE tmp_task_import
+                    SET task_id = nextval(pg_get_serial_sequence('task', 'task_id'))
+                    WHERE task_id IS NULL
+                    RETURNING row_num, task_id
+                ''')
+                result = await conn.execute('''
+                    INSERT INTO task (task_id, title, description, start_day, start_time,
+                                      end_day, end_time, created_at)
+                    SELECT task_id, title, description, start_day, start_time,
+                           end_day, end_time, NOW()
+                    FROM tmp_task_import
+                    ON CONFLICT (task_id) DO UPDATE SET
+                        title = EXCLUDED.title,
+                        description = EXCLUDED.description,
+                        start_day = EXCLUDED.start_day,
+                        start_time = EXCLUDED.start_time,
+                        end_day = EXCLUDED.end_day,
+                        end_time = EXCLUDED.end_time,
+                        updated_at = NOW()
+                    WHERE (task.title, task.description, task.start_day, task.start_time,
+                           task.end_day, task.end_time)
+                          IS DISTINCT FROM
+                          (EXCLUDED.title, EXCLUDED.description, EXCLUDED.start_day,
+                           EXCLUDED.start_time, EXCLUDED.end_day, EXCLUDED.end_time)
+                ''')
+                written = int(result.split()[-1])
+                ids = {row['row_num']: row['task_id'] for row in (*matched, *created)}
+                return ids, len(created), written - len(created)
 
     @classmethod
     def from_db_row(cls, row) -> 'Task':
         """Create Task instance from database row"""
-        return cls(
-            task_id=row['task_id'],
-            title=row['title'],
-            description=row['description'],
-            start_day=row['start_day'],
-            start_time=row['start_time'],
-            end_day=row['end_day'],
-            end_time=row['end_time'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at'],
-            completed_at=row['completed_at']
-        )
+        return map_row(cls, row)
 
     @staticmethod
     async def delete(pool, task_id: int) -> bool:
@@ -370,7 +529,29 @@ class Task:
                 ])
             return output.getvalue()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class TaskVolunteer:
+    name: str
+    tg_username: str
+
+@dataclass(frozen=True, slots=True)
+class TaskOverview:
+    """Задание вместе с назначенными волонтерами (для списков в админке)"""
+    task: Task
+    volunteers: List[TaskVolunteer]
+
+@dataclass(frozen=True, slots=True)
+class AssignmentDelta:
+    """Результат Assignment.reassign: что изменилось в составе волонтеров задания"""
+    added: List['Assignment']
+    removed: List['Assignment']
+    kept: List[int]  # tg_id волонтеров, чьи назначения не трогались
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+@dataclass(frozen=True, slots=True)
 class Assignment:
     assign_id: int
     task_id: int
@@ -382,7 +563,11 @@ class Assignment:
     end_day: int
     end_time: str
     status: str
-    notification_scheduled: bool = False 
+    notification_scheduled: bool = False
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+
+    @staticmethod
     async def create(pool: asyncpg.Pool, task_id: int, tg_id: int, assigned_by: int,
                     start_day: int, start_time: str, end_day: int, end_time: str, status: str = 'assigned') -> 'Assignment':
         assigned_at = datetime.now()
@@ -399,58 +584,19 @@ class Assignment:
                 task_id, tg_id, assigned_by, assigned_at,
                 start_day, start_time, end_day, end_time, status
             )
-            return Assignment(
-                assign_id=row['assign_id'],
-                task_id=row['task_id'],
-                tg_id=row['tg_id'],
-                assigned_by=row['assigned_by'],
-                assigned_at=row['assigned_at'],
-                start_day=row['start_day'],
-                start_time=row['start_time'],
-                end_day=row['end_day'],
-                end_time=row['end_time'],
-                status=row['status']
-            )
+            return map_row(Assignment, row)
 
     @staticmethod
     async def get_by_task(pool: asyncpg.Pool, task_id: int) -> List['Assignment']:
         """Get all assignments for a specific task"""
         async with pool.acquire() as conn:
-            rows = await conn.fetch('SELECT * FROM assignment WHERE task_id = $1', task_id)
-            return [
-                Assignment(
-                    assign_id=row['assign_id'],
-                    task_id=row['task_id'],
-                    tg_id=row['tg_id'],
-                    assigned_by=row['assigned_by'],
-                    assigned_at=row['assigned_at'],
-                    start_day=row['start_day'],
-                    start_time=row['start_time'],
-                    end_day=row['end_day'],
-                    end_time=row['end_time'],
-                    status=row['status']
-                ) for row in rows
-            ]
+            return map_rows(Assignment, await prepared_fetch(conn, 'assignments_by_task', task_id))
 
     @staticmethod
     async def get_by_volunteer(pool: asyncpg.Pool, tg_id: int) -> List['Assignment']:
         """Get all assignments for a specific volunteer"""
         async with pool.acquire() as conn:
-            rows = await conn.fetch('SELECT * FROM assignment WHERE tg_id = $1', tg_id)
-            return [
-                Assignment(
-                    assign_id=row['assign_id'],
-                    task_id=row['task_id'],
-                    tg_id=row['tg_id'],
-                    assigned_by=row['assigned_by'],
-                    assigned_at=row['assigned_at'],
-                    start_day=row['start_day'],
-                    start_time=row['start_time'],
-                    end_day=row['end_day'],
-                    end_time=row['end_time'],
-                    status=row['status']
-                ) for row in rows
-            ]
+            return map_rows(Assignment, await prepared_fetch(conn, 'assignments_by_volunteer', tg_id))
 
     @staticmethod
     async def update_status(pool: asyncpg.Pool, assign_id: int, new_status: str) -> Optional['Assignment']:
@@ -465,31 +611,19 @@ class Assignment:
                 ''',
                 new_status, assign_id
             )
-            
-            if row:
-                return Assignment(
-                    assign_id=row['assign_id'],
-                    task_id=row['task_id'],
-                    tg_id=row['tg_id'],
-                    assigned_by=row['assigned_by'],
-                    assigned_at=row['assigned_at'],
-                    start_day=row['start_day'],
-                    start_time=row['start_time'],
-                    end_day=row['end_day'],
-                    end_time=row['end_time'],
-                    status=row['status']
-                )
-        return None
+            return map_row(Assignment, row)
 
     def get_absolute_times(self, event_manager: EventTimeManager) -> tuple[datetime, datetime]:
         """Get absolute start and end times for the assignment"""
+        if self.starts_at and self.ends_at:
+            return self.starts_at, self.ends_at
         start = event_manager.to_absolute_time(EventTime(self.start_day, self.start_time))
         end = event_manager.to_absolute_time(EventTime(self.end_day, self.end_time))
         return start, end
 
     @staticmethod
     async def get_all_with_details(pool: asyncpg.Pool) -> List['Assignment']:
-        """Get all assignments with task and volunteer details"""
+        """Get all active assignments with task and volunteer details"""
         async with pool.acquire() as conn:
             rows = await conn.fetch('''
                 SELECT a.*, t.title as task_title, 
@@ -497,21 +631,10 @@ class Assignment:
                 FROM assignment a
                 JOIN task t ON a.task_id = t.task_id
                 JOIN users u ON a.tg_id = u.tg_id
+                WHERE a.status != 'cancelled'
                 ORDER BY t.task_id, a.assigned_at
             ''')
-            
-            return [Assignment(
-                assign_id=row['assign_id'],
-                task_id=row['task_id'],
-                tg_id=row['tg_id'],
-                assigned_by=row['assigned_by'],
-                assigned_at=row['assigned_at'],
-                start_day=row['start_day'],
-                start_time=row['start_time'],
-                end_day=row['end_day'],
-                end_time=row['end_time'],
-                status=row['status']
-            ) for row in rows]
+            return map_rows(Assignment, rows)
 
     @staticmethod
     async def mark_notification_scheduled(pool: asyncpg.Pool, assign_id: int) -> None:
@@ -526,6 +649,36 @@ class Assignment:
                 assign_id
             )
 
+    @staticmethod
+    async def mark_task_notifications_scheduled(pool: asyncpg.Pool, task_id: int) -> None:
+        """Mark all active assignments of a task as having scheduled notification"""
+        async with pool.acquire() as conn:
+            await conn.execute(
+                '''
+                UPDATE assignment
+                SET notification_scheduled = true
+                WHERE task_id = $1 AND status != 'cancelled'
+                ''',
+                task_id
+            )
+
+    @staticmethod
+    async def get_active_with_volunteers(pool: asyncpg.Pool, task_id: int) -> List[tuple['Assignment', User]]:
+        """Get active assignments of a task together with their volunteers in one query"""
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                '''
+                SELECT a.*, u.tg_username, u.name, u.role
+                FROM assignment a
+                JOIN users u ON u.tg_id = a.tg_id
+                WHERE a.task_id = $1 AND a.status != 'cancelled'
+                ORDER BY a.assign_id
+                ''',
+                task_id
+            )
+            # Колонки users и assignment не пересекаются, кроме tg_id
+            return list(zip(map_rows(Assignment, rows), map_rows(User, rows)))
+
     @staticmethod
     async def get_pending_notifications(pool: asyncpg.Pool) -> List['Assignment']:
         """Get all assignments that need notifications"""
@@ -537,7 +690,7 @@ class Assignment:
                 AND status = 'assigned'
                 '''
             )
-            return [Assignment(**dict(row)) for row in rows]
+            return map_rows(Assignment, rows)
 
     @staticmethod
     async def get_by_id(pool: asyncpg.Pool, assign_id: int) -> Optional['Assignment']:
@@ -550,7 +703,7 @@ class Assignment:
                 ''',
                 assign_id
             )
-            return Assignment(**dict(row)) if row else None
+            return map_row(Assignment, row)
 
     @staticmethod
     async def update(pool: asyncpg.Pool, assign_id: int, **kwargs) -> Optional['Assignment']:
@@ -575,10 +728,207 @@ class Assignment:
                 ''',
                 *values
             )
-            
-            if row:
-                return Assignment(**dict(row))
-        return None
+            return map_row(Assignment, row)
+
+    @staticmethod
+    async def update_active_by_task(pool: asyncpg.Pool, task_id: int, **kwargs) -> int:
+        """Update fields of all non-cancelled assignments of a task, returns number of updated rows"""
+        if not kwargs:
+            return 0
+
+        set_fields = []
+        values = []
+        for i, (key, value) in enumerate(kwargs.items(), start=1):
+            set_fields.append(f"{key} = ${i}")
+            values.append(value)
+        values.append(task_id)
+
+        async with pool.acquire() as conn:
+            result = await conn.execute(
+                f'''
+                UPDATE assignment
+                SET {", ".join(set_fields)}
+                WHERE task_id = ${len(values)} AND status != 'cancelled'
+                ''',
+                *values
+            )
+            return int(result.split()[-1])
+
+    @staticmethod
+    async def get_active_usernames_by_task(pool: asyncpg.Pool) -> dict[int, List[str]]:
+        """Get {task_id: [tg_username, ...]} of active assignments for all tasks in one query"""
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                '''
+                SELECT a.task_id, array_agg(u.tg_username ORDER BY a.assign_id) AS usernames
+                FROM assignment a
+                JOIN users u ON u.tg_id = a.tg_id
+                WHERE a.status != 'cancelled'
+                GROUP BY a.task_id
+                '''
+            )
+            return {row['task_id']: list(row['usernames']) for row in rows}
+
+    @staticmethod
+    async def replace_for_tasks(pool: asyncpg.Pool, task_ids: List[int], records: List[tuple]) -> int:
+        """
+        Atomically replace all assignments of the given tasks, as reassign() does:
+        missing volunteers are cancelled, previously cancelled rows are revived,
+        kept assignments (and their notification flag) stay untouched.
+        records: (task_id, tg_id, assigned_by, start_day, start_time, end_day, end_time)
+        """
+        assigned_at = datetime.now()
+        columns = [list(column) for column in zip(*records)] if records else [[] for _ in range(7)]
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    '''
+                    SELECT 1 FROM assignment WHERE task_id = ANY($1::int[]) FOR UPDATE
+                    ''',
+                    task_ids
+                )
+                await conn.execute(
+                    '''
+                    UPDATE assignment a SET status = 'cancelled'
+                    WHERE a.task_id = ANY($1::int[])
+                      AND a.status != 'cancelled'
+                      AND NOT EXISTS (
+                          SELECT 1 FROM unnest($2::int[], $3::bigint[]) AS r(task_id, tg_id)
+                          WHERE r.task_id = a.task_id AND r.tg_id = a.tg_id
+                      )
+                    ''',
+                    task_ids, columns[0], columns[1]
+                )
+                await conn.execute(
+                    '''
+                    UPDATE assignment a SET
+                        status = 'assigned', assigned_by = r.assigned_by, assigned_at = $8,
+                        start_day = r.start_day, start_time = r.start_time,
+                        end_day = r.end_day, end_time = r.end_time,
+                        notification_scheduled = FALSE
+                    FROM unnest($1::int[], $2::bigint[], $3::bigint[], $4::int[],
+                                $5::text[], $6::int[], $7::text[])
+                        AS r(task_id, tg_id, assigned_by, start_day, start_time, end_day, end_time)
+                    WHERE a.task_id = r.task_id AND a.tg_id = r.tg_id AND a.status = 'cancelled'
+                    ''',
+                    *columns, assigned_at
+                )
+                await conn.execute(
+                    '''
+                    INSERT INTO assignment (
+                        task_id, tg_id, assigned_by, assigned_at,
+                        start_day, start_time, end_day, end_time, status
+                    )
+                    SELECT r.task_id, r.tg_id, r.assigned_by, $8,
+                           r.start_day, r.start_time, r.end_day, r.end_time, 'assigned'
+                    FROM unnest($1::int[], $2::bigint[], $3::bigint[], $4::int[],
+                                $5::text[], $6::int[], $7::text[])
+                        AS r(task_id, tg_id, assigned_by, start_day, start_time, end_day, end_time)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM assignment a
+                        WHERE a.task_id = r.task_id AND a.tg_id = r.tg_id
+                    )
+                    ''',
+                    *columns, assigned_at
+                )
+        return len(records)
+
+    @staticmethod
+    async def _insert_many(conn: asyncpg.Connection, task: 'Task', tg_ids: List[int],
+                           assigned_by: int, assigned_at: datetime) -> List['Assignment']:
+        """Один INSERT на всех волонтеров"""
+        rows = await conn.fetch(
+            '''
+            INSERT INTO assignment (
+                task_id, tg_id, assigned_by, assigned_at,
+                start_day, start_time, end_day, end_time, status
+            )
+            SELECT $1, v.tg_id, $3, $4, $5, $6, $7, $8, 'assigned'
+            FROM unnest($2::bigint[]) AS v(tg_id)
+            RETURNING *
+            ''',
+            task.task_id, tg_ids, assigned_by, assigned_at,
+            task.start_day, task.start_time, task.end_day, task.end_time
+        )
+        return map_rows(Assignment, rows)
+
+    @staticmethod
+    async def create_many(pool: asyncpg.Pool, task: 'Task', tg_ids: List[int],
+                          assigned_by: int) -> List['Assignment']:
+        """Create 'assigned' assignments of a task for several volunteers in one query"""
+        if not tg_ids:
+            return []
+        async with pool.acquire() as conn:
+            return await Assignment._insert_many(conn, task, list(tg_ids), assigned_by, datetime.now())
+
+    @staticmethod
+    async def reassign(pool: asyncpg.Pool, task: 'Task', tg_ids: List[int],
+                       assigned_by: int) -> AssignmentDelta:
+        """
+        Приводит состав назначенных на задание к tg_ids одной транзакцией:
+        новые волонтеры добавляются (отмененное ранее назначение
+        восстанавливается — (task_id, tg_id) уникален), убранные отменяются,
+        остальные назначения не меняются.
+        """
+        selected = list(dict.fromkeys(tg_ids))
+        assigned_at = datetime.now()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                current = await conn.fetch(
+                    'SELECT tg_id, status FROM assignment WHERE task_id = $1 FOR UPDATE',
+                    task.task_id
+                )
+                active = {row['tg_id'] for row in current if row['status'] != 'cancelled'}
+                cancelled = {row['tg_id'] for row in current if row['status'] == 'cancelled'}
+
+                to_remove = list(active.difference(selected))
+                to_revive = [tg_id for tg_id in selected if tg_id in cancelled]
+                to_insert = [tg_id for tg_id in selected if tg_id not in active and tg_id not in cancelled]
+
+                removed = []
+                if to_remove:
+                    removed = map_rows(Assignment, await conn.fetch(
+                        '''
+                        UPDATE assignment SET status = 'cancelled'
+                        WHERE task_id = $1 AND tg_id = ANY($2::bigint[])
+                        RETURNING *
+                        ''',
+                        task.task_id, to_remove
+                    ))
+
+                added = []
+                if to_revive:
+                    added = map_rows(Assignment, await conn.fetch(
+                        '''
+                        UPDATE assignment
+                        SET status = 'assigned', assigned_by = $3, assigned_at = $4,
+                            start_day = $5, start_time = $6, end_day = $7, end_time = $8,
+                            notification_scheduled = false
+                        WHERE task_id = $1 AND tg_id = ANY($2::bigint[])
+                        RETURNING *
+                        ''',
+                        task.task_id, to_revive, assigned_by, assigned_at,
+                        task.start_day, task.start_time, task.end_day, task.end_time
+                    ))
+                if to_insert:
+                    added += await Assignment._insert_many(conn, task, to_insert, assigned_by, assigned_at)
+
+        return AssignmentDelta(
+            added=added,
+            removed=removed,
+            kept=[tg_id for tg_id in selected if tg_id in active]
+        )
+
+    @staticmethod
+    async def mark_notifications_scheduled(pool: asyncpg.Pool, assign_ids: List[int]) -> None:
+        """Mark several assignments as having scheduled notification"""
+        if not assign_ids:
+            return
+        async with pool.acquire() as conn:
+            await conn.execute(
+                'UPDATE assignment SET notification_scheduled = true WHERE assign_id = ANY($1::int[])',
+                assign_ids
+            )
 
     @staticmethod
     async def delete_by_task(pool, task_id: int) -> int:
@@ -593,7 +943,7 @@ class Assignment:
                 logger.error(f"Error deleting assignments for task {task_id}: {e}")
                 return 0
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PendingUser:
     tg_username: str
     name: str
@@ -611,22 +961,13 @@ class PendingUser:
                 ''',
                 tg_username, name, role
             )
-        return PendingUser(tg_username=tg_username, name=name, role=role)
+        pending_user = PendingUser(tg_username=tg_username, name=name, role=role)
+        notify_user_change("pending", pending_user)
+        return pending_user
 
     @staticmethod
     async def get_by_username(pool: asyncpg.Pool, tg_username: str) -> Optional['PendingUser']:
-        async with pool.acquire() as conn:
-            row = await conn.fetchrow(
-                'SELECT * FROM pending_users WHERE tg_username = $1',
-                tg_username
-            )
-            if row:
-                return PendingUser(
-                    tg_username=row['tg_username'],
-                    name=row['name'],
-                    role=row['role']
-                )
-        return None
+        return await fetchrow(pool, PendingUser, 'SELECT * FROM pending_users WHERE tg_username = $1', tg_username)
 
     @staticmethod
     async def delete(pool: asyncpg.Pool, tg_username: str) -> bool:
@@ -635,24 +976,25 @@ class PendingUser:
                 'DELETE FROM pending_users WHERE tg_username = $1',
                 tg_username
             )
-            return 'DELETE 1' in result
+        notify_user_change("pending_deleted", tg_username)
+        return 'DELETE 1' in result
 
     @staticmethod
-    async def get_all(pool: asyncpg.Pool) -> List['PendingUser']:
-        """Get all pending users."""
-        async with pool.acquire() as conn:
-            rows = await conn.fetch(
-                '''
-                SELECT * FROM pending_users
-                WHERE role = 'volunteer'
-                ORDER BY name
-                '''
-            )
-            return [PendingUser(**dict(row)) for row in rows]
+    async def get_all(pool: asyncpg.Pool, role: Optional[str] = 'volunteer') -> List['PendingUser']:
+        """Get all pending users with the given role (role=None — any role)."""
+        return await fetch(
+            pool, PendingUser,
+            '''
+            SELECT * FROM pending_users
+            WHERE $1::text IS NULL OR role = $1
+            ORDER BY name
+            ''',
+            role
+        )
         
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SpotTask:
     spot_task_id: int
     name: str
@@ -680,38 +1022,58 @@ class SpotTask:
             )
 
     @staticmethod
-    async def get_active(pool):
+    async def get_active(pool) -> list["SpotTask"]:
         async with pool.acquire() as conn:
-            return await conn.fetch(
-                "SELECT * FROM spot_task WHERE expires_at > NOW()"
-            )
+            return map_rows(SpotTask, await prepared_fetch(conn, 'spot_tasks_active'))
 
     @staticmethod
     async def get_all(pool) -> list["SpotTask"]:
+        return await fetch(pool, SpotTask, "SELECT * FROM spot_task ORDER BY expires_at DESC")
+
+    @staticmethod
+    async def get_by_id(pool, spot_task_id: int) -> "SpotTask":
+        return await fetchrow(pool, SpotTask, "SELECT * FROM spot_task WHERE spot_task_id = $1", spot_task_id)
+
+    @staticmethod
+    async def get_expired_for_cleanup(pool, limit: int = 50) -> List[tuple[int, List[tuple[int, int]]]]:
+        """Expired, not yet cleaned spot tasks with their messages: [(spot_task_id, [(chat_id, message_id)])]"""
         async with pool.acquire() as conn:
-            rows = await conn.fetch("SELECT * FROM spot_task ORDER BY expires_at DESC")
+            rows = await conn.fetch(
+                '''
+                SELECT s.spot_task_id,
+                       COALESCE(array_agg(r.volunteer_id) FILTER (WHERE r.message_id IS NOT NULL), '{}') AS chat_ids,
+                       COALESCE(array_agg(r.message_id) FILTER (WHERE r.message_id IS NOT NULL), '{}') AS message_ids
+                FROM (
+                    SELECT spot_task_id FROM spot_task
+                    WHERE cleaned_at IS NULL AND expires_at <= NOW()
+                    ORDER BY expires_at
+                    LIMIT $1
+                ) s
+                LEFT JOIN spot_task_response r ON r.spot_task_id = s.spot_task_id
+                GROUP BY s.spot_task_id
+                ''',
+                limit
+            )
             return [
-                SpotTask(
-                    spot_task_id=row["spot_task_id"],
-                    name=row["name"],
-                    description=row["description"],
-                    expires_at=row["expires_at"],
-                )
+                (row['spot_task_id'], list(zip(row['chat_ids'], row['message_ids'])))
                 for row in rows
             ]
 
     @staticmethod
-    async def get_by_id(pool, spot_task_id: int) -> "SpotTask":
+    async def mark_cleaned(pool, spot_task_ids: List[int]) -> None:
         async with pool.acquire() as conn:
-            row = await conn.fetchrow("SELECT * FROM spot_task WHERE spot_task_id = $1", spot_task_id)
-            if row:
-                return SpotTask(
-                    spot_task_id=row["spot_task_id"],
-                    name=row["name"],
-                    description=row["description"],
-                    expires_at=row["expires_at"],
-                )
-            return None
+            await conn.execute(
+                'UPDATE spot_task SET cleaned_at = NOW() WHERE spot_task_id = ANY($1::int[])',
+                spot_task_ids
+            )
+
+    @staticmethod
+    async def get_next_expiry(pool) -> Optional[datetime]:
+        """Nearest expires_at among spot tasks whose messages are not cleaned yet"""
+        async with pool.acquire() as conn:
+            return await conn.fetchval(
+                'SELECT MIN(expires_at) FROM spot_task WHERE cleaned_at IS NULL'
+            )
 
     @staticmethod
     async def delete(pool, spot_task_id: int) -> bool:
@@ -742,6 +1104,25 @@ class SpotTaskResponse:
                 spot_task_id, volunteer_id, response, message_id
             )
 
+    @staticmethod
+    async def create_many(pool, spot_task_id: int, deliveries: list[tuple[int, int]], response: str = "none"):
+        """
+        Bulk insert of responses for delivered messages: deliveries = [(volunteer_id, message_id)].
+        Rows that already exist (the volunteer answered before the batch was saved) are kept.
+        """
+        async with pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO spot_task_response (spot_task_id, volunteer_id, response, message_id)
+                SELECT $1, d.volunteer_id, $2, d.message_id
+                FROM unnest($3::bigint[], $4::int[]) AS d(volunteer_id, message_id)
+                ON CONFLICT (spot_task_id, volunteer_id) DO NOTHING
+                """,
+                spot_task_id, response,
+                [volunteer_id for volunteer_id, _ in deliveries],
+                [message_id for _, message_id in deliveries]
+            )
+
     @staticmethod
     async def get_by_task(pool, spot_task_id: int):
         async with pool.acquire() as conn:
@@ -751,13 +1132,167 @@ class SpotTaskResponse:
             )
     
     @staticmethod
-    async def change_response(pool, spot_task_id: int, volunteer_id: int, new_response: str):
+    async def change_response(pool, spot_task_id: int, volunteer_id: int, new_response: str, message_id: int):
+        """
+        Upsert: the answer may arrive before the broadcast saved the delivery row.
+        Nothing is written if the spot task is already deleted.
+        """
         async with pool.acquire() as conn:
             await conn.execute(
                 """
-                UPDATE spot_task_response
-                SET response = $1, responded_at = NOW()
-                WHERE spot_task_id = $2 AND volunteer_id = $3
+                INSERT INTO spot_task_response (spot_task_id, volunteer_id, response, message_id)
+                SELECT $2, $3, $1, $4
+                WHERE EXISTS (SELECT 1 FROM spot_task WHERE spot_task_id = $2)
+                ON CONFLICT (spot_task_id, volunteer_id) DO UPDATE
+                SET response = EXCLUDED.response, responded_at = NOW()
                 """,
-                new_response, spot_task_id, volunteer_id
-            )
\ No newline at end of file
+                new_response, spot_task_id, volunteer_id, message_id
+            )
+
+
+class SpotTaskSummary:
+    """Live summary messages of spot task responses sent to admins"""
+
+    @staticmethod
+    async def get_by_task(pool, spot_task_id: int) -> dict[int, int]:
+        """{admin_id: message_id}"""
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT admin_id, message_id FROM spot_task_summary WHERE spot_task_id = $1",
+                spot_task_id
+            )
+            return {row['admin_id']: row['message_id'] for row in rows}
+
+    @staticmethod
+    async def save(pool, spot_task_id: int, admin_id: int, message_id: int):
+        async with pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO spot_task_summary (spot_task_id, admin_id, message_id)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (spot_task_id, admin_id) DO UPDATE SET message_id = EXCLUDED.message_id
+                """,
+                spot_task_id, admin_id, message_id
+            )
+
+
+class SheetSyncState:
+    """Progress of the incremental Google Sheets sync (see services.sheet_sync)"""
+
+    @staticmethod
+    async def read_changed(pool, model, table: str, watermark: int) -> tuple[list, int]:
+        """
+        Строки table, измененные транзакциями с xid >= watermark, по revision.
+        Новый watermark — xmin снимка, взятого до чтения: все транзакции с
+        меньшим xid к этому моменту завершены и видны запросу, а еще не
+        закоммиченные попадут в следующее чтение. Строки могут прийти
+        повторно; их отсекает сравнение хешей в services.sheet_sync.
+        """
+        async with pool.acquire() as conn:
+            next_watermark = await conn.fetchval(
+                'SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+            )
+            rows = await conn.fetch(
+                f'SELECT * FROM {table} WHERE changed_xid >= $1::text::xid8 ORDER BY revision',
+                str(watermark)
+            )
+            return map_rows(model, rows), max(next_watermark, watermark)
+
+    @staticmethod
+    async def get(pool, entity: str) -> tuple[int, dict[str, tuple[int, str]]]:
+        """(push watermark — xid, see read_changed; {key: (row_num, hash)})"""
+        async with pool.acquire() as conn:
+            revision = await conn.fetchval('SELECT revision FROM sheet_sync_state WHERE entity = $1', entity)
+            rows = await conn.fetch('SELECT key, row_num, hash FROM sheet_sync_row WHERE entity = $1', entity)
+            return revision or 0, {row['key']: (row['row_num'], row['hash']) for row in rows}
+
+    # Есть ли в БД что выгружать для сущности
+    DB_ROWS_QUERIES = {
+        'tasks': 'SELECT EXISTS (SELECT 1 FROM task)',
+        'volunteers': "SELECT EXISTS (SELECT 1 FROM users WHERE role = 'volunteer')",
+        'assignments': "SELECT EXISTS (SELECT 1 FROM assignment WHERE status != 'cancelled')",
+    }
+
+    @staticmethod
+    async def exists(pool, entity: str) -> bool:
+        """Whether the entity has been synced at least once (has saved rows)"""
+        async with pool.acquire() as conn:
+            return await conn.fetchval(
+                'SELECT EXISTS (SELECT 1 FROM sheet_sync_row WHERE entity = $1)', entity
+            )
+
+    @staticmethod
+    async def db_has_rows(pool, entity: str) -> bool:
+        async with pool.acquire() as conn:
+            return await conn.fetchval(SheetSyncState.DB_ROWS_QUERIES[entity])
+
+    @staticmethod
+    async def save(pool, entity: str, rows: List[tuple[str, int, str]], deleted: List[str] = (),
+                   revision: Optional[int] = None, replace: bool = False):
+        """
+        Saves synced rows (key, row_num, hash) in one transaction.
+        replace=True drops all previously saved rows of the entity first.
+        """
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if replace:
+                    await conn.execute('DELETE FROM sheet_sync_row WHERE entity = $1', entity)
+                elif deleted:
+                    await conn.execute(
+                        'DELETE FROM sheet_sync_row WHERE entity = $1 AND key = ANY($2::text[])',
+                        entity, list(deleted)
+                    )
+                if rows:
+                    await conn.executemany(
+                        """
+                        INSERT INTO sheet_sync_row (entity, key, row_num, hash)
+                        VALUES ($1, $2, $3, $4)
+                        ON CONFLICT (entity, key) DO UPDATE
+                        SET row_num = EXCLUDED.row_num, hash = EXCLUDED.hash
+                        """,
+                        [(entity, key, row_num, row_hash) for key, row_num, row_hash in rows]
+                    )
+                if revision is not None:
+                    await conn.execute(
+                        """
+                        INSERT INTO sheet_sync_state (entity, revision, synced_at)
+                        VALUES ($1, $2, NOW())
+                        ON CONFLICT (entity) DO UPDATE
+                        SET revision = EXCLUDED.revision, synced_at = EXCLUDED.synced_at
+                        """,
+                        entity, revision
+                    )
+
+
+class EventSettings:
+    """Дата начала мероприятия в БД: от нее считаются task/assignment.starts_at и ends_at"""
+
+    @staticmethod
+    async def apply(pool, start_date: datetime) -> bool:
+        """
+        Записывает дату начала из конфига. Если она изменилась (или колонки
+        еще не заполнены после миграции), пересчитывает время всех заданий
+        и назначений. Возвращает True, если был пересчет.
+        """
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                previous = await conn.fetchval('SELECT start_date FROM event_settings FOR UPDATE')
+                if previous == start_date and not await conn.fetchval(
+                    'SELECT EXISTS (SELECT 1 FROM task WHERE starts_at IS NULL)'
+                    ' OR EXISTS (SELECT 1 FROM assignment WHERE starts_at IS NULL)'
+                ):
+                    return False
+                await conn.execute(
+                    '''
+                    INSERT INTO event_settings (id, start_date) VALUES (TRUE, $1)
+                    ON CONFLICT (id) DO UPDATE SET start_date = EXCLUDED.start_date
+                    ''',
+                    start_date
+                )
+                for table in ('task', 'assignment'):
+                    await conn.execute(f'''
+                        UPDATE {table}
+                        SET starts_at = event_timestamp(start_day, start_time),
+                            ends_at = event_timestamp(end_day, end_time)
+                    ''')
+                return True
@@ -73,8 +73,10 @@ CREATE TABLE IF NOT EXISTS spot_task_response (
     UNIQUE (spot_task_id, volunteer_id)  -- Prevent duplicate responses
 );
 
--- Add indexes
-CREATE INDEX IF NOT EXISTS idx_task_status ON task(status);
-CREATE INDEX IF NOT EXISTS idx_assignment_status ON assignment(status);
+-- Add indexes (kept in sync with database/migrations.py)
 CREATE INDEX IF NOT EXISTS idx_assignment_tg_id ON assignment(tg_id);
-CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp ON audit_log(timestamp);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_assignment_task_active ON assignment(task_id) INCLUDE (tg_id, assign_id) WHERE status != 'cancelled';
+CREATE INDEX IF NOT EXISTS idx_users_role ON users(role) INCLUDE (tg_id, tg_username, name);
+CREATE INDEX IF NOT EXISTS idx_spot_task_response_spot_task ON spot_task_response(spot_task_id) INCLUDE (volunteer_id, response, message_id);
+CREATE INDEX IF NOT EXISTS idx_spot_task_expires_at ON spot_task(expires_at);
+CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp ON audit_log(timestamp);
@@ -0,0 +1,242 @@
+"""
+Пул соединений PostgreSQL: настройки из config_data.config.DatabaseConfig,
+подготовленные запросы на каждом соединении, JSON-кодеки и метрики ожидания.
+
+    pool = await create_pool(**pool_kwargs(config.db))
+    async with pool.acquire() as conn:
+        rows = await prepared_fetch(conn, 'assignments_by_task', task_id)
+"""
+import asyncio
+import json
+import logging
+import time
+from functools import partial
+from typing import Any, Awaitable, Dict, List, Optional
+
+import asyncpg
+
+from config_data.config import DatabaseConfig
+
+logger = logging.getLogger(__name__)
+
+SLOW_ACQUIRE = 0.1  # Ожидание соединения дольше этого считается медленным, секунды
+
+# Горячие запросы, которые готовятся один раз на каждом соединении пула.
+# Колонки перечислены явно: у готового запроса с SELECT * после ALTER TABLE
+# меняется тип результата, и PostgreSQL отказывается его выполнять.
+_USER_COLUMNS = 'tg_id, tg_username, name, role'
+_ASSIGNMENT_COLUMNS = (
+    'assign_id, task_id, tg_id, assigned_by, assigned_at, start_day, start_time, '
+    'end_day, end_time, status, notification_scheduled, starts_at, ends_at'
+)
+STATEMENTS: Dict[str, str] = {
+    # RoleAssigmmentMiddleware / UserDirectory промахи, User.get_by_tg_id
+    'user_by_tg_id': f'SELECT {_USER_COLUMNS} FROM users WHERE tg_id = $1',
+    'users_by_role': f'SELECT {_USER_COLUMNS} FROM users WHERE role = $1',
+    'assignments_by_task': f'SELECT {_ASSIGNMENT_COLUMNS} FROM assignment WHERE task_id = $1',
+    'assignments_by_volunteer': f'SELECT {_ASSIGNMENT_COLUMNS} FROM assignment WHERE tg_id = $1',
+    'spot_tasks_active': (
+        'SELECT spot_task_id, name, description, created_at, expires_at '
+        'FROM spot_task WHERE expires_at > NOW()'
+    ),
+}
+
+
+class BotConnection(asyncpg.Connection):
+    """Соединение, которое держит подготовленные запросы из STATEMENTS"""
+    __slots__ = ('prepared',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: Dict[str, asyncpg.prepared_stmt.PreparedStatement] = {}
+
+
+class PoolMetrics:
+    """Сколько ждут соединение из пула и насколько он занят"""
+
+    def __init__(self):
+        self.acquired = 0
+        self.slow = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_in_use = 0
+
+    def snapshot(self, pool: asyncpg.Pool) -> Dict[str, Any]:
+        size, idle = pool.get_size(), pool.get_idle_size()
+        return {
+            'size': size,
+            'in_use': size - idle,
+            'min_size': pool.get_min_size(),
+            'max_size': pool.get_max_size(),
+            'peak_in_use': self.peak_in_use,
+            'utilisation': (size - idle) / pool.get_max_size(),
+            'acquired': self.acquired,
+            'avg_wait_ms': self.total_wait / self.acquired * 1000 if self.acquired else 0.0,
+            'max_wait_ms': self.max_wait * 1000,
+            'slow': self.slow,
+            'timeouts': self.timeouts,
+        }
+
+
+class _MeteredAcquire:
+    """Обертка над PoolAcquireContext: `async with pool.acquire()` и `await pool.acquire()`"""
+    __slots__ = ('pool', 'context')
+
+    def __init__(self, pool: 'MeteredPool', context):
+        self.pool = pool
+        self.context = context
+
+    async def _timed(self, acquire: Awaitable[asyncpg.Connection]) -> asyncpg.Connection:
+        started = time.monotonic()
+        try:
+            connection = await acquire
+        except asyncio.TimeoutError:
+            self.pool.metrics.timeouts += 1
+            raise
+        self.pool.record_wait(time.monotonic() - started)
+        return connection
+
+    async def _await_context(self) -> asyncpg.Connection:
+        return await self.context
+
+    async def __aenter__(self) -> asyncpg.Connection:
+        return await self._timed(self.context.__aenter__())
+
+    async def __aexit__(self, *exc_info):
+        return await self.context.__aexit__(*exc_info)
+
+    def __await__(self):
+        return self._timed(self._await_context()).__await__()
+
+
+class MeteredPool(asyncpg.Pool):
+    """
+    asyncpg.Pool, который считает время ожидания соединения. Меряется
+    публичный acquire(), внутренние методы пула не переопределяются.
+    """
+    __slots__ = ('metrics',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def acquire(self, *, timeout: Optional[float] = None) -> _MeteredAcquire:
+        return _MeteredAcquire(self, super().acquire(timeout=timeout))
+
+    def record_wait(self, wait: float) -> None:
+        metrics = self.metrics
+        metrics.acquired += 1
+        metrics.total_wait += wait
+        metrics.max_wait = max(metrics.max_wait, wait)
+        if wait > SLOW_ACQUIRE:
+            metrics.slow += 1
+        metrics.peak_in_use = max(metrics.peak_in_use, self.get_size() - self.get_idle_size())
+
+
+async def _init_connection(conn: BotConnection) -> None:
+    dumps = partial(json.dumps, ensure_ascii=False)
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(type_name, encoder=dumps, decoder=json.loads, schema='pg_catalog')
+
+    for name, query in STATEMENTS.items():
+        try:
+            conn.prepared[name] = await conn.prepare(query)
+        except asyncpg.PostgresError as e:
+            # До первых миграций таблиц может не быть — подготовим при первом вызове
+            logger.debug(f"Statement '{name}' is not prepared: {e}")
+
+
+def connect_kwargs(db: DatabaseConfig) -> Dict[str, Any]:
+    return {
+        'user': db.user,
+        'password': db.password,
+        'database': db.database,
+        'host': db.host,
+        'port': db.port,
+    }
+
+
+def pool_kwargs(db: DatabaseConfig) -> Dict[str, Any]:
+    return {
+        **connect_kwargs(db),
+        'min_size': db.pool_min_size,
+        'max_size': db.pool_max_size,
+        'statement_cache_size': db.statement_cache_size,
+        'max_inactive_connection_lifetime': db.max_inactive_connection_lifetime,
+        'statement_timeout': db.statement_timeout,
+    }
+
+
+async def create_pool(
+    *,
+    min_size: int = 2,
+    max_size: int = 10,
+    statement_cache_size: int = 256,
+    max_inactive_connection_lifetime: float = 300.0,
+    statement_timeout: int = 30_000,
+    max_queries: int = 50_000,
+    **connect_kwargs
+) -> MeteredPool:
+    """
+    Создает пул. statement_timeout — в миллисекундах (0 — без ограничения),
+    задается параметром соединения, поэтому переживает RESET ALL при возврате
+    соединения в пул.
+    """
+    server_settings = dict(connect_kwargs.pop('server_settings', None) or {})
+    server_settings.setdefault('statement_timeout', str(statement_timeout))
+    server_settings.setdefault('application_name', 'mb-volunteer-bot')
+
+    pool = MeteredPool(
+        min_size=min_size,
+        max_size=max_size,
+        max_queries=max_queries,
+        max_inactive_connection_lifetime=max_inactive_connection_lifetime,
+        init=_init_connection,
+        loop=None,
+        connection_class=BotConnection,
+        record_class=asyncpg.Record,
+        statement_cache_size=statement_cache_size,
+        server_settings=server_settings,
+        **connect_kwargs
+    )
+    await pool
+    return pool
+
+
+async def connect(db: DatabaseConfig) -> asyncpg.Connection:
+    """
+    Отдельное соединение вне пула — для того, что держит сессию всё время
+    работы процесса: блокировка лидера, LISTEN. Пул его не переиспользует.
+    """
+    return await asyncpg.connect(
+        **connect_kwargs(db),
+        server_settings={'application_name': 'mb-volunteer-bot'}
+    )
+
+
+async def _run_prepared(conn, method: str, name: str, args: tuple):
+    prepared: Optional[dict] = getattr(conn, 'prepared', None)
+    if prepared is None:
+        # Соединение не из create_pool — обычный запрос через кеш asyncpg
+        return await getattr(conn, method)(STATEMENTS[name], *args)
+
+    for attempt in range(2):
+        statement = prepared.get(name)
+        if statement is None:
+            statement = prepared[name] = await conn.prepare(STATEMENTS[name])
+        try:
+            return await getattr(statement, method)(*args)
+        except asyncpg.InvalidCachedStatementError:
+            # Схема поменялась после подготовки — готовим заново
+            del prepared[name]
+            if attempt:
+                raise
+
+
+async def prepared_fetch(conn, name: str, *args) -> List[asyncpg.Record]:
+    return await _run_prepared(conn, 'fetch', name, args)
+
+
+async def prepared_fetchrow(conn, name: str, *args) -> Optional[asyncpg.Record]:
+    return await _run_prepared(conn, 'fetchrow', name, args)
@@ -0,0 +1,91 @@
+"""
+Отображение строк asyncpg в dataclass-модели.
+
+Для каждой пары (класс, набор колонок запроса) один раз генерируется функция,
+которая распаковывает строку целиком и записывает поля через slot-дескрипторы
+в объект из object.__new__ — без dict(row), поиска колонок по имени и
+frozen-__init__ с object.__setattr__ на каждое поле. Колонки,
+которых нет в модели (JOIN, новые поля в таблице), пропускаются; поля модели
+без колонки берут значение по умолчанию.
+
+    tasks = await fetch(pool, Task, 'SELECT * FROM task')
+    user = await fetchrow(conn, User, 'SELECT * FROM users WHERE tg_id = $1', tg_id)
+"""
+import dataclasses
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
+
+T = TypeVar('T')
+
+Converter = Callable[[Any], Any]
+
+# (класс, колонки) -> функция row -> объект
+_converters: Dict[Tuple[type, Tuple[str, ...]], Converter] = {}
+
+
+def _compile(cls: type, columns: Tuple[str, ...]) -> Converter:
+    index = {name: i for i, name in enumerate(columns)}
+    namespace: Dict[str, Any] = {'cls': cls, 'new': object.__new__}
+    body = []
+    for field in dataclasses.fields(cls):
+        if field.name in index:
+            value = f'c{index[field.name]}'
+        elif field.default is not dataclasses.MISSING:
+            value = f'default_{field.name}'
+            namespace[value] = field.default
+        elif field.default_factory is not dataclasses.MISSING:
+            value = f'factory_{field.name}()'
+            namespace[f'factory_{field.name}'] = field.default_factory
+        else:
+            raise TypeError(f'{cls.__name__}.{field.name} is missing in query columns {columns}')
+        setter = cls.__dict__.get(field.name)
+        if hasattr(setter, '__set__'):
+            # slot-дескриптор пишет в объект напрямую, в обход frozen __setattr__
+            namespace[f'set_{field.name}'] = setter.__set__
+            body.append(f'    set_{field.name}(obj, {value})')
+        else:
+            body.append(f'    object.__setattr__(obj, {field.name!r}, {value})')
+    if hasattr(cls, '__post_init__'):
+        body.append('    obj.__post_init__()')
+
+    # Record распаковывается целиком за одну операцию, без обращений по индексу
+    unpacked = ''.join(f'c{i}, ' for i in range(len(columns)))
+    source = (f'def convert(row):\n'
+              f'    {unpacked}= row\n'
+              f'    obj = new(cls)\n'
+              + '\n'.join(body) +
+              '\n    return obj\n')
+    exec(compile(source, f'<row converter {cls.__name__}>', 'exec'), namespace)
+    return namespace['convert']
+
+
+def converter_for(cls: Type[T], columns: Sequence[str]) -> Callable[[Any], T]:
+    """Функция row -> cls для строк с заданными колонками (кешируется)"""
+    key = (cls, tuple(columns))
+    converter = _converters.get(key)
+    if converter is None:
+        converter = _converters[key] = _compile(cls, key[1])
+    return converter
+
+
+def map_row(cls: Type[T], row) -> Optional[T]:
+    if row is None:
+        return None
+    return converter_for(cls, row.keys())(row)
+
+
+def map_rows(cls: Type[T], rows: Iterable) -> List[T]:
+    rows = rows if isinstance(rows, list) else list(rows)
+    if not rows:
+        return []
+    # Все строки одного результата имеют одинаковые колонки
+    converter = converter_for(cls, rows[0].keys())
+    return [converter(row) for row in rows]
+
+
+async def fetch(executor, cls: Type[T], query: str, *args, timeout: Optional[float] = None) -> List[T]:
+    """executor — asyncpg.Pool или Connection"""
+    return map_rows(cls, await executor.fetch(query, *args, timeout=timeout))
+
+
+async def fetchrow(executor, cls: Type[T], query: str, *args, timeout: Optional[float] = None) -> Optional[T]:
+    return map_row(cls, await executor.fetchrow(query, *args, timeout=timeout))
@@ -0,0 +1,113 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+import asyncpg
+
+
+class _SharedAcquire:
+    """Результат UnitOfWork.acquire(): отдает общее соединение и не возвращает его в пул"""
+    __slots__ = ('uow', 'connection', 'own')
+
+    def __init__(self, uow: 'UnitOfWork'):
+        self.uow = uow
+        self.connection = None
+        self.own = False
+
+    async def __aenter__(self):
+        if self.uow.finished:
+            # Работа после конца апдейта (фоновые задачи) — обычное соединение на вызов
+            self.connection = await self.uow.pool.acquire()
+            self.own = True
+        else:
+            self.connection = await self.uow.connection()
+        return self.connection
+
+    async def __aexit__(self, *exc) -> None:
+        if self.own:
+            await self.uow.pool.release(self.connection)
+
+
+class UnitOfWork:
+    """
+    Одно соединение на апдейт. Объект подменяет pool в обработчиках
+    (см. middleware.unit_of_work): методы pg_model по-прежнему вызывают
+    pool.acquire(), но получают одно и то же соединение, которое берется
+    из пула при первом запросе и возвращается в конце апдейта.
+
+    Транзакция включается самим обработчиком:
+
+        async with pool.transaction():
+            await Assignment.delete_by_task(pool, task_id)
+            await service.create_assignment(...)
+
+    Запросы в рамках апдейта идут последовательно: параллельные запросы
+    (asyncio.gather) на одном соединении asyncpg не поддерживает, для них
+    нужен uow.pool. Остальные атрибуты (_connect_kwargs, metrics,
+    get_size ...) берутся у настоящего пула.
+    """
+
+    def __init__(self, pool: asyncpg.Pool):
+        self.pool = pool
+        self.finished = False
+        self._connection: Optional[asyncpg.Connection] = None
+        self._lock = asyncio.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.pool, name)
+
+    async def connection(self) -> asyncpg.Connection:
+        if self._connection is None:
+            async with self._lock:
+                if self._connection is None:
+                    self._connection = await self.pool.acquire()
+        return self._connection
+
+    def acquire(self) -> _SharedAcquire:
+        return _SharedAcquire(self)
+
+    @asynccontextmanager
+    async def transaction(self, **kwargs) -> AsyncIterator[asyncpg.Connection]:
+        """Транзакция на общем соединении; вложенная становится savepoint"""
+        async with self.acquire() as conn:
+            async with conn.transaction(**kwargs):
+                yield conn
+
+    async def finish(self) -> None:
+        """
+        Возвращает соединение в пул. Дальше каждый запрос берет соединение
+        сам — для долгих обработчиков (рассылки), чтобы не держать соединение,
+        пока идут запросы к Telegram.
+        """
+        self.finished = True
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await self.pool.release(connection)
+
+    # Запросы мимо acquire(), как у asyncpg.Pool (см. database.row_mapping)
+
+    async def execute(self, query: str, *args, timeout: Optional[float] = None) -> str:
+        async with self.acquire() as conn:
+            return await conn.execute(query, *args, timeout=timeout)
+
+    async def executemany(self, command: str, args, *, timeout: Optional[float] = None) -> None:
+        async with self.acquire() as conn:
+            return await conn.executemany(command, args, timeout=timeout)
+
+    async def fetch(self, query: str, *args, timeout: Optional[float] = None) -> list:
+        async with self.acquire() as conn:
+            return await conn.fetch(query, *args, timeout=timeout)
+
+    async def fetchrow(self, query: str, *args, timeout: Optional[float] = None):
+        async with self.acquire() as conn:
+            return await conn.fetchrow(query, *args, timeout=timeout)
+
+    async def fetchval(self, query: str, *args, column: int = 0, timeout: Optional[float] = None):
+        async with self.acquire() as conn:
+            return await conn.fetchval(query, *args, column=column, timeout=timeout)
+
+
+async def release_connection(pool) -> None:
+    """UnitOfWork.finish() для обработчиков, которым мог прийти и обычный пул"""
+    if isinstance(pool, UnitOfWork):
+        await pool.finish()
@@ -8,33 +8,31 @@ from aiogram.filters import Command, CommandStart, StateFilter
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramBadRequest
-from typing import Union
+from typing import Optional, Union
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from states.states import FSMTaskEdit, FSMSpotTask
-from services.spot_cleanup import delete_spot_message
+from services.spot_cleanup import SpotExpirySweeper
+from services.spot_responses import SpotResponseAggregator
+from services.spot_broadcast import SpotBroadcaster, BroadcastResult, DeletionResult
+from services.job_store import remove_jobs_by_prefix
+from database.unit_of_work import release_connection
 from lexicon.lexicon_ru import LEXICON_RU, LEXICON_RU_BUTTONS
-from handlers.callbacks import NavigationCD, TaskActionCD
+from handlers.callbacks import NavigationCD, TaskActionCD, TaskPageCD
 from keyboards.admin import get_menu_markup, spot_task_keyboard
 from keyboards.user import get_menu_markup as user_get_menu_markup
-from database.pg_model import User, Task, Assignment, SpotTask, SpotTaskResponse
+from database.pg_model import User, Task, TaskOverview, Assignment, SpotTask, SpotTaskResponse
 from filters.roles import IsAdmin
 from utils.event_time import EventTimeManager
 from utils.formatting import format_task_time
-from services.sheet_sync import sync_db_to_sheet, sync_sheet_to_db, sync_volunteers_db_to_sheet, sync_volunteers_sheet_to_db, sync_assignments_db_to_sheet, sync_assignments_sheet_to_db
+from services.sync_jobs import SyncJobManager
+from services.task_pages import TaskPage, TaskPageCache, encode_cursor, decode_cursor
+from services.user_directory import UserDirectory
 logger = logging.getLogger(__name__)
 
 router = Router()
 
-async def delete_spot_message_safe(bot, chat_id, message_id):
-    try:
-        await bot.delete_message(chat_id, message_id)
-    except TelegramBadRequest as e:
-        logger.error(f"Can't delete message {message_id} (chat_id={chat_id}): {e}")
-    except Exception as e:
-        logger.error(f"Can't delete message {message_id} (chat_id={chat_id}): {e}")
-
 @router.message(CommandStart())
 async def proccess_start_admin(message: Message):
     await message.answer(
@@ -42,6 +40,36 @@ async def proccess_start_admin(message: Message):
         reply_markup=get_menu_markup("main")
     )
 
+@router.message(Command("directory_stats"))
+async def directory_stats(message: Message, user_directory: UserDirectory):
+    """Показывает состояние справочника пользователей"""
+    stats = user_directory.stats()
+    loaded_at = stats['loaded_at'].strftime('%H:%M:%S') if stats['loaded_at'] else "—"
+    await message.answer(
+        f"Справочник пользователей:\n"
+        f"Пользователей: {stats['users']}, ожидают регистрации: {stats['pending']}\n"
+        f"Попаданий: {stats['hits']}, промахов: {stats['misses']} ({stats['hit_rate']:.0%}), "
+        f"запросов к базе: {stats['db_lookups']}\n"
+        f"Загружен: {loaded_at}"
+    )
+
+@router.message(Command("pool_stats"))
+async def pool_stats(message: Message, pool):
+    """Загрузка пула соединений с базой (см. DB_POOL_* в .env)"""
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is None:
+        await message.answer("Пул создан без метрик")
+        return
+    stats = metrics.snapshot(pool)
+    await message.answer(
+        f"Пул соединений:\n"
+        f"Занято: {stats['in_use']} из {stats['size']} (min {stats['min_size']}, max {stats['max_size']}), "
+        f"пик: {stats['peak_in_use']}\n"
+        f"Выдано: {stats['acquired']}, ожидание: среднее {stats['avg_wait_ms']:.1f} мс, "
+        f"максимум {stats['max_wait_ms']:.1f} мс\n"
+        f"Медленных: {stats['slow']}, таймаутов: {stats['timeouts']}"
+    )
+
 @router.message(Command(commands=['change_roles']))
 async def role_change_admin_handler(message: Message, pool=None, middleware=None, **data):
     if not pool or not middleware:
@@ -51,7 +79,6 @@ async def role_change_admin_handler(message: Message, pool=None, middleware=None
         
     try:
         await User.update_role(pool, message.from_user.id, "volunteer")
-        middleware.role_cache[message.from_user.id] = "volunteer"
         data["role"] = "volunteer"
         
         logger.info(f"User {message.from_user.username} (id={message.from_user.id}) has switched role to 'volunteer'")
@@ -66,125 +93,148 @@ async def role_change_admin_handler(message: Message, pool=None, middleware=None
 
 # Просмотр заданий
 
-@router.callback_query(NavigationCD.filter(F.path == "main.tasks.list"))
-async def show_tasks_list(call: CallbackQuery, pool, event_manager: EventTimeManager):
-    tasks = await Task.get_all(pool)
-    current_time = event_manager.current_time
-    
-    # Convert tasks to tuples of (task, start_time) for sorting
-    task_times = []
-    for task in tasks:
-        start_abs, end_abs = task.get_absolute_times(event_manager)
-        if end_abs > current_time:  # Only include active tasks
-            task_times.append((task, start_abs))
-    
-    # Sort tasks by start time
-    task_times.sort(key=lambda x: x[1])  # Sort by start_abs
-    active_tasks = [task for task, _ in task_times]  # Store sorted tasks for keyboard
-    
-    text = "<b>Текущие активные задания:</b>\n\n"
-    
-    for task, start_time in task_times:
+MAX_LISTED_VOLUNTEERS = 5  # Волонтеров на задание в списке, остальные — числом
+
+
+def format_volunteers(overview: TaskOverview) -> str:
+    if not overview.volunteers:
+        return "❌ Нет назначенных волонтеров\n"
+    text = "👥 Волонтеры:\n"
+    for volunteer in overview.volunteers[:MAX_LISTED_VOLUNTEERS]:
+        text += f"  • {volunteer.name} (@{volunteer.tg_username})\n"
+    if len(overview.volunteers) > MAX_LISTED_VOLUNTEERS:
+        text += f"  … и еще {len(overview.volunteers) - MAX_LISTED_VOLUNTEERS}\n"
+    return text
+
+
+def task_page_text(page: TaskPage, view: str, day: int) -> str:
+    if view == 'active':
+        text = "<b>Текущие активные задания:</b>\n\n"
+    elif view == 'day':
+        text = LEXICON_RU['task_list.day_tasks'].format(day)
+    else:
+        text = "📋 Выберите задание для назначения:\n\n"
+
+    for overview in page.overviews:
+        task = overview.task
+        if view == 'assign':
+            text += f"🔹 {task.title}\n   📅 {format_task_time(task)}\n\n"
+            continue
         text += f"📌 <b>{task.title}</b>\n"
         text += f"<i>{format_task_time(task)}</i>\n"
-        
-        # Add volunteers information
-        assignments = await Assignment.get_by_task(pool, task.task_id)
-        if assignments:
-            text += "👥 Волонтеры:\n"
-            for assignment in assignments:
-                volunteer = await User.get_by_tg_id(pool, assignment.tg_id)
-                text += f"  • {volunteer.name} (@{volunteer.tg_username})\n"
-        else:
-            text += "❌ Нет назначенных волонтеров\n"
-            
+        if view == 'day':
+            text += f"📝 {task.description}\n"
+        text += format_volunteers(overview)
         text += "\n---\n\n"
 
-    # Build keyboard with sorted tasks and day selection
+    if not page.overviews:
+        text += "На этот день заданий нет." if view == 'day' else "Заданий нет."
+    elif page.has_prev or page.has_next:
+        text += f"Страница {page.number + 1}"
+    return text
+
+
+def task_page_keyboard(page: TaskPage, view: str, day: int, now: datetime):
     builder = InlineKeyboardBuilder()
-    for task in active_tasks:  # Use sorted tasks list
-        builder.button(
-            text=f"📋 {task.title}",
-            callback_data=TaskActionCD(action="view", task_id=task.task_id).pack()
+    sizes = []
+    for task in page.tasks:
+        if view == 'assign':
+            callback_data = TaskActionCD(action="create_assignment", task_id=task.task_id)
+        elif view == 'day' and task.ends_at <= now:
+            continue  # Only add button for active tasks
+        else:
+            callback_data = TaskActionCD(action="view", task_id=task.task_id)
+        builder.button(text=f"📋 {task.title}", callback_data=callback_data.pack())
+        sizes.append(1)
+
+    # ◀️ / номер страницы / ▶️ — ключи соседних заданий, чтобы страница читалась без OFFSET
+    navigation = 0
+    if page.has_prev:
+        first = page.tasks[0] if page.tasks else None
+        builder.button(text="◀️", callback_data=TaskPageCD(
+            view=view, day=day, page=page.number - 1, back=bool(first),
+            at=encode_cursor(first.starts_at) if first else 0, task_id=first.task_id if first else 0
+        ).pack())
+        navigation += 1
+    if page.has_next and page.tasks:
+        last = page.tasks[-1]
+        builder.button(text="▶️", callback_data=TaskPageCD(
+            view=view, day=day, page=page.number + 1, at=encode_cursor(last.starts_at), task_id=last.task_id
+        ).pack())
+        navigation += 1
+    if navigation:
+        sizes.append(navigation)
+
+    if view == 'active':
+        builder.button(text=LEXICON_RU_BUTTONS['select_day'], callback_data="select_day_for_tasks")
+        builder.button(text="◀️ Назад", callback_data=NavigationCD(path="main.tasks").pack())
+        sizes += [1, 1]
+    elif view == 'day':
+        builder.button(text="📅 Другой день", callback_data="select_day_for_tasks")
+        builder.button(text="◀️ Назад", callback_data=NavigationCD(path="main.tasks.list").pack())
+        sizes.append(2)
+    else:
+        builder.button(text="🔙 Назад", callback_data="show_assignments_list")
+        sizes.append(1)
+
+    builder.adjust(*sizes)
+    return builder.as_markup()
+
+
+async def show_task_page(call: CallbackQuery, pool, task_pages: TaskPageCache, event_manager: EventTimeManager,
+                         view: str, day: int = 0, cd: Optional[TaskPageCD] = None):
+    """Страница списка заданий; без cd — первая страница, кеш страниц админа сбрасывается"""
+    now = event_manager.current_time
+    value = {'active': now, 'day': day, 'assign': None}[view]
+    query_view = 'all' if view == 'assign' else view
+    if cd is None:
+        task_pages.reset(call.from_user.id)
+        page = await task_pages.get(pool, call.from_user.id, query_view, value)
+    else:
+        cursor = (decode_cursor(cd.at), cd.task_id) if cd.at else None
+        page = await task_pages.get(
+            pool, call.from_user.id, query_view, value, cd.page,
+            after=None if cd.back else cursor, before=cursor if cd.back else None
         )
-    
-    builder.button(
-        text=LEXICON_RU_BUTTONS['select_day'],
-        callback_data="select_day_for_tasks"
-    )
-    builder.button(
-        text="◀️ Назад",
-        callback_data=NavigationCD(path="main.tasks").pack()
+
+    await call.message.edit_text(
+        task_page_text(page, view, day),
+        reply_markup=task_page_keyboard(page, view, day, now)
     )
-    
-    builder.adjust(1)
-    await call.message.edit_text(text, reply_markup=builder.as_markup())
+
+
+@router.callback_query(NavigationCD.filter(F.path == "main.tasks.list"))
+async def show_tasks_list(call: CallbackQuery, pool, event_manager: EventTimeManager, task_pages: TaskPageCache):
+    # Active tasks page by page, filtered and sorted in SQL
+    await show_task_page(call, pool, task_pages, event_manager, 'active')
 
 @router.callback_query(lambda c: c.data.startswith("show_tasks_day_"))
-async def show_tasks_by_day(call: CallbackQuery, pool, event_manager: EventTimeManager):
+async def show_tasks_by_day(call: CallbackQuery, pool, event_manager: EventTimeManager, task_pages: TaskPageCache):
     day = int(call.data.split("_")[-1])
-    
-    # Get all tasks for the selected day
-    tasks = await Task.get_all(pool)
-    day_tasks = [task for task in tasks if task.start_day == day or task.end_day == day]
-    
-    # Sort tasks by start time
-    day_tasks.sort(key=lambda x: x.start_time)
-    
-    text = LEXICON_RU['task_list.day_tasks'].format(day)
-    current_time = event_manager.current_time
-    
-    for task in day_tasks:
-        text += f"📌 <b>{task.title}</b>\n"
-        text += f"<i>{format_task_time(task)}</i>\n"
-        text += f"📝 {task.description}\n"
-        
-        # Add volunteers information
-        assignments = await Assignment.get_by_task(pool, task.task_id)
-        if assignments:
-            text += "👥 Волонтеры:\n"
-            for assignment in assignments:
-                volunteer = await User.get_by_tg_id(pool, assignment.tg_id)
-                text += f"  • {volunteer.name} (@{volunteer.tg_username})\n"
-        else:
-            text += "❌ Нет назначенных волонтеров\n"
-            
-        text += "\n---\n\n"
-    
-    if not day_tasks:
-        text += "На этот день заданий нет."
-    
+    await show_task_page(call, pool, task_pages, event_manager, 'day', day)
+
+@router.callback_query(F.data == "select_day_for_tasks")
+async def select_day_for_tasks(call: CallbackQuery, event_manager: EventTimeManager):
     builder = InlineKeyboardBuilder()
-    
-    # Add buttons for active tasks
-    for task in day_tasks:
-        start_abs, end_abs = task.get_absolute_times(event_manager)
-        if end_abs > current_time:  # Only add button for active tasks
-            builder.button(
-                text=f"📋 {task.title}",
-                callback_data=TaskActionCD(action="view", task_id=task.task_id).pack()
-            )
-    
-    # Navigation buttons
-    builder.button(
-        text="📅 Другой день",
-        callback_data="select_day_for_tasks"
-    )
-    builder.button(
-        text="◀️ Назад",
-        callback_data=NavigationCD(path="main.tasks.list").pack()
-    )
-    
-    # Adjust buttons layout - one task button per row, navigation buttons together
-    if day_tasks:
-        builder.adjust(1, 2)
-    else:
-        builder.adjust(2)
-    
-    await call.message.edit_text(text, reply_markup=builder.as_markup())
+    for day in range(1, event_manager.days_count + 1):
+        builder.button(text=f"День {day}", callback_data=f"show_tasks_day_{day}")
+    builder.button(text="◀️ Назад", callback_data=NavigationCD(path="main.tasks.list").pack())
+    builder.adjust(2)
+    await call.message.edit_text(LEXICON_RU['task_list.select_day'], reply_markup=builder.as_markup())
+
+@router.callback_query(TaskPageCD.filter())
+async def turn_task_page(call: CallbackQuery, callback_data: TaskPageCD, pool,
+                         event_manager: EventTimeManager, task_pages: TaskPageCache):
+    try:
+        await show_task_page(call, pool, task_pages, event_manager,
+                             callback_data.view, callback_data.day, callback_data)
+    except TelegramBadRequest:
+        # Same page pressed again
+        await call.answer()
 
 @router.callback_query(TaskActionCD.filter(F.action == "view"))
-async def show_task_details(update: Union[Message, CallbackQuery], callback_data: TaskActionCD, pool):
+async def show_task_details(update: Union[Message, CallbackQuery], callback_data: TaskActionCD, pool,
+                            user_directory: UserDirectory):
     """Show task details, works with both Message and CallbackQuery"""
     task = await Task.get_by_id(pool, callback_data.task_id)
     if not task:
@@ -200,11 +250,17 @@ async def show_task_details(update: Union[Message, CallbackQuery], callback_data
     text += f"Время: {format_task_time(task)}\n\n"
 
     # Get and display assigned volunteers
-    assignments = await Assignment.get_by_task(pool, task.task_id)
+    assignments = [
+        assignment for assignment in await Assignment.get_by_task(pool, task.task_id)
+        if assignment.status != 'cancelled'
+    ]
     if assignments:
+        volunteers = await user_directory.get_users([assignment.tg_id for assignment in assignments])
         text += "👥 Назначенные волонтеры:\n"
         for assignment in assignments:
-            volunteer = await User.get_by_tg_id(pool, assignment.tg_id)
+            volunteer = volunteers.get(assignment.tg_id)
+            if not volunteer:
+                continue
             text += f"• {volunteer.name} (@{volunteer.tg_username})\n"
             text += f"  🕒 {assignment.start_time}-{assignment.end_time}\n"
     else:
@@ -250,7 +306,7 @@ async def process_spot_task_name(message: Message, state: FSMContext):
     await state.set_state(FSMSpotTask.description)
 
 @router.message(FSMSpotTask.description)
-async def process_spot_task_description(message: Message, state: FSMContext, pool, bot, spot_duration, debug, scheduler: AsyncIOScheduler):
+async def process_spot_task_description(message: Message, state: FSMContext, pool, spot_duration, spot_broadcaster: SpotBroadcaster, spot_sweeper: SpotExpirySweeper, spot_responses: SpotResponseAggregator, debug: bool = False):
     data = await state.get_data()
     name = data["name"]
     description = message.text
@@ -268,40 +324,43 @@ async def process_spot_task_description(message: Message, state: FSMContext, poo
 
     # Notify all volunteers
     volunteers = await User.get_by_role(pool, "volunteer")
-    msgs = []
     if debug:
         admins = await User.get_by_role(pool, "admin")
         volunteers += admins
-    
-    for v in volunteers:
-        try:
-            msg = await bot.send_message(
-                v.tg_id,
-                f"⚡️ <b>Срочное задание!</b>\n<b>{name}</b>\n{description}",
-                reply_markup=spot_task_keyboard(spot_task_id)
-            )
-
-            await SpotTaskResponse.create(pool, spot_task_id, v.tg_id, "none", msg.message_id)
-
-            msgs.append(msg)
-        except Exception as e:
-            logger.error(f"Error sending message to user {v.tg_username} (id={v.tg_id}): {e}")
-            await message.answer(f"Срочное задание не отправлено @{v.tg_username}")
-        
-        try:
-            scheduler.add_job(
-                delete_spot_message,
-                "date",
-                run_date=expires_at,
-                args=[bot.token, v.tg_id, msg.message_id],
-                id=f"spot_task_{spot_task_id}_{v.tg_id}",
-                misfire_grace_time=60
-            )
-        except Exception as e:
-            logger.error(f"Error scheduling message deletion to user {v.tg_username} (id={v.tg_id}): {e}")
-            
-
-    await message.answer(f"Срочное задание отправлено <b>{len(msgs)}</b> волонтерам.")
+    # Рассылка идет минутами — соединение апдейта больше не нужно
+    await release_connection(pool)
+
+    progress_msg = await message.answer(f"⏳ Рассылка срочного задания: 0/{len(volunteers)}")
+    last_progress = ""
+
+    async def report_progress(result: BroadcastResult):
+        nonlocal last_progress
+        text = (
+            f"⏳ Рассылка срочного задания: {len(result.sent) + len(result.failed)}/{result.total}\n"
+            f"✅ Доставлено: {len(result.sent)}\n"
+            f"❌ Ошибок: {len(result.failed)}"
+        )
+        if text != last_progress:
+            last_progress = text
+            await spot_broadcaster.edit(progress_msg, text)
+
+    result = await spot_broadcaster.broadcast(
+        spot_task_id,
+        f"⚡️ <b>Срочное задание!</b>\n<b>{name}</b>\n{description}",
+        volunteers,
+        spot_task_keyboard(spot_task_id),
+        on_progress=report_progress
+    )
+
+    # Сообщения удалит SpotExpirySweeper после expires_at
+    spot_sweeper.wake()
+    # Ответы, пришедшие во время рассылки, могли попасть в сводку с неполными счетчиками
+    await spot_responses.refresh(spot_task_id)
+
+    text = f"Срочное задание отправлено <b>{len(result.sent)}</b> волонтерам."
+    if result.failed:
+        text += "\n\nНе отправлено:\n" + "\n".join(f"• @{v.tg_username}" for v, _ in result.failed)
+    await spot_broadcaster.edit(progress_msg, text)
 
 
 # ---- Spot list
@@ -334,7 +393,8 @@ async def show_spot_tasks_list(call: CallbackQuery, pool):
 
 
 @router.callback_query(lambda c: c.data.startswith("view_spot_"))
-async def view_spot_task(call: CallbackQuery, pool, scheduler: AsyncIOScheduler, bot):
+async def view_spot_task(call: CallbackQuery, pool, scheduler: AsyncIOScheduler, bot,
+                         user_directory: UserDirectory):
     spot_task_id = int(call.data.split("_")[-1])
     spot = await SpotTask.get_by_id(pool, spot_task_id)
     if not spot:
@@ -343,11 +403,11 @@ async def view_spot_task(call: CallbackQuery, pool, scheduler: AsyncIOScheduler,
 
     # Получаем ответы волонтеров
     responses = await SpotTaskResponse.get_by_task(pool, spot_task_id)
+    users = await user_directory.get_users([resp['volunteer_id'] for resp in responses])
     yes_users = []
     no_users = []
     for resp in responses:
-        # Используем правильное имя поля volunteer_id
-        user = await User.get_by_tg_id(pool, resp['volunteer_id'])
+        user = users.get(resp['volunteer_id'])
         if not user:
             continue
         if resp['response'] == "accepted":
@@ -377,31 +437,43 @@ async def view_spot_task(call: CallbackQuery, pool, scheduler: AsyncIOScheduler,
 
 
 @router.callback_query(lambda c: c.data.startswith("close_spot_"))
-async def close_spot_task(call: CallbackQuery, pool, scheduler: AsyncIOScheduler, bot):
+async def close_spot_task(call: CallbackQuery, pool, scheduler: AsyncIOScheduler, spot_broadcaster: SpotBroadcaster, spot_responses: SpotResponseAggregator):
     spot_task_id = int(call.data.split("_")[-1])
     spot = await SpotTask.get_by_id(pool, spot_task_id)
     if not spot:
         await call.answer("Задание не найдено", show_alert=True)
         return
 
+    # Отвечаем сразу, чтобы callback не истек, пока удаляются сообщения
+    await call.answer("Закрываю задание...")
+
     # Получаем все ответы, чтобы удалить сообщения
     responses = await SpotTaskResponse.get_by_task(pool, spot_task_id)
+    messages = [(resp['volunteer_id'], resp['message_id']) for resp in responses if resp['message_id']]
 
-    # Удаляем сообщения и scheduler jobs
-    for resp in responses:
-        volunteer_id = resp['volunteer_id']
-        message_id = resp.get('message_id')
-        if message_id:
-            await delete_spot_message_safe(bot, volunteer_id, message_id)
-        job_id = f"spot_task_{spot_task_id}_{volunteer_id}"
-        try:
-            scheduler.remove_job(job_id)
-        except Exception as e:
-            logger.error(f"Error removing job {job_id}: {e}")
-
-    # Удаляем задание из базы
+    # Удаляем job'ы старого формата (по одному на сообщение) одним вызовом
+    # и само задание, чтобы новые ответы волонтеров на него уже не записывались
+    remove_jobs_by_prefix(scheduler, f"spot_task_{spot_task_id}_")
     await SpotTask.delete(pool, spot_task_id)
-    await call.message.edit_text("✅ Срочное задание закрыто и удалено.", reply_markup=get_menu_markup("main.tasks.spot_list"))
+    spot_responses.forget(spot_task_id)
+    await release_connection(pool)
+
+    last_text = None
+
+    async def report_progress(result: DeletionResult):
+        nonlocal last_text
+        text = f"⏳ Удаляю сообщения у волонтеров: {result.done}/{result.total}"
+        if text != last_text:
+            last_text = text
+            await spot_broadcaster.edit(call.message, text)
+
+    await report_progress(DeletionResult(total=len(messages)))
+    result = await spot_broadcaster.delete_messages(messages, on_progress=report_progress)
+
+    text = "✅ Срочное задание закрыто и удалено."
+    if result.failed:
+        text += f"\nНе удалось удалить {result.failed} из {result.total} сообщений."
+    await spot_broadcaster.edit(call.message, text, reply_markup=get_menu_markup("main.tasks.spot_list"))
 
 
 
@@ -460,189 +532,66 @@ async def export_tasks_to_csv(message: Message, pool):
         caption="Выгрузка задач"
     )
 
-@router.message(Command(commands=['db_to_google']))
-async def export_tasks_to_sheet(message: Message, pool, cred):
-    if not cred:
-        await message.answer("❌ Google Sheets integration is not configured")
-        return
-    try:
-        result = await sync_db_to_sheet(pool, cred)
-        await message.answer(result)
-    except Exception as e:
-        logger.error(f"Error in export_tasks_to_sheet: {e}")
-        await message.answer(f"❌ Ошибка при экспорте: {str(e)}")
-
-@router.message(Command(commands=['google_to_db']))
-async def import_tasks_from_sheet(message: Message, pool, cred):
-    if not cred:
-        await message.answer("❌ Google Sheets integration is not configured")
-        return
-    try:
-        result = await sync_sheet_to_db(pool, cred)
-        await message.answer(result)
-    except Exception as e:
-        logger.error(f"Error in import_tasks_from_sheet: {e}")
-        await message.answer(f"❌ Ошибка при импорте: {str(e)}")
-
-@router.message(Command(commands=['volunteers_to_google']))
-async def export_volunteers_to_sheet(message: Message, pool, cred):
-    """Export volunteers from DB to Google Sheet"""
-    if not cred:
-        await message.answer("❌ Google Sheets integration is not configured")
-        return
-    try:
-        result = await sync_volunteers_db_to_sheet(pool, cred)
-        await message.answer(result)
-    except Exception as e:
-        logger.error(f"Error in export_volunteers_to_sheet: {e}")
-        await message.answer(f"❌ Ошибка при экспорте: {str(e)}")
-
-@router.message(Command(commands=['volunteers_from_google']))
-async def import_volunteers_from_sheet(message: Message, pool, cred):
-    """Import volunteers from Google Sheet to DB"""
-    if not cred:
-        await message.answer("❌ Google Sheets integration is not configured")
-        return
-    try:
-        result = await sync_volunteers_sheet_to_db(pool, cred)
-        await message.answer(result)
-    except Exception as e:
-        logger.error(f"Error in import_volunteers_from_sheet: {e}")
-        await message.answer(f"❌ Ошибка при импорте: {str(e)}")
+# --- Синхронизация с Google Sheets (выполняется в фоне, см. services/sync_jobs.py)
 
-@router.message(Command(commands=['assignments_to_google']))
-async def export_assignments_to_sheet(message: Message, pool, cred):
-    """Export assignments from DB to Google Sheet"""
-    if not cred:
-        await message.answer("❌ Google Sheets integration is not configured")
-        return
-    try:
-        result = await sync_assignments_db_to_sheet(pool, cred)
-        await message.answer(result)
-    except Exception as e:
-        logger.error(f"Error in export_assignments_to_google_menu: {e}")
-        await message.answer(f"❌ Ошибка при экспорте: {str(e)}")
+SYNC_COMMANDS = {
+    'db_to_google': "tasks.to_google",
+    'google_to_db': "tasks.from_google",
+    'volunteers_to_google': "volunteers.to_google",
+    'volunteers_from_google': "volunteers.from_google",
+    'assignments_to_google': "assignments.to_google",
+    'assignments_from_google': "assignments.from_google",
+}
 
-@router.message(Command(commands=['assignments_from_google']))
-async def import_assignments_from_sheet(message: Message, pool, cred):
-    """Import assignments from Google Sheet to DB"""
-    if not cred:
-        await message.answer("❌ Google Sheets integration is not configured")
-        return
-    try:
-        result = await sync_assignments_sheet_to_db(pool, cred)
-        await message.answer(result)
-    except Exception as e:
-        logger.error(f"Error in import_assignments_from_google_menu: {e}")
-        await message.answer(f"❌ Ошибка при импорте: {str(e)}")
+SYNC_MENU_PATHS = {f"main.sync.{name}": name for name in SYNC_COMMANDS.values()}
 
-@router.callback_query(NavigationCD.filter(F.path == "main.sync.volunteers.to_google"))
-async def sync_volunteers_to_google_menu(call: CallbackQuery, pool, cred):
-    if not cred:
-        await call.answer("❌ Google Sheets integration is not configured", show_alert=True)
-        return
-    try:
-        result = await sync_volunteers_db_to_sheet(pool, cred)
-        await call.message.edit_text(
-            f"{result}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.volunteers")
-        )
-    except Exception as e:
-        logger.error(f"Error in sync_volunteers_to_google_menu: {e}")
-        await call.message.edit_text(
-            f"❌ Ошибка при экспорте: {str(e)}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.volunteers")
-        )
 
-@router.callback_query(NavigationCD.filter(F.path == "main.sync.volunteers.from_google"))
-async def sync_volunteers_from_google_menu(call: CallbackQuery, pool, cred):
-    if not cred:
-        await call.answer("❌ Google Sheets integration is not configured", show_alert=True)
-        return
-    try:
-        result = await sync_volunteers_sheet_to_db(pool, cred)
-        await call.message.edit_text(
-            f"{result}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.volunteers")
-        )
-    except Exception as e:
-        logger.error(f"Error in sync_volunteers_from_google_menu: {e}")
-        await call.message.edit_text(
-            f"❌ Ошибка при импорте: {str(e)}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.volunteers")
-        )
+def sync_status_markup(back_path: str):
+    builder = InlineKeyboardBuilder()
+    builder.button(
+        text=LEXICON_RU_BUTTONS['main.sync.status'],
+        callback_data=NavigationCD(path="main.sync.status").pack()
+    )
+    builder.button(
+        text=LEXICON_RU_BUTTONS['go_back'],
+        callback_data=NavigationCD(path=back_path).pack()
+    )
+    builder.adjust(1)
+    return builder.as_markup()
 
-@router.callback_query(NavigationCD.filter(F.path == "main.sync.tasks.to_google"))
-async def sync_tasks_to_google_menu(call: CallbackQuery, pool, cred):
-    if not cred:
-        await call.answer("❌ Google Sheets integration is not configured", show_alert=True)
-        return
-    try:
-        result = await sync_db_to_sheet(pool, cred)
-        await call.message.edit_text(
-            f"{result}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.tasks")
-        )
-    except Exception as e:
-        logger.error(f"Error in sync_tasks_to_google_menu: {e}")
-        await call.message.edit_text(
-            f"❌ Ошибка при экспорте: {str(e)}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.tasks")
-        )
 
-@router.callback_query(NavigationCD.filter(F.path == "main.sync.tasks.from_google"))
-async def sync_tasks_from_google_menu(call: CallbackQuery, pool, cred):
-    if not cred:
-        await call.answer("❌ Google Sheets integration is not configured", show_alert=True)
+@router.message(Command(commands=list(SYNC_COMMANDS)))
+async def sync_command(message: Message, command: CommandObject, sync_jobs: SyncJobManager):
+    """Run sync by command and reply with the result once the background job is done"""
+    if not sync_jobs.configured:
+        await message.answer("❌ Google Sheets integration is not configured")
         return
-    try:
-        result = await sync_sheet_to_db(pool, cred)
-        await call.message.edit_text(
-            f"{result}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.tasks")
-        )
-    except Exception as e:
-        logger.error(f"Error in sync_tasks_from_google_menu: {e}")
-        await call.message.edit_text(
-            f"❌ Ошибка при импорте: {str(e)}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.tasks")
-        )
-
-@router.callback_query(NavigationCD.filter(F.path == "main.sync.assignments.to_google"))
-async def sync_assignments_to_google_menu(call: CallbackQuery, pool, cred):
-    if not cred:
+    job = sync_jobs.start(SYNC_COMMANDS[command.command])
+    await message.answer(f"⏳ {job.title}...")
+    await sync_jobs.wait(job)
+    await message.answer(job.result)
+
+@router.callback_query(NavigationCD.filter(F.path.in_(SYNC_MENU_PATHS)))
+async def sync_from_menu(call: CallbackQuery, callback_data: NavigationCD, sync_jobs: SyncJobManager):
+    if not sync_jobs.configured:
         await call.answer("❌ Google Sheets integration is not configured", show_alert=True)
         return
-    try:
-        result = await sync_assignments_db_to_sheet(pool, cred)
-        await call.message.edit_text(
-            f"{result}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.assignments")
-        )
-    except Exception as e:
-        logger.error(f"Error in sync_assignments_to_google_menu: {e}")
-        await call.message.edit_text(
-            f"❌ Ошибка при экспорте: {str(e)}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.assignments")
-        )
+    job = sync_jobs.start(SYNC_MENU_PATHS[callback_data.path])
+    await call.message.edit_text(
+        f"⏳ {job.title}: запущено в фоне.\n\nНажмите «{LEXICON_RU_BUTTONS['main.sync.status']}», чтобы узнать результат.",
+        reply_markup=sync_status_markup(callback_data.path.rsplit(".", 1)[0])
+    )
 
-@router.callback_query(NavigationCD.filter(F.path == "main.sync.assignments.from_google"))
-async def sync_assignments_from_google_menu(call: CallbackQuery, pool, cred):
-    if not cred:
-        await call.answer("❌ Google Sheets integration is not configured", show_alert=True)
-        return
+@router.callback_query(NavigationCD.filter(F.path == "main.sync.status"))
+async def show_sync_status(call: CallbackQuery, sync_jobs: SyncJobManager):
     try:
-        result = await sync_assignments_sheet_to_db(pool, cred)
-        await call.message.edit_text(
-            f"{result}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.assignments")
-        )
-    except Exception as e:
-        logger.error(f"Error in sync_assignments_from_google_menu: {e}")
         await call.message.edit_text(
-            f"❌ Ошибка при импорте: {str(e)}\n\nВыберите действие:",
-            reply_markup=get_menu_markup("main.sync.assignments")
+            f"{LEXICON_RU['main.sync.status']}\n\n{sync_jobs.status_text()}",
+            reply_markup=sync_status_markup("main.sync")
         )
+    except TelegramBadRequest:
+        # Nothing changed since the last poll
+        await call.answer("Без изменений")
 
 @router.callback_query(NavigationCD.filter())
 async def navigate_menu(call: CallbackQuery, callback_data: NavigationCD):
@@ -1,6 +1,6 @@
 import logging
 from aiogram import Router, F
-from aiogram.types import CallbackQuery
+from aiogram.types import CallbackQuery, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardMarkup 
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -8,21 +8,21 @@ from aiogram.fsm.state import State, StatesGroup
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from handlers.callbacks import TaskActionCD
-from handlers.admin import show_task_details
+from handlers.admin import show_task_details, show_task_page
 from services.assignment_service import AssignmentService
+from services.task_pages import TaskPageCache
+from services.user_directory import UserDirectory, volunteer_sort_key
 from filters.roles import IsAdmin
 from database.pg_model import Task, Assignment, User
-from utils.event_time import EventTimeManager, EventTime
+from utils.event_time import EventTimeManager
 
 from typing import List
 
-from datetime import timedelta
-
 from lexicon.lexicon_ru import LEXICON_RU
 from aiogram.exceptions import TelegramNetworkError
 import asyncio
 
-from services.notifications import notify_task_volunteers
+from services.reminders import schedule_task_reminder, cancel_task_reminder
 from keyboards.admin import send_menu_message  # Add this import
 
 logger = logging.getLogger(__name__)
@@ -33,7 +33,11 @@ class AssignmentStates(StatesGroup):
     selecting_volunteers = State()
     confirming = State()
 
-def get_volunteers_keyboard(volunteers: list, total: int, page: int = 1, per_page: int = 5, selected_ids: list = None):
+VOLUNTEERS_PER_PAGE = 5
+
+
+def get_volunteers_keyboard(volunteers: list, selected_ids: list = None, has_prev: bool = False,
+                            has_next: bool = False, query: str = ''):
     builder = InlineKeyboardBuilder()
     selected_ids = selected_ids or []
 
@@ -46,18 +50,16 @@ def get_volunteers_keyboard(volunteers: list, total: int, page: int = 1, per_pag
         )
 
     # Add pagination buttons if needed
-    if total > per_page:
-        buttons = []
-        if page > 1:
-            buttons.append(("⬅️", f"vol_page_{page-1}"))
-        if page * per_page < total:
-            buttons.append(("➡️", f"vol_page_{page+1}"))
-        for text, callback_data in buttons:
-            builder.button(text=text, callback_data=callback_data)
+    if has_prev:
+        builder.button(text="⬅️", callback_data="vol_page_prev")
+    if has_next:
+        builder.button(text="➡️", callback_data="vol_page_next")
+    if query:
+        builder.button(text=f"🔎 Сбросить поиск «{query}»", callback_data="vol_search_reset")
 
     # Add control buttons
     builder.button(
-        text="✅ Завершить выбор",
+        text=f"✅ Завершить выбор ({len(selected_ids)})" if selected_ids else "✅ Завершить выбор",
         callback_data="finish_selection"
     )
     builder.button(
@@ -68,6 +70,45 @@ def get_volunteers_keyboard(volunteers: list, total: int, page: int = 1, per_pag
     builder.adjust(1)  # One button per row for better readability
     return builder.as_markup()
 
+def volunteers_text(query: str = '', found: bool = True) -> str:
+    text = "Выберите волонтеров для назначения"
+    if query:
+        text += f" (поиск: «{query}»)"
+        if not found:
+            text += "\n\nНикого не найдено."
+    return text + ":\n<i>Чтобы найти волонтера, отправьте начало имени или username.</i>"
+
+async def load_volunteers_page(state: FSMContext, service: AssignmentService, cursors: list,
+                               query: str) -> tuple[list, bool]:
+    """
+    Читает страницу по последнему курсору из cursors (ключ волонтера, после
+    которого она начинается) и запоминает в состоянии ее состав: переключение
+    выбора перестраивает клавиатуру по нему, без запроса списка заново.
+    """
+    volunteers, has_next = await service.get_volunteers(
+        after=cursors[-1], per_page=VOLUNTEERS_PER_PAGE, query=query
+    )
+    await state.update_data(
+        page_cursors=cursors,
+        page_ids=[volunteer.tg_id for volunteer in volunteers],
+        has_next=has_next,
+        query=query
+    )
+    return volunteers, has_next
+
+def volunteers_keyboard_from_state(data: dict, user_directory: UserDirectory):
+    """Клавиатура текущей страницы по сохраненному составу, волонтеры — из справочника в памяти"""
+    volunteers = [
+        volunteer for volunteer in map(user_directory.get_user, data.get("page_ids", []))
+        if volunteer
+    ]
+    return get_volunteers_keyboard(
+        volunteers, data.get("selected_volunteers", []),
+        has_prev=len(data.get("page_cursors", [None])) > 1,
+        has_next=data.get("has_next", False),
+        query=data.get("query", '')
+    )
+
 def get_assignments_list_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(
@@ -82,29 +123,33 @@ def get_assignments_list_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 @router.callback_query(TaskActionCD.filter(F.action == "create_assignment"))
-async def start_assignment_creation(call: CallbackQuery, callback_data: TaskActionCD, state: FSMContext, pool):
-    service = AssignmentService(call.bot, pool)
-    volunteers, total = await service.get_volunteers()
-    
-    # Store task_id and initialize selected volunteers list
+async def start_assignment_creation(call: CallbackQuery, callback_data: TaskActionCD, state: FSMContext,
+                                    pool, user_directory: UserDirectory):
+    service = AssignmentService(call.bot, pool, user_directory)
+
+    # Выбор начинается с текущего состава: по завершении применяется только разница
+    selected = [
+        assignment.tg_id for assignment in await Assignment.get_by_task(pool, callback_data.task_id)
+        if assignment.status != 'cancelled'
+    ]
     await state.update_data(
         task_id=callback_data.task_id,
-        selected_volunteers=[],
-        current_page=1
+        selected_volunteers=selected,
+        initial_volunteers=list(selected)
     )
-    
+    volunteers, has_next = await load_volunteers_page(state, service, [None], '')
+
     await call.message.edit_text(
-        "Выберите волонтеров для назначения:",
-        reply_markup=get_volunteers_keyboard(volunteers, total)
+        volunteers_text(),
+        reply_markup=get_volunteers_keyboard(volunteers, selected, has_next=has_next)
     )
     await state.set_state(AssignmentStates.selecting_volunteers)
 
 @router.callback_query(lambda c: c.data.startswith("select_volunteer_"))
-async def process_volunteer_selection(call: CallbackQuery, state: FSMContext, pool):
+async def process_volunteer_selection(call: CallbackQuery, state: FSMContext, user_directory: UserDirectory):
     volunteer_id = int(call.data.split("_")[2])
     data = await state.get_data()
     selected = data.get("selected_volunteers", [])
-    current_page = data.get("current_page", 1)
     
     # Toggle volunteer selection
     if volunteer_id in selected:
@@ -113,30 +158,60 @@ async def process_volunteer_selection(call: CallbackQuery, state: FSMContext, po
         selected.append(volunteer_id)
     
     await state.update_data(selected_volunteers=selected)
+    data["selected_volunteers"] = selected
     
-    # Refresh volunteer list
-    service = AssignmentService(call.bot, pool)
-    volunteers, total = await service.get_volunteers(page=current_page)
-    
+    # Same page, only the checkmarks change
+    await call.message.edit_reply_markup(
+        reply_markup=volunteers_keyboard_from_state(data, user_directory)
+    )
+
+@router.callback_query(F.data.in_({"vol_page_next", "vol_page_prev"}))
+async def process_page_change(call: CallbackQuery, state: FSMContext, pool, user_directory: UserDirectory):
+    data = await state.get_data()
+    cursors = list(data.get("page_cursors", [None]))
+    query = data.get("query", '')
+
+    if call.data == "vol_page_next":
+        last = user_directory.get_user(data["page_ids"][-1]) if data.get("page_ids") else None
+        if not last:
+            await call.answer()
+            return
+        cursors.append(volunteer_sort_key(last))
+    elif len(cursors) > 1:
+        cursors.pop()
+
+    service = AssignmentService(call.bot, pool, user_directory)
+    volunteers, has_next = await load_volunteers_page(state, service, cursors, query)
     await call.message.edit_reply_markup(
         reply_markup=get_volunteers_keyboard(
-            volunteers, total, current_page, selected_ids=selected
+            volunteers, data.get("selected_volunteers", []),
+            has_prev=len(cursors) > 1, has_next=has_next, query=query
         )
     )
 
-@router.callback_query(lambda c: c.data.startswith("vol_page_"))
-async def process_page_change(call: CallbackQuery, state: FSMContext, pool):
-    page = int(call.data.split("_")[2])
+@router.message(AssignmentStates.selecting_volunteers, F.text)
+async def search_volunteers(message: Message, state: FSMContext, pool, user_directory: UserDirectory):
+    """Фильтр по началу имени/username; список приходит новым сообщением"""
+    query = message.text.strip()
+    service = AssignmentService(message.bot, pool, user_directory)
+    volunteers, has_next = await load_volunteers_page(state, service, [None], query)
     data = await state.get_data()
-    selected = data.get("selected_volunteers", [])
-    
-    service = AssignmentService(call.bot, pool)
-    volunteers, total = await service.get_volunteers(page=page)
-    
-    await state.update_data(current_page=page)
-    await call.message.edit_reply_markup(
+    await message.answer(
+        volunteers_text(query, found=bool(volunteers)),
         reply_markup=get_volunteers_keyboard(
-            volunteers, total, page, selected_ids=selected
+            volunteers, data.get("selected_volunteers", []), has_next=has_next, query=query
+        )
+    )
+
+@router.callback_query(F.data == "vol_search_reset")
+async def reset_volunteer_search(call: CallbackQuery, state: FSMContext, pool, user_directory: UserDirectory):
+    service = AssignmentService(call.bot, pool, user_directory)
+    volunteers, has_next = await load_volunteers_page(state, service, [None], '')
+    data = await state.get_data()
+    await call.message.edit_text(
+        volunteers_text(),
+        reply_markup=get_volunteers_keyboard(
+            volunteers, data.get("selected_volunteers", []), has_next=has_next
         )
     )
 
@@ -146,94 +221,62 @@ async def finish_volunteer_selection(
     state: FSMContext, 
     pool, 
     event_manager: EventTimeManager,
-    scheduler: AsyncIOScheduler
+    scheduler: AsyncIOScheduler,
+    user_directory: UserDirectory
 ):
     data = await state.get_data()
     selected = data.get("selected_volunteers", [])
     task_id = data.get("task_id")
     
-    if not selected:
+    # Снять всех можно только с задания, у которого уже есть назначенные
+    if not selected and not data.get("initial_volunteers"):
         await call.answer("Выберите хотя бы одного волонтера!", show_alert=True)
         return
     
     service = AssignmentService(call.bot, pool)
     try:
-        # Check for existing assignments
-        existing_assignments = await Assignment.get_by_task(pool, task_id)
-        
-        if existing_assignments:
-            # Cancel existing notifications
-            for assignment in existing_assignments:
-                job_id = f'notification_task_{task_id}_assignment_{assignment.assign_id}'
-                try:
-                    scheduler.remove_job(job_id)
-                except:
-                    pass
-                # Update assignment status to 'cancelled'
-                await Assignment.update_status(pool, assignment.assign_id, 'cancelled')
-            await Assignment.delete_by_task(pool, task_id)
-            
-            # Notify about update
+        task = await Task.get_by_id(pool, task_id)
+        if not task:
+            raise ValueError("Task not found")
+
+        # Only added volunteers are inserted and only removed ones are cancelled;
+        # the new assignments are marked as notified in the same transaction
+        async with pool.transaction():
+            delta = await service.reassign(task, selected, call.from_user.id)
+            if delta.added:
+                await Assignment.mark_notifications_scheduled(
+                    pool, [assignment.assign_id for assignment in delta.added]
+                )
+
+        # One reminder job per task, recipients are resolved when it fires:
+        # removed volunteers drop out by themselves, kept ones are already covered
+        if delta.added:
+            schedule_task_reminder(scheduler, task, event_manager, call.bot.token, pool)
+        elif delta.changed and not delta.kept:
+            # Напоминать больше некому
+            cancel_task_reminder(scheduler, task_id)
+
+        if not delta.changed:
+            await call.message.answer("ℹ️ Состав волонтеров не изменился")
+        elif not delta.added and not delta.kept:
+            await call.message.answer(f"✅ Назначение снято со всех волонтеров ({len(delta.removed)})")
+        elif delta.removed or delta.kept:
             await call.message.answer(
-                f"🔄 Обновляем существующие назначения для задания..."
+                f"✅ Назначение обновлено: добавлено {len(delta.added)}, "
+                f"снято {len(delta.removed)}, без изменений {len(delta.kept)}"
             )
-        
-        # Create new assignments
-        assignments = await service.create_assignment(
-            task_id=task_id,
-            volunteer_ids=selected,
-            admin_id=call.from_user.id
-        )
-        
-        # Send success message
-        await call.message.answer(
-            f"✅ {'Обновлено' if existing_assignments else 'Создано'} назначение для {len(assignments)} волонтеров!"
-        )
-        
-        # Send notification setup message
-        notification_msg = await call.message.answer(
-            "⚙️ Настраиваю уведомления..."
-        )
+        else:
+            await call.message.answer(f"✅ Создано назначение для {len(delta.added)} волонтеров!")
+
+        if delta.added:
+            await call.message.answer("✅ Уведомления настроены успешно!")
 
-        # Schedule notifications
-        task = await Task.get_by_id(pool, task_id)
-        start_time = event_manager.to_absolute_time(
-            EventTime(day=task.start_day, time=task.start_time)
-        )
-        notification_time = start_time - timedelta(minutes=5)
-
-        # Get database config from pool
-        db_config = {
-            'user': pool._connect_kwargs['user'],
-            'password': pool._connect_kwargs['password'],
-            'database': pool._connect_kwargs['database'],
-            'host': pool._connect_kwargs['host'],
-            'port': pool._connect_kwargs['port']
-        }
-        
-        # Schedule notifications with unique IDs for each assignment
-        for assignment in assignments:
-            job_id = f'notification_task_{task_id}_assignment_{assignment.assign_id}'
-            scheduler.add_job(
-                'services.notifications:notify_task_volunteers',
-                'date',
-                run_date=notification_time,
-                args=[task_id, call.bot.token, db_config, event_manager.debug_mode, assignment.assign_id],  # Pass assign_id
-                id=job_id,
-                replace_existing=True
-            )
-            await Assignment.mark_notification_scheduled(pool, assignment.assign_id)
-        
-        await notification_msg.edit_text(
-            "✅ Уведомления настроены успешно!"
-        )
-        
         # Send new message with task details instead of editing
-        task = await Task.get_by_id(pool, task_id)
         await show_task_details(
             update=call,  # Changed from 'call' to 'update'
             callback_data=TaskActionCD(action="view", task_id=task_id),
-            pool=pool
+            pool=pool,
+            user_directory=user_directory
         )
         
     except Exception as e:
@@ -246,7 +289,7 @@ async def finish_volunteer_selection(
     await state.clear()
 
 @router.callback_query(lambda c: c.data == "cancel_selection")
-async def cancel_selection(call: CallbackQuery, state: FSMContext, pool):
+async def cancel_selection(call: CallbackQuery, state: FSMContext, pool, user_directory: UserDirectory):
     await call.message.edit_text("❌ Создание назначения отменено")
     await state.clear()
     
@@ -257,7 +300,8 @@ async def cancel_selection(call: CallbackQuery, state: FSMContext, pool):
         await show_task_details(
             update=call,  # Changed from 'call' to 'update'
             callback_data=TaskActionCD(action="view", task_id=task_id),
-            pool=pool
+            pool=pool,
+            user_directory=user_directory
         )
     else:
         # If no task_id, return to main menu
@@ -292,26 +336,7 @@ async def show_assignments_list(call: CallbackQuery, pool):
     )
 
 @router.callback_query(lambda c: c.data == "create_new_assignment")
-async def start_assignment_creation_flow(call: CallbackQuery, state: FSMContext, pool):
-    """Start flow for creating new assignment by showing task list first"""
-    tasks = await Task.get_all(pool)
-    
-    text = "📋 Выберите задание для назначения:\n\n"
-    for task in tasks:
-        text += (f"🔹 {task.title}\n"
-                f"   📅 День {task.start_day} {task.start_time} - "
-                f"День {task.end_day} {task.end_time}\n\n")
-    
-    builder = InlineKeyboardBuilder()
-    for task in tasks:
-        builder.button(
-            text=task.title,
-            callback_data=TaskActionCD(action="create_assignment", task_id=task.task_id).pack()
-        )
-    builder.button(text="🔙 Назад", callback_data="show_assignments_list")
-    builder.adjust(1)
-    
-    await call.message.edit_text(
-        text,
-        reply_markup=builder.as_markup()
-    )
\ No newline at end of file
+async def start_assignment_creation_flow(call: CallbackQuery, pool, event_manager: EventTimeManager,
+                                         task_pages: TaskPageCache):
+    """Start flow for creating new assignment by showing task list first (page by page)"""
+    await show_task_page(call, pool, task_pages, event_manager, 'assign')
\ No newline at end of file
@@ -23,7 +23,10 @@ class TaskEditConfirmCD(CallbackData, prefix="task_edit_confirm"):
     task_id: int
     field: str
 
-
-
-
-
+class TaskPageCD(CallbackData, prefix="task_page"):
+    view: str            # active | day | assign
+    day: int = 0
+    page: int = 0
+    at: int = 0          # starts_at соседнего задания (services.task_pages.encode_cursor)
+    task_id: int = 0
+    back: bool = False   # at/task_id — первое задание следующей страницы, а не последнее предыдущей
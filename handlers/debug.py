@@ -1,13 +1,13 @@
 from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
-from datetime import datetime, timedelta
-from utils.event_time import EventTime
+from datetime import datetime
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from database.pg_model import Task, User, Assignment
 from services.assignment_service import AssignmentService
 from utils.event_time import EventTimeManager
+from services.reminders import schedule_task_reminder
 
 router = Router()
 
@@ -107,16 +107,9 @@ async def debug_assign_handler(message: Message, command: Command, pool=None, sc
         existing_assignments = await Assignment.get_by_volunteer(pool, vol_id)
         for assignment in existing_assignments:
             if assignment.task_id == task_id and assignment.status != 'cancelled':
-                # Cancel the existing assignment
+                # Cancel the existing assignment, the task reminder skips cancelled ones
                 await Assignment.update_status(pool, assignment.assign_id, 'cancelled')
                 
-                # Remove the associated notification
-                job_id = f'notification_task_{assignment.task_id}_assignment_{assignment.assign_id}'
-                try:
-                    scheduler.remove_job(job_id)
-                except Exception:
-                    pass
-                
                 await message.reply(f"❌ Existing assignment for volunteer {vol_id} on task {task_id} has been cancelled.")
         
         # Create new assignment
@@ -130,30 +123,9 @@ async def debug_assign_handler(message: Message, command: Command, pool=None, sc
         if assignments:
             assignment = assignments[0]
             
-            # Calculate notification time
-            start_time = event_manager.to_absolute_time(
-                EventTime(day=task.start_day, time=task.start_time)
-            )
-            notification_time = start_time - timedelta(minutes=5)
-
-            # Get database config
-            db_config = {
-                'user': pool._connect_kwargs['user'],
-                'password': pool._connect_kwargs['password'],
-                'database': pool._connect_kwargs['database'],
-                'host': pool._connect_kwargs['host'],
-                'port': pool._connect_kwargs['port']
-            }
-            
-            # Schedule notification
-            job_id = f'notification_task_{task_id}_assignment_{assignment.assign_id}'
-            scheduler.add_job(
-                'services.notifications:notify_task_volunteers',
-                'date',
-                run_date=notification_time,
-                args=[task_id, message.bot.token, db_config, event_manager.debug_mode, assignment.assign_id],
-                id=job_id,
-                replace_existing=True
+            # Schedule the task reminder (one job per task)
+            notification_time = schedule_task_reminder(
+                scheduler, task, event_manager, message.bot.token, pool
             )
             await Assignment.mark_notification_scheduled(pool, assignment.assign_id)
             
@@ -1,5 +1,5 @@
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -10,9 +10,11 @@ from keyboards.admin import get_menu_markup
 from states.states import FSMTaskEdit
 from handlers.callbacks import NavigationCD, TaskActionCD, TaskEditCD, TaskEditConfirmCD
 from filters.roles import IsAdmin
-from utils.event_time import EventTime, EventTimeManager
+from utils.event_time import EventTimeManager
 from handlers.admin import show_task_details
 from utils.formatting import format_task_time
+from services.reminders import schedule_task_reminder, cancel_legacy_reminders
+from services.user_directory import UserDirectory
 
 logger = logging.getLogger(__name__)
 
@@ -119,7 +121,8 @@ async def process_day_selection(call: CallbackQuery, state: FSMContext):
     )
 
 @router.message(FSMTaskEdit.edit_value)
-async def process_edit_value(message: Message, state: FSMContext, pool, event_manager: EventTimeManager, scheduler):
+async def process_edit_value(message: Message, state: FSMContext, pool, event_manager: EventTimeManager, scheduler,
+                             user_directory: UserDirectory):
     data = await state.get_data()
     field = data['edit_field']
     task_id = data['task_id']
@@ -131,23 +134,22 @@ async def process_edit_value(message: Message, state: FSMContext, pool, event_ma
         return
 
     # If changing time fields
+    active_assignments = []
     if field in ['start', 'end']:
         try:
             time = datetime.strptime(message.text, "%H:%M").strftime("%H:%M")
             day = data['selected_day']
             
-            new_event_time = EventTime(day=day, time=time)
+            new_key = event_manager.minute_key(day, time)
             
             # Validate time based on field type
             if field == 'start':
-                end_event_time = EventTime(day=task.end_day, time=task.end_time)
-                if event_manager.to_absolute_time(new_event_time) >= event_manager.to_absolute_time(end_event_time):
+                if new_key >= event_manager.minute_key(task.end_day, task.end_time):
                     await message.answer("Время начала должно быть раньше времени окончания!")
                     return
                 update_fields = {'start_day': day, 'start_time': time}
             else:  # field == 'end'
-                start_event_time = EventTime(day=task.start_day, time=task.start_time)
-                if event_manager.to_absolute_time(new_event_time) <= event_manager.to_absolute_time(start_event_time):
+                if new_key <= event_manager.minute_key(task.start_day, task.start_time):
                     await message.answer("Время окончания должно быть позже времени начала!")
                     return
                 update_fields = {'end_day': day, 'end_time': time}
@@ -155,56 +157,6 @@ async def process_edit_value(message: Message, state: FSMContext, pool, event_ma
             # Check for existing assignments
             assignments = await Assignment.get_by_task(pool, task_id)
             active_assignments = [a for a in assignments if a.status != 'cancelled']
-            
-            if active_assignments:
-                # Calculate new notification time
-                start_time = event_manager.to_absolute_time(
-                    EventTime(day=day if field == 'start' else task.start_day,
-                            time=time if field == 'start' else task.start_time)
-                )
-                notification_time = start_time - timedelta(minutes=5)
-                
-                # Get database config for notifications
-                db_config = {
-                    'user': pool._connect_kwargs['user'],
-                    'password': pool._connect_kwargs['password'],
-                    'database': pool._connect_kwargs['database'],
-                    'host': pool._connect_kwargs['host'],
-                    'port': pool._connect_kwargs['port']
-                }
-                
-                # Update assignments and notifications
-                for assignment in active_assignments:
-                    # Update assignment times
-                    await Assignment.update(
-                        pool=pool,
-                        assign_id=assignment.assign_id,
-                        start_day=day if field == 'start' else assignment.start_day,
-                        start_time=time if field == 'start' else assignment.start_time,
-                        end_day=day if field == 'end' else assignment.end_day,
-                        end_time=time if field == 'end' else assignment.end_time
-                    )
-                    
-                    # Update scheduler
-                    job_id = f'notification_task_{task_id}_assignment_{assignment.assign_id}'
-                    try:
-                        scheduler.remove_job(job_id)
-                    except:
-                        pass
-                    
-                    # Add new job with updated time
-                    scheduler.add_job(
-                        'services.notifications:notify_task_volunteers',
-                        'date',
-                        run_date=notification_time,
-                        args=[task_id, message.bot.token, db_config, event_manager.debug_mode, assignment.assign_id],
-                        id=job_id,
-                        replace_existing=True
-                    )
-                
-                await message.answer(
-                    f"⚙️ Обновлено {len(active_assignments)} назначений и уведомлений"
-                )
                 
         except ValueError:
             await message.answer("Неверный формат времени! Используйте HH:MM")
@@ -212,17 +164,38 @@ async def process_edit_value(message: Message, state: FSMContext, pool, event_ma
     else:
         update_fields = {field: message.text}
 
-    # Update task
-    updated_task = await Task.update(pool, task_id, **update_fields)
+    # Task and its assignments change together
+    async with pool.transaction():
+        if active_assignments:
+            # Update assignment times in one statement
+            await Assignment.update_active_by_task(pool, task_id, **update_fields)
+        updated_task = await Task.update(pool, task_id, **update_fields)
+
     if not updated_task:
         await message.answer("Ошибка при обновлении задания!")
         return
 
+    if active_assignments:
+        # Move the task reminder (one job per task) to the new start time
+        cancel_legacy_reminders(scheduler, task_id, [a.assign_id for a in active_assignments])
+        schedule_task_reminder(
+            scheduler,
+            updated_task,
+            event_manager,
+            message.bot.token,
+            pool
+        )
+        
+        await message.answer(
+            f"⚙️ Обновлено {len(active_assignments)} назначений и уведомлений"
+        )
+
     # Show updated task details
     await show_task_details(
         message,
         TaskActionCD(action="view", task_id=task_id),
-        pool
+        pool,
+        user_directory
     )
     
     await state.clear()
\ No newline at end of file
@@ -9,8 +9,9 @@ from filters.roles import IsVolunteer
 from handlers.callbacks import NavigationCD
 from keyboards.user import get_menu_markup
 from keyboards.admin import get_menu_markup as get_admin_menu_markup
-from database.pg_model import User, Assignment, Task, SpotTaskResponse
+from database.pg_model import User, Task, SpotTaskResponse
 from utils.formatting import format_task_time
+from services.spot_responses import SpotResponseAggregator
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +33,6 @@ async def role_change_handler(message: Message, pool=None, middleware=None, **da
         
     try:
         await User.update_role(pool, message.from_user.id, "admin")
-        middleware.role_cache[message.from_user.id] = "admin"
         data["role"] = "admin"
         
         logger.info(f"User {message.from_user.username} (id={message.from_user.id}) has switched role to 'admin'")
@@ -49,13 +49,12 @@ async def role_change_handler(message: Message, pool=None, middleware=None, **da
 
 @router.callback_query(NavigationCD.filter(F.path == "vmain.mytasks"))
 async def show_volunteer_tasks(call: CallbackQuery, pool):
-    # Get all active assignments for the volunteer
-    assignments = await Assignment.get_by_volunteer(pool, call.from_user.id)
-    active_assignments = [a for a in assignments if a.status != 'cancelled']
+    # Tasks of the volunteer's active assignments, sorted by start time in SQL
+    tasks = await Task.get_by_volunteer(pool, call.from_user.id)
     
-    logger.debug(f"Volunteer tasks: {active_assignments}")
+    logger.debug(f"Volunteer tasks: {tasks}")
 
-    if not active_assignments:
+    if not tasks:
         text = LEXICON_RU['vmain.mytasks.empty']
         builder = InlineKeyboardBuilder()
         builder.button(
@@ -66,21 +65,19 @@ async def show_volunteer_tasks(call: CallbackQuery, pool):
         tasks_text = []
         builder = InlineKeyboardBuilder()
         
-        for assignment in active_assignments:
-            task = await Task.get_by_id(pool, assignment.task_id)
-            if task:
-                # Add task info to text
-                task_text = (
-                    f"📌 <b>{task.title}</b>\n"
-                    f"<i>{format_task_time(task)}</i>"
-                )
-                tasks_text.append(task_text)
-                
-                # Add button for task details
-                builder.button(
-                    text=f"📋 {task.title}",
-                    callback_data=f"view_task_{task.task_id}"
-                )
+        for task in tasks:
+            # Add task info to text
+            task_text = (
+                f"📌 <b>{task.title}</b>\n"
+                f"<i>{format_task_time(task)}</i>"
+            )
+            tasks_text.append(task_text)
+            
+            # Add button for task details
+            builder.button(
+                text=f"📋 {task.title}",
+                callback_data=f"view_task_{task.task_id}"
+            )
         
         # Add back button
         builder.button(
@@ -133,29 +130,19 @@ async def show_volunteer_task_details(call: CallbackQuery, pool):
     )
 
 @router.callback_query(IsVolunteer(), F.data.startswith("spot_accept_") | F.data.startswith("spot_decline_"))
-async def handle_spot_response(call: CallbackQuery, pool, bot):
+async def handle_spot_response(call: CallbackQuery, pool, spot_responses: SpotResponseAggregator):
     action, spot_task_id = call.data.split("_")[1:]
     volunteer_id = call.from_user.id
     response = "accepted" if action == "accept" else "declined"
 
     # Save response to DB
-    await SpotTaskResponse.change_response(pool, int(spot_task_id), volunteer_id, response)
+    await SpotTaskResponse.change_response(
+        pool, int(spot_task_id), volunteer_id, response, call.message.message_id
+    )
     await call.answer("Ответ отправлен!")
 
-    # Notify all admins
-    admins = await User.get_by_role(pool, "admin")
-    volunteer = await User.get_by_tg_id(pool, volunteer_id)
-    for admin in admins:
-        await bot.send_message(
-            admin.tg_id,
-            f"Волонтер {volunteer.name} (@{volunteer.tg_username}) {'принял' if response == 'accepted' else 'отклонил'} срочное задание."
-        )
-    await bot.send_message(
-        257026813,
-        f"Волонтер {volunteer.name} (@{volunteer.tg_username}) {'принял' if response == 'accepted' else 'отклонил'} срочное задание."
-        )
-
-    # Optionally: schedule deletion of this message after expiry
+    # Admins get one live summary per spot task instead of a message per response
+    await spot_responses.record(int(spot_task_id), volunteer_id, response)
 
 
 @router.callback_query(NavigationCD.filter())
@@ -26,7 +26,8 @@ admin_menu_structure: dict[str, list[tuple[str, str]]] = {
     "main.sync": [
         (LEXICON["main.sync.volunteers"],       "main.sync.volunteers"),
         (LEXICON["main.sync.tasks"],            "main.sync.tasks"),
-        (LEXICON["main.sync.assignments"],      "main.sync.assignments")
+        (LEXICON["main.sync.assignments"],      "main.sync.assignments"),
+        (LEXICON["main.sync.status"],           "main.sync.status")
     ],
     "main.sync.volunteers": [
         (LEXICON["to_google"], "main.sync.volunteers.to_google"),
@@ -61,6 +61,7 @@ LEXICON_RU: dict[str, str] = {
     'main.sync.tasks.from_google': "Загрузка заданий из Google таблицы...",
     'main.sync.assignments.to_google': "Выгрузка назначений в Google таблицу...",
     'main.sync.assignments.from_google': "Загрузка назначений из Google таблицы...",
+    'main.sync.status': "📊 Статус синхронизации:",
     
     # Support
     'main.support': (
@@ -120,6 +121,7 @@ LEXICON_RU_BUTTONS: dict[str, str] = {
     'main.sync.volunteers': "👥 Волонтеры",
     'main.sync.tasks': "📋 Задания",
     'main.sync.assignments': "📌 Назначения",
+    'main.sync.status': "📊 Статус",
     'to_google': "⬆️ Выгрузить в Google",
     'from_google': "⬇️ Загрузить из Google"
 }
@@ -3,9 +3,9 @@ import logging
 import logging.config
 import json
 import os
+from functools import partial
 from environs import Env
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.executors.asyncio import AsyncIOExecutor 
 
 from aiogram import Bot, Dispatcher, Router
@@ -16,9 +16,24 @@ from filters.roles import IsAdmin, IsVolunteer
 from keyboards.set_menu import set_main_menu
 from config_data.config import Config, load_config
 from utils.logger.logging_settings import logging_config
-from database.pg_model import create_pool  
+from database.pool import connect, create_pool, pool_kwargs
+from database.migrations import apply_migrations
+from database.pg_model import EventSettings
+from database.fsm_storage import PgStorage
 from middleware.registration import RoleAssigmmentMiddleware
+from middleware.unit_of_work import UnitOfWorkMiddleware
 from utils.event_time import EventTimeManager
+from services.rate_limiter import TelegramRateLimiter
+from services.spot_broadcast import SpotBroadcaster
+from services.spot_cleanup import SpotExpirySweeper
+from services.spot_responses import SpotResponseAggregator
+from services.runtime import register_runtime
+from services.sync_jobs import SyncJobManager, AutoSyncWorker
+from services.task_pages import TaskPageCache
+from services.user_directory import UserDirectory
+from services.webhook import run_webhook
+from services.job_store import AsyncpgJobStore
+from services.leader import LeaderElection
 
 logging.config.dictConfig(logging_config)
 logger = logging.getLogger(__name__)
@@ -60,8 +75,34 @@ async def main() -> None:
         days_count,
         debug_mode
     )
+
+    # Create PostgreSQL connection pool
+    try:
+        pool = await create_pool(**pool_kwargs(config.db))
+    except Exception as e:
+        logger.critical(f"ERROR CONNECTING TO THE DATABASE: {e}")
+        exit(-1)
+
+    logger.info("Successfully created DB connection")
+
+    try:
+        schema_version = await apply_migrations(pool)
+    except Exception as e:
+        logger.critical(f"ERROR APPLYING DATABASE MIGRATIONS: {e}")
+        exit(-1)
+    logger.info(f"Database schema version: {schema_version}")
+
+    # Task and assignment timestamps are computed in SQL from the event start date
+    if await EventSettings.apply(pool, start_date):
+        logger.info("Recomputed task and assignment timestamps for the event start date")
+
+    # FSM state lives in PostgreSQL so admin flows survive restarts
+    storage = PgStorage(pool, cache_ttl=config.fsm_cache_ttl)
+    storage.start()
+
     bot = Bot(token=config.tg_bot.token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    dp = Dispatcher()
+    dp = Dispatcher(storage=storage)
+    dp["pool"] = pool
     
     logger.info("Initialized bot and dispatcher")
 
@@ -70,24 +111,36 @@ async def main() -> None:
 
     dp["spot_duration"] = config.spot_duration
     
-    # Create PostgreSQL connection pool
-    try:
-        dp["pool"] = await create_pool(
-            user=config.db.user,
-            password=config.db.password,
-            database=config.db.database,
-            host=config.db.host,
-            port=config.db.port
-        )
-    except Exception as e:
-        logger.critical(f"ERROR CONNECTING TO THE DATABASE: {e}")
-        exit(-1)
 
-    logger.info("Successfully created DB connection")
+    # Scheduled jobs reuse this bot and pool instead of creating their own
+    register_runtime(bot, dp["pool"])
+
+    # Shared Telegram rate limiter for bulk sends
+    rate_limiter = TelegramRateLimiter()
+    dp["rate_limiter"] = rate_limiter
+    dp["spot_broadcaster"] = SpotBroadcaster(bot, dp["pool"], rate_limiter)
+
+    # Users and pending users are kept in memory for the role middleware
+    user_directory = UserDirectory(dp["pool"])
+    user_directory.start()
+    await user_directory.load()
+    dp["user_directory"] = user_directory
+
+    # One live-updating response summary per spot task for admins
+    dp["spot_responses"] = SpotResponseAggregator(bot, dp["pool"], user_directory, rate_limiter)
+
+    # Expired spot task messages are removed by one background sweeper (started on the leader)
+    spot_sweeper = SpotExpirySweeper(dp["pool"], dp["spot_broadcaster"], dp["spot_responses"])
+    dp["spot_sweeper"] = spot_sweeper
+
+    # Short-lived per-admin cache of task list pages
+    dp["task_pages"] = TaskPageCache()
 
     # Register middleware based on debug_auth mode
 
-    dp.update.outer_middleware(RoleAssigmmentMiddleware(dp["pool"], config.debug_auth))
+    dp.update.outer_middleware(RoleAssigmmentMiddleware(dp["pool"], user_directory, config.debug_auth))
+    # One DB connection per update, handlers see it as `pool`
+    dp.update.outer_middleware(UnitOfWorkMiddleware(dp["pool"]))
 
 
 
@@ -123,11 +176,12 @@ async def main() -> None:
 
     logger.info("Registered routers")
 
-    # Configure scheduler with SQLAlchemy jobstore
+    # Jobs are kept in memory and persisted through the asyncpg pool in batches;
+    # changes made by other workers arrive through LISTEN/NOTIFY
+    job_store = AsyncpgJobStore(dp["pool"], connect=partial(connect, config.db))
+    await job_store.load()
     jobstores = {
-        'default': SQLAlchemyJobStore(
-            url=f'postgresql://{config.db.user}:{config.db.password}@{config.db.host}:{config.db.port}/{config.db.database}'
-        )
+        'default': job_store
     }
     executors = {
         'default': AsyncIOExecutor()  # Use AsyncIOExecutor instead of ThreadPoolExecutor
@@ -143,7 +197,8 @@ async def main() -> None:
         executors=executors,
         job_defaults=job_defaults
     )
-    scheduler.start()
+    # Every worker adds jobs, but only the leader runs them (see below)
+    scheduler.start(paused=True)
     dp["scheduler"] = scheduler
 
     
@@ -169,9 +224,38 @@ async def main() -> None:
         logger.error(f"Failed to load Google Sheets credentials: {e}")
         dp["cred"] = None
 
-    await bot.delete_webhook(drop_pending_updates=True)
-    logger.debug("Deleted webhook. All prior updates are dropped")
-    await dp.start_polling(bot)
+    # Google Sheets sync runs as background jobs admins can poll
+    dp["sync_jobs"] = SyncJobManager(dp["pool"], dp["cred"], event_manager)
+
+    # Periodic two-way sync so the DB follows organisers' edits in the sheet
+    auto_sync = AutoSyncWorker(dp["sync_jobs"], config.sync.intervals, config.sync.max_backoff)
+
+    # With several webhook workers only one of them runs jobs and background workers
+    async def start_leader_work() -> None:
+        await job_store.sync_from_db()
+        scheduler.resume()
+        spot_sweeper.start()
+        auto_sync.start()
+
+    async def stop_leader_work() -> None:
+        scheduler.pause()
+        await spot_sweeper.stop()
+        await auto_sync.stop()
+
+    leader = LeaderElection(partial(connect, config.db), start_leader_work, stop_leader_work)
+    await leader.start()
+
+    try:
+        if config.webhook.enabled:
+            await run_webhook(dp, bot, config.webhook)
+        else:
+            await bot.delete_webhook(drop_pending_updates=True)
+            logger.debug("Deleted webhook. All prior updates are dropped")
+            await dp.start_polling(bot)
+    finally:
+        await leader.stop()
+        # Persist job changes made since the last flush
+        await job_store.close()
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
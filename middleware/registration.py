@@ -2,17 +2,16 @@ import logging
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import Message, TelegramObject
-from cachetools import TTLCache
-from datetime import timedelta
 from database.pg_model import User
 from database.pg_model import PendingUser
+from services.user_directory import UserDirectory
 
 logger = logging.getLogger(__name__)
 
 class RoleAssigmmentMiddleware(BaseMiddleware):
-    def __init__(self, pool, debug_auth_enabled: bool) -> None:
+    def __init__(self, pool, user_directory: UserDirectory, debug_auth_enabled: bool) -> None:
         self.pool = pool
-        self.role_cache = TTLCache(maxsize=1000, ttl=timedelta(hours=1).total_seconds())
+        self.user_directory = user_directory
         self.debug_auth_enabled = debug_auth_enabled
 
     async def __call__(
@@ -24,6 +23,7 @@ class RoleAssigmmentMiddleware(BaseMiddleware):
         # Always add pool and middleware to data
         data["pool"] = self.pool
         data["middleware"] = self
+        data["user_directory"] = self.user_directory
         
         logger.debug(f"Middleware called with event type: {type(event)}")
         
@@ -45,18 +45,11 @@ class RoleAssigmmentMiddleware(BaseMiddleware):
         full_name = f"{user.first_name or ''} {user.last_name or ''}".strip()
         logger.debug(f"Processing user {username} (id: {user_id})")
 
-        # Check if role is in cache first
-        if user_id in self.role_cache:
-            data["role"] = self.role_cache[user_id]
-            logger.debug(f"Role retrieved from cache for user {user_id}: {data['role']}")
-            return await handler(event, data)
-        
-        # If not in cache, first check in users table
-        user_data = await User.get_by_tg_id(self.pool, user_id)
+        # Роль берется из справочника в памяти; при промахе — один запрос к базе
+        user_data, pending_user = await self.user_directory.resolve(user_id, username)
         
         if not user_data:
-            # Check in pending_users table
-            pending_user = await PendingUser.get_by_username(self.pool, username)
+            # Check in pending users
             if pending_user:
                 # Create full user record
                 user_data = await User.create(
@@ -76,9 +69,7 @@ class RoleAssigmmentMiddleware(BaseMiddleware):
                     logger.warning(f"Unauthorized access attempt from user {username} (id: {user_id})")
                     return None
 
-        # Store in cache and data
-        self.role_cache[user_id] = user_data.role
         data["role"] = user_data.role
-        logger.debug(f"Role assigned and cached for user {user_id}: {user_data.role}")
+        logger.debug(f"Role assigned for user {user_id}: {user_data.role}")
         
         return await handler(event, data)
\ No newline at end of file
@@ -0,0 +1,32 @@
+from typing import Any, Awaitable, Callable, Dict
+
+import asyncpg
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from database.unit_of_work import UnitOfWork
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """
+    Подменяет data["pool"] на UnitOfWork: все запросы одного апдейта идут
+    через одно соединение, которое берется при первом запросе.
+    Регистрируется после RoleAssigmmentMiddleware, который кладет в data пул.
+    """
+
+    def __init__(self, pool: asyncpg.Pool) -> None:
+        self.pool = pool
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        uow = UnitOfWork(self.pool)
+        data["pool"] = uow
+        data["uow"] = uow
+        try:
+            return await handler(event, data)
+        finally:
+            await uow.finish()
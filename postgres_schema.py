@@ -2,6 +2,7 @@ import asyncio
 import asyncpg
 
 from config_data.config import load_config
+from database.migrations import apply_migrations
 
 async def create_tables(pool: asyncpg.Pool):
     async with pool.acquire() as conn:
@@ -19,13 +20,12 @@ async def create_tables(pool: asyncpg.Pool):
         await conn.execute('''
             CREATE TABLE IF NOT EXISTS task (
                 task_id      SERIAL PRIMARY KEY,
-                title        TEXT    NOT NULL,
+                title        TEXT    NOT NULL UNIQUE,
                 description  TEXT,
                 start_day    INTEGER NOT NULL,   -- День мероприятия (1-based)
                 start_time   TEXT    NOT NULL,   -- Время в формате HH:MM
                 end_day      INTEGER NOT NULL,   -- День мероприятия (1-based)
                 end_time     TEXT    NOT NULL,   -- Время в формате HH:MM
-                status       TEXT    NOT NULL,
                 created_at   TIMESTAMP NOT NULL,
                 updated_at   TIMESTAMP,
                 completed_at TIMESTAMP
@@ -44,7 +44,9 @@ async def create_tables(pool: asyncpg.Pool):
                 start_time   TEXT NOT NULL,
                 end_day      INTEGER NOT NULL,
                 end_time     TEXT NOT NULL,
-                status       TEXT NOT NULL
+                status       TEXT NOT NULL,
+                notification_scheduled BOOLEAN DEFAULT FALSE,
+                UNIQUE (task_id, tg_id)
             )
         ''')
 
@@ -69,6 +71,9 @@ async def create_tables(pool: asyncpg.Pool):
             )
         ''')
 
+    # Spot-таблицы, недостающие ограничения и индексы
+    await apply_migrations(pool)
+
 async def main():
     config = load_config()
 
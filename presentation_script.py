@@ -1,5 +1,6 @@
 import asyncio
-from database.pg_model import User, create_pool
+from database.pg_model import User
+from database.pool import create_pool
 from config_data.config import load_config
 
 
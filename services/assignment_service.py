@@ -3,59 +3,47 @@ import logging
 from typing import List, Optional
 from datetime import datetime, timedelta
 from aiogram import Bot
-from database.pg_model import User, Task, Assignment
+from database.pg_model import User, Task, Assignment, AssignmentDelta
+from services.user_directory import UserDirectory, VolunteerKey, volunteer_page, volunteer_sort_key
 
 logger = logging.getLogger(__name__)
 
 class AssignmentService:
-    def __init__(self, bot: Bot, pool):
+    def __init__(self, bot: Bot, pool, user_directory: Optional[UserDirectory] = None):
         self.bot = bot
         self.pool = pool
+        self.user_directory = user_directory
         self.NOTIFICATION_MINUTES = 5  # За сколько минут уведомлять
 
-    async def get_volunteers(self, page: int = 1, per_page: int = 5) -> tuple[List[User], int]:
-        """Get paginated list of volunteers"""
-        async with self.pool.acquire() as conn:
-            # Get total count
-            total = await conn.fetchval(
-                "SELECT COUNT(*) FROM users WHERE role = 'volunteer'"
-            )
-            
-            # Get paginated volunteers
-            volunteers = await conn.fetch(
-                """
-                SELECT * FROM users 
-                WHERE role = 'volunteer'
-                ORDER BY name
-                LIMIT $1 OFFSET $2
-                """,
-                per_page, (page - 1) * per_page
-            )
-            
-            return [User(**dict(v)) for v in volunteers], total
+    async def get_volunteers(self, after: Optional[VolunteerKey] = None, per_page: int = 5,
+                             query: str = '') -> tuple[List[User], bool]:
+        """
+        Страница волонтеров по имени после ключа after (volunteer_sort_key
+        последнего волонтера предыдущей страницы). query — фильтр по началу
+        слов имени и username. Возвращает (волонтеры, есть ли следующая страница).
+        """
+        if self.user_directory:
+            volunteers = self.user_directory.search_volunteers(query)
+        else:
+            # Без справочника (отладочные команды) — один запрос и та же сортировка
+            volunteers = sorted(await User.get_by_role(self.pool, 'volunteer'), key=volunteer_sort_key)
+        return volunteer_page(volunteers, after, per_page)
 
     async def create_assignment(self, task_id: int, volunteer_ids: List[int], admin_id: int) -> List[Assignment]:
         """Create assignments for multiple volunteers"""
-        assignments = []
         task = await Task.get_by_id(self.pool, task_id)
         if not task:
             raise ValueError("Task not found")
+        return await Assignment.create_many(self.pool, task, volunteer_ids, admin_id)
 
-        for vol_id in volunteer_ids:
-            assignment = await Assignment.create(
-                pool=self.pool,
-                task_id=task_id,
-                tg_id=vol_id,
-                assigned_by=admin_id,
-                start_day=task.start_day,
-                start_time=task.start_time,
-                end_day=task.end_day,
-                end_time=task.end_time,
-                status='assigned'
-            )
-            assignments.append(assignment)
-
-        return assignments
+    async def reassign(self, task: Task, volunteer_ids: List[int], admin_id: int) -> AssignmentDelta:
+        """Set the task's volunteers to volunteer_ids, touching only the difference"""
+        delta = await Assignment.reassign(self.pool, task, volunteer_ids, admin_id)
+        logger.info(
+            f"Task {task.task_id} reassigned by {admin_id}: "
+            f"+{len(delta.added)} -{len(delta.removed)} ={len(delta.kept)}"
+        )
+        return delta
 
     async def notify_volunteers(self, task_id: int):
         """Send notifications to volunteers about upcoming task"""
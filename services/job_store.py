@@ -0,0 +1,285 @@
+import asyncio
+import json
+import logging
+import pickle
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import asyncpg
+from apscheduler.job import Job
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.schedulers.base import BaseScheduler
+from apscheduler.util import datetime_to_utc_timestamp
+
+logger = logging.getLogger(__name__)
+
+JOBS_TABLE = "apscheduler_jobs"  # Та же таблица и формат, что у SQLAlchemyJobStore
+FLUSH_INTERVAL = 0.5             # Как часто изменения пишутся в базу, секунды
+NOTIFY_CHANNEL = "apscheduler_jobs"
+MAX_NOTIFY_PAYLOAD = 7900        # pg_notify принимает до 8000 байт; больше — полная сверка
+RECONNECT_INTERVAL = 5           # Пауза перед переподключением LISTEN, секунды
+
+
+class AsyncpgJobStore(MemoryJobStore):
+    """
+    Job store APScheduler, который работает из памяти и сохраняет изменения
+    в PostgreSQL через общий asyncpg pool.
+
+    Интерфейс job store в APScheduler 3 синхронный, поэтому add/update/remove
+    меняют только память, а запись в базу копится и раз в FLUSH_INTERVAL
+    уходит одной транзакцией (executemany для upsert, DELETE ... = ANY для
+    удаления). Так add_job на каждого волонтера не блокирует event loop.
+    При падении процесса теряются изменения последних FLUSH_INTERVAL секунд.
+
+    С connect store работает в нескольких процессах над одной таблицей:
+    каждая запись сопровождается pg_notify с id измененных задач, остальные
+    процессы слушают канал на отдельном соединении и перечитывают эти задачи
+    из базы. Так задачи, добавленные на любом воркере, видит лидер, у
+    которого планировщик запущен (см. services.leader), а у остальных
+    воркеров (планировщик на паузе) память совпадает с базой.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, pickle_protocol: int = pickle.HIGHEST_PROTOCOL,
+                 connect: Optional[Callable[[], Awaitable[asyncpg.Connection]]] = None):
+        super().__init__()
+        self.pool = pool
+        self.pickle_protocol = pickle_protocol
+        self.connect = connect
+        self.origin = uuid.uuid4().hex  # Свои уведомления процесс пропускает
+        # job_id -> (next_run_time, job_state) для upsert или None для удаления
+        self._pending: Dict[str, Optional[Tuple[Optional[float], bytes]]] = {}
+        self._pending_clear = False
+        self._loaded: List[Tuple[str, bytes]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._listen_task: Optional[asyncio.Task] = None
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        self._sync_tasks: Set[asyncio.Task] = set()
+
+    # ---- Жизненный цикл
+
+    async def load(self) -> None:
+        """Читает сохраненные задачи; вызывать до scheduler.start()"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(f'SELECT id, job_state FROM {JOBS_TABLE} ORDER BY next_run_time')
+        self._loaded = [(row['id'], row['job_state']) for row in rows]
+
+    def start(self, scheduler: BaseScheduler, alias: str) -> None:
+        super().start(scheduler, alias)
+        failed = []
+        for job_id, job_state in self._loaded:
+            try:
+                MemoryJobStore.add_job(self, self._reconstitute_job(job_state))
+            except BaseException:
+                logger.exception(f'Unable to restore job "{job_id}" -- removing it')
+                failed.append(job_id)
+        for job_id in failed:
+            self._pending[job_id] = None
+        logger.info(f"Restored {len(self._loaded) - len(failed)} scheduled jobs")
+        self._loaded = []
+
+        if not self._flush_task:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if self.connect and not self._listen_task:
+            self._listen_task = asyncio.create_task(self._listen_loop())
+
+    def shutdown(self) -> None:
+        # В отличие от MemoryJobStore задачи не удаляются: они сохранены в базе
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._listen_task:
+            self._listen_task.cancel()
+            self._listen_task = None
+        if self._listen_conn and not self._listen_conn.is_closed():
+            self._listen_conn.terminate()
+        self._listen_conn = None
+
+    async def close(self) -> None:
+        """Останавливает фоновую запись и сбрасывает накопленные изменения"""
+        self.shutdown()
+        await self.flush()
+
+    # ---- Изменения в памяти + очередь на запись
+
+    def add_job(self, job: Job) -> None:
+        super().add_job(job)
+        self._queue_upsert(job)
+
+    def update_job(self, job: Job) -> None:
+        super().update_job(job)
+        self._queue_upsert(job)
+
+    def remove_job(self, job_id: str) -> None:
+        super().remove_job(job_id)
+        self._pending[job_id] = None
+
+    def remove_all_jobs(self) -> None:
+        super().remove_all_jobs()
+        self._pending.clear()
+        self._pending_clear = True
+
+    def _queue_upsert(self, job: Job) -> None:
+        self._pending[job.id] = (
+            datetime_to_utc_timestamp(job.next_run_time),
+            pickle.dumps(job.__getstate__(), self.pickle_protocol)
+        )
+
+    def _reconstitute_job(self, job_state: bytes) -> Job:
+        state = pickle.loads(job_state)
+        state["jobstore"] = self
+        job = Job.__new__(Job)
+        job.__setstate__(state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    # ---- Запись в базу
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not (self._pending or self._pending_clear):
+                return
+            pending, self._pending = self._pending, {}
+            clear, self._pending_clear = self._pending_clear, False
+
+            upserts = [(job_id, op[0], op[1]) for job_id, op in pending.items() if op is not None]
+            deletes = [job_id for job_id, op in pending.items() if op is None]
+            try:
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        if clear:
+                            await conn.execute(f'DELETE FROM {JOBS_TABLE}')
+                        if deletes:
+                            await conn.execute(f'DELETE FROM {JOBS_TABLE} WHERE id = ANY($1::text[])', deletes)
+                        if upserts:
+                            await conn.executemany(
+                                f'''
+                                INSERT INTO {JOBS_TABLE} (id, next_run_time, job_state)
+                                VALUES ($1, $2, $3)
+                                ON CONFLICT (id) DO UPDATE
+                                SET next_run_time = EXCLUDED.next_run_time, job_state = EXCLUDED.job_state
+                                ''',
+                                upserts
+                            )
+                        if self.connect:
+                            # Доставляется остальным процессам после COMMIT
+                            await conn.execute(
+                                'SELECT pg_notify($1, $2)', NOTIFY_CHANNEL,
+                                self._notify_payload([job_id for job_id, *_ in upserts] + deletes, clear)
+                            )
+            except Exception:
+                self._requeue(pending, clear)
+                raise
+
+    def _requeue(self, pending: dict, clear: bool) -> None:
+        """Возвращает неудачный пакет в очередь, не перекрывая более новые изменения"""
+        if self._pending_clear:
+            return
+        self._pending = {**pending, **self._pending}
+        self._pending_clear = clear
+
+    def _notify_payload(self, job_ids: List[str], clear: bool) -> str:
+        payload = json.dumps({'origin': self.origin, 'ids': None if clear else job_ids})
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+            payload = json.dumps({'origin': self.origin, 'ids': None})
+        return payload
+
+    # ---- Изменения других процессов
+
+    async def sync_from_db(self, job_ids: Optional[List[str]] = None) -> None:
+        """
+        Перечитывает задачи job_ids (None — все) из базы в память. Задачи с
+        несохраненными локальными изменениями не трогаются: они новее и
+        скоро уйдут в базу сами. Запись и сверка не идут одновременно, чтобы
+        сверка не прочитала состояние до COMMIT своей же записи.
+        """
+        async with self._flush_lock:
+            async with self.pool.acquire() as conn:
+                if job_ids is None:
+                    rows = await conn.fetch(f'SELECT id, job_state FROM {JOBS_TABLE}')
+                else:
+                    rows = await conn.fetch(
+                        f'SELECT id, job_state FROM {JOBS_TABLE} WHERE id = ANY($1::text[])', job_ids
+                    )
+            if self._pending_clear:
+                return
+
+            stored = {row['id']: row['job_state'] for row in rows}
+            checked = set(stored).union(self._jobs_index if job_ids is None else job_ids)
+            for job_id in checked:
+                if job_id in self._pending:
+                    continue
+                job_state = stored.get(job_id)
+                if job_state is None:
+                    if job_id in self._jobs_index:
+                        MemoryJobStore.remove_job(self, job_id)
+                    continue
+                try:
+                    job = self._reconstitute_job(job_state)
+                except BaseException:
+                    logger.exception(f'Unable to restore job "{job_id}" from another process')
+                    continue
+                if job_id in self._jobs_index:
+                    MemoryJobStore.update_job(self, job)
+                else:
+                    MemoryJobStore.add_job(self, job)
+
+        if self._scheduler and self._scheduler.running:
+            self._scheduler.wakeup()
+
+    def _on_notify(self, conn, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get('origin') == self.origin:
+            return
+        task = asyncio.create_task(self.sync_from_db(message.get('ids')))
+        self._sync_tasks.add(task)
+        task.add_done_callback(self._sync_done)
+
+    def _sync_done(self, task: asyncio.Task) -> None:
+        self._sync_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Failed to load jobs changed by another process: {task.exception()}")
+
+    async def _listen_loop(self) -> None:
+        while True:
+            lost = asyncio.Event()
+            try:
+                self._listen_conn = await self.connect()
+                self._listen_conn.add_termination_listener(lambda conn: lost.set())
+                await self._listen_conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                # Изменения, сделанные до подписки или пока соединения не было
+                await self.sync_from_db()
+                await lost.wait()
+                logger.error("Job store LISTEN connection lost, reconnecting")
+            except Exception as e:
+                logger.error(f"Job store LISTEN failed: {e}")
+            if self._listen_conn and not self._listen_conn.is_closed():
+                self._listen_conn.terminate()
+            self._listen_conn = None
+            await asyncio.sleep(RECONNECT_INTERVAL)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to persist scheduled jobs: {e}")
+
+
+def remove_jobs_by_prefix(scheduler: BaseScheduler, prefix: str, jobstore: str = 'default') -> int:
+    """
+    Удаляет задачи по префиксу id (например spot_task_5_) через публичный API
+    планировщика — под его блокировкой и с событиями удаления. В
+    AsyncpgJobStore удаления копятся и уходят в базу одним DELETE ... = ANY.
+    """
+    removed = 0
+    for job in scheduler.get_jobs(jobstore=jobstore):
+        if job.id.startswith(prefix):
+            scheduler.remove_job(job.id, jobstore)
+            removed += 1
+    return removed
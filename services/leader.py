@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_KEY = 8_275_302_115  # Ключ pg_try_advisory_lock лидера (у миграций свой)
+RETRY_INTERVAL = 15              # Как часто не-лидер пытается забрать блокировку, секунды
+
+Connect = Callable[[], Awaitable[asyncpg.Connection]]
+Callback = Callable[[], Awaitable[None]]
+
+
+class LeaderElection:
+    """
+    Выбор одного процесса среди воркеров за балансировщиком: только у лидера
+    работают планировщик, SpotExpirySweeper и AutoSyncWorker, иначе каждое
+    напоминание и каждая синхронизация выполнялись бы по разу на воркер.
+
+    Лидер — тот, кто взял сессионный pg_try_advisory_lock на отдельном
+    соединении (не из пула) и держит его, пока жив процесс. Если процесс
+    падает или соединение рвется, PostgreSQL снимает блокировку, и ее
+    забирает другой воркер при следующей попытке (раз в RETRY_INTERVAL).
+    Потерявший соединение лидер сначала останавливает свою работу
+    (on_demoted), потом снова становится в очередь.
+    """
+
+    def __init__(self, connect: Connect, on_elected: Callback, on_demoted: Callback,
+                 key: int = LEADER_LOCK_KEY, retry_interval: float = RETRY_INTERVAL):
+        self.connect = connect
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.key = key
+        self.retry_interval = retry_interval
+        self.is_leader = False
+        self._conn: Optional[asyncpg.Connection] = None
+        self._lost = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Первая попытка сразу (лидер запускает свою работу до приема апдейтов), дальше в фоне"""
+        await self._try_elect()
+        if not self.is_leader:
+            logger.info("Another process is the leader: scheduler and background workers are paused here")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self.is_leader:
+            self.is_leader = False
+            await self.on_demoted()
+        if self._conn and not self._conn.is_closed():
+            # Закрытие соединения снимает блокировку — следующий воркер не ждет таймаута
+            await self._conn.close()
+        self._conn = None
+
+    async def _try_elect(self) -> None:
+        try:
+            if self._conn is None or self._conn.is_closed():
+                self._lost.clear()
+                self._conn = await self.connect()
+                self._conn.add_termination_listener(lambda conn: self._lost.set())
+            acquired = await self._conn.fetchval('SELECT pg_try_advisory_lock($1)', self.key)
+        except Exception as e:
+            logger.error(f"Leader election failed: {e}")
+            return
+        if acquired:
+            self.is_leader = True
+            logger.info("This process is the leader: scheduler and background workers are running here")
+            try:
+                await self.on_elected()
+            except Exception as e:
+                logger.error(f"Failed to start leader work: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            if self.is_leader:
+                await self._lost.wait()
+                logger.critical("Leader lock connection lost, stepping down")
+                self.is_leader = False
+                self._conn = None
+                try:
+                    await self.on_demoted()
+                except Exception as e:
+                    logger.error(f"Failed to stop leader work: {e}")
+            await asyncio.sleep(self.retry_interval)
+            await self._try_elect()
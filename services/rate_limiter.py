@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import time
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Лимиты Bot API: ~30 сообщений в секунду всего и 1 сообщение в секунду в один чат
+GLOBAL_RATE = 30
+PER_CHAT_RATE = 1
+
+
+class TokenBucket:
+    """Простой token bucket: rate токенов в секунду, не больше capacity в запасе"""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class TelegramRateLimiter:
+    """
+    Ограничитель запросов к Telegram: общий bucket на бота и отдельный на каждый чат.
+    После RetryAfter все отправки приостанавливаются на указанное время.
+    """
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, per_chat_rate: float = PER_CHAT_RATE):
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_chat_rate = per_chat_rate
+        # Бакеты чатов живут недолго, чтобы словарь не рос бесконечно
+        self.chat_buckets: TTLCache = TTLCache(maxsize=10000, ttl=60)
+        self._paused_until = 0.0
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.per_chat_rate, capacity=1)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def wait(self, chat_id: int) -> None:
+        """Дожидается права отправить один запрос в чат chat_id"""
+        await self._chat_bucket(chat_id).acquire()
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self.global_bucket.acquire()
+
+    def pause(self, seconds: float) -> None:
+        """Приостанавливает все отправки (вызывается при TelegramRetryAfter)"""
+        logger.warning(f"Telegram flood control: pausing sends for {seconds}s")
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
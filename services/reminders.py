@@ -0,0 +1,83 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.jobstores.base import JobLookupError
+
+from database.pg_model import Task
+from utils.event_time import EventTimeManager
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_MINUTES = 5  # За сколько минут до начала напоминать
+
+
+def reminder_job_id(task_id: int) -> str:
+    """
+    Один job на задание: у задания одно время напоминания, поэтому
+    пара (задание, время срабатывания) однозначно задается task_id,
+    а перенос времени делается через replace_existing.
+    """
+    return f"notification_task_{task_id}"
+
+
+def legacy_reminder_job_id(task_id: int, assign_id: int) -> str:
+    """ID старых job'ов, которые создавались на каждое назначение"""
+    return f"notification_task_{task_id}_assignment_{assign_id}"
+
+
+def db_config_from_pool(pool) -> dict:
+    """Параметры подключения для холодного старта задачи (см. services.runtime)"""
+    return {
+        'user': pool._connect_kwargs['user'],
+        'password': pool._connect_kwargs['password'],
+        'database': pool._connect_kwargs['database'],
+        'host': pool._connect_kwargs['host'],
+        'port': pool._connect_kwargs['port']
+    }
+
+
+def get_reminder_time(task: Task, event_manager: EventTimeManager) -> datetime:
+    start_time, _ = task.get_absolute_times(event_manager)
+    return start_time - timedelta(minutes=NOTIFICATION_MINUTES)
+
+
+def schedule_task_reminder(
+    scheduler: AsyncIOScheduler,
+    task: Task,
+    event_manager: EventTimeManager,
+    bot_token: str,
+    pool
+) -> datetime:
+    """
+    Создает (или переносит) единственное напоминание по заданию.
+    Получатели определяются в момент срабатывания по активным назначениям,
+    поэтому добавление и отмена назначений не требуют трогать job.
+    """
+    notification_time = get_reminder_time(task, event_manager)
+    scheduler.add_job(
+        'services.notifications:notify_task_volunteers',
+        'date',
+        run_date=notification_time,
+        args=[task.task_id, bot_token, db_config_from_pool(pool), event_manager.debug_mode],
+        id=reminder_job_id(task.task_id),
+        replace_existing=True
+    )
+    return notification_time
+
+
+def cancel_task_reminder(scheduler: AsyncIOScheduler, task_id: int) -> None:
+    try:
+        scheduler.remove_job(reminder_job_id(task_id))
+    except JobLookupError:
+        pass
+
+
+def cancel_legacy_reminders(scheduler: AsyncIOScheduler, task_id: int, assign_ids: Iterable[int]) -> None:
+    """Удаляет job'ы старого формата (по одному на назначение), если они остались"""
+    for assign_id in assign_ids:
+        try:
+            scheduler.remove_job(legacy_reminder_job_id(task_id, assign_id))
+        except JobLookupError:
+            pass
@@ -0,0 +1,63 @@
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Tuple
+
+import asyncpg
+from aiogram import Bot
+
+from database.pool import create_pool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobRuntime:
+    bot: Bot
+    pool: asyncpg.Pool
+
+
+# Запущенные в процессе бот и пул, к которым обращаются задачи APScheduler
+_runtimes: dict[str, JobRuntime] = {}
+
+
+def register_runtime(bot: Bot, pool: asyncpg.Pool, name: str = "default") -> None:
+    """Регистрирует бота и пул процесса для переиспользования в задачах планировщика"""
+    _runtimes[name] = JobRuntime(bot=bot, pool=pool)
+    logger.info(f"Registered job runtime '{name}'")
+
+
+def unregister_runtime(name: str = "default") -> None:
+    _runtimes.pop(name, None)
+
+
+def get_runtime(name: str = "default") -> Optional[JobRuntime]:
+    return _runtimes.get(name)
+
+
+@asynccontextmanager
+async def job_runtime(
+    bot_token: Optional[str] = None,
+    db_config: Optional[dict] = None,
+    name: str = "default"
+) -> AsyncIterator[Tuple[Bot, Optional[asyncpg.Pool]]]:
+    """
+    Отдает (bot, pool) для выполнения задачи планировщика.
+    Если рантайм процесса зарегистрирован, используются его объекты.
+    Иначе (холодный старт, задача сработала до инициализации бота)
+    создаются временные бот и пул, которые закрываются после задачи.
+    """
+    runtime = _runtimes.get(name)
+    if runtime:
+        yield runtime.bot, runtime.pool
+        return
+
+    logger.warning(f"Job runtime '{name}' is not registered, creating temporary bot and pool")
+    bot = Bot(token=bot_token)
+    pool = await create_pool(min_size=1, max_size=2, **db_config) if db_config else None
+    try:
+        yield bot, pool
+    finally:
+        await bot.session.close()
+        if pool:
+            await pool.close()
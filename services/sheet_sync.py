@@ -1,11 +1,11 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from googleapiclient.discovery import build
+import hashlib
 import logging
-from typing import Dict, List, Tuple, Any
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Any
 import asyncpg
-from database.pg_model import Task, User, PendingUser, Assignment
-from utils.event_time import EventTime
+from database.pg_model import Task, User, PendingUser, Assignment, SheetSyncState, notify_user_change
+from utils.event_time import EventTimeManager
+from services.sheets_executor import sheets_get, sheets_update, sheets_batch_update, sheets_clear, worksheet_records
 
 # Google Sheets API constants
 SPREADSHEET_ID = '1K4IM47awiowoVE_DuY6AvBk0wBLRhNUmyIJBTIHXzcg'  
@@ -17,15 +17,21 @@ logger = logging.getLogger(__name__)
 ASSIGNMENT_START_COL = 'H'  # First column with assignments
 ASSIGNMENT_END_COL = 'Z'    # Last column with assignments
 ASSIGNMENT_RANGE = f"{SHEET_NAME}!{ASSIGNMENT_START_COL}2:{ASSIGNMENT_END_COL}"
+ASSIGNMENT_SLOTS = 19      # Columns H-Z
 
 ADMIN_TG_ID = 257026813  # Admin who performs sheet synchronization
 
-def get_sheets_service(cred: dict):
-    """Helper function to create Google Sheets service"""
-    return build('sheets', 'v4', credentials=ServiceAccountCredentials.from_json_keyfile_dict(
-        cred, 
-        ['https://www.googleapis.com/auth/spreadsheets']
-    ))
+TASK_COLUMNS = 7       # A-G, G = db_id
+VOLUNTEER_COLUMNS = 3  # A-C
+
+# Сущности в sheet_sync_state/sheet_sync_row. Для каждой строки таблицы
+# хранится номер строки и хеш ее содержимого на момент последней синхронизации:
+# загрузка берет только строки с другим хешем, выгрузка — только записи,
+# измененные после сохраненной отметки (xid, см. SheetSyncState.read_changed),
+# и пишет их по известным номерам строк
+TASKS = "tasks"
+VOLUNTEERS = "volunteers"
+ASSIGNMENTS = "assignments"
 
 def task_dict_from_db(row) -> dict:
     return {
@@ -47,15 +53,10 @@ def task_dict_from_sheet(row) -> dict:
         "end_time": row.get("end_time"),
     }
 
-async def get_sheet_and_db(pool, cred: Dict[str, Any]) -> Tuple[gspread.Worksheet, List[Dict], List[Dict]]:
+async def get_sheet_and_db(pool, cred: Dict[str, Any]) -> Tuple[List[Dict], List[Dict]]:
     """Get data from both Google Sheet and database"""
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    
     try:
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(cred, scope)
-        client = gspread.authorize(creds)
-        sheet = client.open("vol_bot_tasks").worksheet("List")
-        sheet_records = sheet.get_all_records()
+        sheet_records = await worksheet_records(cred, "vol_bot_tasks", "List")
         
         async with pool.acquire() as conn:
             db_rows = await conn.fetch("SELECT * FROM task")
@@ -63,149 +64,270 @@ async def get_sheet_and_db(pool, cred: Dict[str, Any]) -> Tuple[gspread.Workshee
         db_tasks = [task_dict_from_db(row) for row in db_rows]
         sheet_tasks = [task_dict_from_sheet(row) for row in sheet_records]
         
-        return sheet, sheet_tasks, db_tasks
+        return sheet_tasks, db_tasks
     except Exception as e:
         logger.error(f"Error in get_sheet_and_db: {e}")
         raise
 
-async def sync_sheet_to_db(pool: asyncpg.Pool, cred: dict) -> str:
+MAX_REPORTED_ERRORS = 20
+
+def _normalize_time(value: str) -> str:
+    return datetime.strptime(value.strip(), "%H:%M").strftime("%H:%M")
+
+def parse_task_rows(rows: List[List[str]], event_manager: Optional[EventTimeManager] = None) -> Tuple[List[tuple], List[str]]:
+    """
+    Разбирает и проверяет строки листа заданий (A:G) целиком, до записи в БД.
+    Возвращает записи для Task.bulk_upsert_from_sheet и список ошибок по строкам.
+    """
+    records = []
+    errors = []
+    seen_titles = {}
+    seen_ids = {}
+
+    for row_num, row in enumerate(rows, start=2):
+        row = row + [''] * (7 - len(row))
+        title, description, start_day, start_time, end_day, end_time, db_id = (cell.strip() for cell in row[:7])
+
+        if not title:
+            continue
+
+        try:
+            task_id = int(db_id) if db_id else None
+            start_day, end_day = int(start_day), int(end_day)
+            start_time, end_time = _normalize_time(start_time), _normalize_time(end_time)
+
+            if event_manager:
+                # Целочисленные минуты мероприятия, без datetime на каждую строку
+                if event_manager.minute_key(end_day, end_time) <= event_manager.minute_key(start_day, start_time):
+                    raise ValueError("время окончания должно быть позже начала")
+
+            if title in seen_titles:
+                raise ValueError(f"название повторяется (строка {seen_titles[title]})")
+            if task_id is not None and task_id in seen_ids:
+                raise ValueError(f"db_id {task_id} повторяется (строка {seen_ids[task_id]})")
+        except ValueError as e:
+            errors.append(f"строка {row_num}: {e}")
+            continue
+
+        seen_titles[title] = row_num
+        if task_id is not None:
+            seen_ids[task_id] = row_num
+        records.append((row_num, task_id, title, description, start_day, start_time, end_day, end_time))
+
+    return records, errors
+
+
+class SyncResult(str):
+    """Текст результата для админа; changed — сколько строк изменено (статус автосинхронизации)"""
+
+    def __new__(cls, text: str, changed: int = 0):
+        result = super().__new__(cls, text)
+        result.changed = changed
+        return result
+
+def row_hash(values: List[Any]) -> str:
+    """Хеш содержимого строки таблицы, одинаковый для выгрузки и загрузки"""
+    content = "\x1f".join(str(value).strip() for value in values)
+    return hashlib.sha1(content.encode()).hexdigest()[:16]
+
+def task_sheet_values(task_id: int, title: str, description: Optional[str], start_day: int,
+                      start_time: str, end_day: int, end_time: str) -> List[str]:
+    return [title.strip(), (description or '').strip(), str(start_day), start_time,
+            str(end_day), end_time, str(task_id)]
+
+def _row_range(sheet: str, row_num: int, first_col: str, last_col: str) -> str:
+    return f'{sheet}!{first_col}{row_num}:{last_col}{row_num}'
+
+async def sync_sheet_to_db(pool: asyncpg.Pool, cred: dict, event_manager: Optional[EventTimeManager] = None) -> str:
+    """
+    Импорт заданий из таблицы: все строки проверяются заранее, измененные
+    с прошлой синхронизации применяются одной транзакцией. При любой ошибке
+    БД не изменяется.
+    """
     try:
-        service = get_sheets_service(cred)
-        
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f'{SHEET_NAME}!A2:G'  # This correctly uses SHEET_NAME="List"
-        ).execute()
-        
-        rows = result.get('values', [])
+        rows = await sheets_get(cred, SPREADSHEET_ID, f'{SHEET_NAME}!A2:G')
         if not rows:
             return "❌ Нет данных в таблице"
 
-        tasks_created = 0
-        tasks_updated = 0
-        
-        for row in rows:
-            row.extend([''] * (7 - len(row)))
-            title, description, start_day, start_time, end_day, end_time, db_id = row
-            
-            if not title:
-                continue
-                
-            try:
-                existing_task = None
-                if db_id:
-                    existing_task = await Task.get_by_id(pool, int(db_id))
-                
-                if existing_task:
-                    # Используем специальный метод для обновления из таблицы
-                    await Task.update_from_sheet(
-                        pool,
-                        existing_task.task_id,
-                        title=title,
-                        description=description,
-                        start_day=int(start_day),
-                        start_time=start_time,
-                        end_day=int(end_day),
-                        end_time=end_time
-                    )
-                    tasks_updated += 1
-                else:
-                    # Создаем новую задачу
-                    task = await Task.create(
-                        pool,
-                        title=title,
-                        description=description,
-                        start_event_time=EventTime(int(start_day), start_time),
-                        end_event_time=EventTime(int(end_day), end_time)
-                    )
-                    tasks_created += 1
-                    
-                    # Update db_id in sheet
-                    range_name = f'{SHEET_NAME}!G{rows.index(row) + 2}'
-                    service.spreadsheets().values().update(
-                        spreadsheetId=SPREADSHEET_ID,
-                        range=range_name,
-                        valueInputOption='RAW',
-                        body={'values': [[str(task.task_id)]]}
-                    ).execute()
-                    
-            except Exception as e:
-                logger.error(f"Error processing row {row}: {e}")
+        records, errors = parse_task_rows(rows, event_manager)
+        if errors:
+            report = "\n".join(errors[:MAX_REPORTED_ERRORS])
+            if len(errors) > MAX_REPORTED_ERRORS:
+                report += f"\n... и еще {len(errors) - MAX_REPORTED_ERRORS}"
+            return f"❌ Импорт отменен, исправьте ошибки в таблице:\n{report}"
+
+        if not records:
+            return "❌ Нет данных в таблице"
+
+        _, known = await SheetSyncState.get(pool, TASKS)
+        changed = []
+        moved = []
+        for record in records:
+            row_num, task_id = record[0], record[1]
+            if task_id is None:
+                changed.append(record)
                 continue
+            synced = known.get(str(task_id))
+            sheet_hash = row_hash(task_sheet_values(task_id, *record[2:]))
+            if synced is None or synced[1] != sheet_hash:
+                changed.append(record)
+            elif synced[0] != row_num:
+                moved.append((str(task_id), row_num, sheet_hash))
 
-        return f"✅ Синхронизация завершена: {tasks_created} заданий создано, {tasks_updated} заданий обновлено"
+        if not changed and not moved:
+            return "✅ Синхронизация завершена: изменений в таблице нет"
+
+        new_ids, tasks_created, tasks_updated = (
+            await Task.bulk_upsert_from_sheet(pool, changed) if changed else ({}, 0, 0)
+        )
+
+        # Write ids of created tasks back to the sheet in one request.
+        # Если запись не удалась, при следующем импорте строки найдутся по названию
+        if new_ids:
+            await sheets_batch_update(cred, SPREADSHEET_ID, [
+                {'range': f'{SHEET_NAME}!G{row_num}', 'values': [[str(task_id)]]}
+                for row_num, task_id in new_ids.items()
+            ])
+
+        synced_rows = moved
+        for row_num, task_id, *values in changed:
+            task_id = new_ids.get(row_num, task_id)
+            synced_rows.append((str(task_id), row_num, row_hash(task_sheet_values(task_id, *values))))
+        await SheetSyncState.save(pool, TASKS, synced_rows)
+
+        return SyncResult(
+            f"✅ Синхронизация завершена: {tasks_created} заданий создано, {tasks_updated} заданий обновлено",
+            tasks_created + tasks_updated
+        )
 
     except Exception as e:
         logger.error(f"Sync error: {e}")
         return f"❌ Ошибка синхронизации: {str(e)}"
 
-async def sync_db_to_sheet(pool: asyncpg.Pool, cred: dict) -> str:
+async def _push_all_tasks(pool: asyncpg.Pool, cred: dict) -> str:
+    """Полная перезапись листа заданий (первая синхронизация или full=True)"""
+    tasks, revision = await Task.get_changed_since(pool, 0)
+    tasks.sort(key=lambda task: task.task_id)
+    values = [
+        task_sheet_values(task.task_id, task.title, task.description, task.start_day,
+                          task.start_time, task.end_day, task.end_time)
+        for task in tasks
+    ]
+
+    await sheets_clear(cred, SPREADSHEET_ID, f'{SHEET_NAME}!A2:G')
+    await sheets_update(cred, SPREADSHEET_ID, f'{SHEET_NAME}!A2', values)
+
+    await SheetSyncState.save(
+        pool, TASKS,
+        [(str(task.task_id), row_num, row_hash(row)) for row_num, (task, row) in enumerate(zip(tasks, values), start=2)],
+        revision=revision, replace=True
+    )
+    # Строки заданий переехали — назначения (H-Z) выгрузятся заново целиком
+    await SheetSyncState.save(pool, ASSIGNMENTS, [], replace=True)
+    return SyncResult(f"✅ Успешно синхронизировано {len(tasks)} заданий в таблицу", len(tasks))
+
+async def sync_db_to_sheet(pool: asyncpg.Pool, cred: dict, full: bool = False) -> str:
+    """
+    Выгрузка заданий: только измененные после прошлой выгрузки, одним
+    batchUpdate по известным номерам строк. Лист читается, только если
+    появились новые задания.
+    """
     try:
-        service = get_sheets_service(cred)
-        
-        tasks = await Task.get_all(pool)
-        values = []
-        for task in tasks:
-            values.append([
-                task.title,
-                task.description,
-                str(task.start_day),
-                task.start_time,
-                str(task.end_day),
-                task.end_time,
-                str(task.task_id)
-            ])
-            
-        # Update ranges to use correct sheet name
-        service.spreadsheets().values().clear(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f'{SHEET_NAME}!A2:G'  # Use SHEET_NAME constant
-        ).execute()
-        
-        service.spreadsheets().values().update(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f'{SHEET_NAME}!A2',  # Use SHEET_NAME constant
-            valueInputOption='RAW',
-            body={'values': values}
-        ).execute()
-        
-        return f"✅ Успешно синхронизировано {len(tasks)} заданий в таблицу"
+        revision, known = await SheetSyncState.get(pool, TASKS)
+        if full or not known:
+            return await _push_all_tasks(pool, cred)
+
+        changed, new_revision = await Task.get_changed_since(pool, revision)
+        existing_ids = await Task.get_ids(pool)
+        deleted = [key for key in known if int(key) not in existing_ids]
+
+        data = []
+        synced_rows = []
+        new_tasks = []
+        for task in changed:
+            values = task_sheet_values(task.task_id, task.title, task.description, task.start_day,
+                                       task.start_time, task.end_day, task.end_time)
+            values_hash = row_hash(values)
+            synced = known.get(str(task.task_id))
+            if synced is None:
+                new_tasks.append((task.task_id, values, values_hash))
+            elif synced[1] != values_hash:
+                data.append({'range': _row_range(SHEET_NAME, synced[0], 'A', 'G'), 'values': [values]})
+                synced_rows.append((str(task.task_id), synced[0], values_hash))
+
+        if new_tasks:
+            # Новые задания дописываются в конец листа (или в строку со своим db_id)
+            rows = await sheets_get(cred, SPREADSHEET_ID, f'{SHEET_NAME}!A2:G')
+            id_rows = {
+                row[6].strip(): row_num for row_num, row in enumerate(rows, start=2)
+                if len(row) > 6 and row[6].strip()
+            }
+            next_row = len(rows) + 2
+            for task_id, values, values_hash in new_tasks:
+                row_num = id_rows.get(str(task_id))
+                if row_num is None:
+                    row_num, next_row = next_row, next_row + 1
+                data.append({'range': _row_range(SHEET_NAME, row_num, 'A', 'G'), 'values': [values]})
+                synced_rows.append((str(task_id), row_num, values_hash))
+
+        # Строки удаленных заданий очищаются вместе с назначениями
+        for key in deleted:
+            data.append({
+                'range': _row_range(SHEET_NAME, known[key][0], 'A', ASSIGNMENT_END_COL),
+                'values': [[''] * (TASK_COLUMNS + ASSIGNMENT_SLOTS)]
+            })
+
+        if data:
+            await sheets_batch_update(cred, SPREADSHEET_ID, data)
+        if synced_rows or deleted or new_revision != revision:
+            await SheetSyncState.save(pool, TASKS, synced_rows, deleted, new_revision)
+        if deleted:
+            await SheetSyncState.save(pool, ASSIGNMENTS, [], deleted)
+
+        if not data:
+            return "✅ Синхронизация завершена: изменений нет"
+        return SyncResult(
+            f"✅ Выгружено в таблицу: {len(synced_rows)} заданий изменено, {len(deleted)} удалено",
+            len(synced_rows) + len(deleted)
+        )
     except Exception as e:
         logger.error(f"Sync error: {e}")
         return f"❌ Ошибка синхронизации: {str(e)}"
 
 async def sync_volunteers_sheet_to_db(pool: asyncpg.Pool, cred: dict) -> str:
-    """Синхронизация волонтеров из Google таблицы в базу данных"""
+    """Синхронизация волонтеров из Google таблицы в базу данных (только измененные строки)"""
     try:
-        service = get_sheets_service(cred)
-        
         # Get data from sheet
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=VOLUNTEER_RANGE
-        ).execute()
-        
-        rows = result.get('values', [])
+        rows = await sheets_get(cred, SPREADSHEET_ID, VOLUNTEER_RANGE)
         if not rows:
             return "❌ Нет данных о волонтерах в таблице"
 
+        _, known = await SheetSyncState.get(pool, VOLUNTEERS)
+
         volunteers_created = 0
         volunteers_pending = 0
         volunteers_updated = 0
-        
+        id_updates = []
+        synced_rows = []
+        replaced_keys = []
+
         for idx, row in enumerate(rows, start=2):  # start=2 because first row is header
             # Pad row with empty strings if needed
-            row.extend([''] * (3 - len(row)))
-            tg_id, tg_username, name = row
-            
+            row = row + [''] * (VOLUNTEER_COLUMNS - len(row))
+            tg_id, tg_username, name = (cell.strip() for cell in row[:VOLUNTEER_COLUMNS])
+
             # Skip empty rows
             if not tg_username:
                 continue
-                
+
+            tg_username = tg_username.lstrip('@')  # Remove @ if present
+            key = tg_id or f"@{tg_username}"
+            if known.get(key) == (idx, row_hash([tg_id, tg_username, name])):
+                continue  # Строка не менялась с прошлой синхронизации
+
             try:
-                tg_username = tg_username.lstrip('@')  # Remove @ if present
                 existing_user = None
-                
+
                 if tg_id:  # User with known TG ID
                     existing_user = await User.get_by_tg_id(pool, int(tg_id))
                 else:
@@ -213,20 +335,18 @@ async def sync_volunteers_sheet_to_db(pool: asyncpg.Pool, cred: dict) -> str:
                     existing_user = await User.get_by_username(pool, tg_username)
                     if existing_user:
                         # Update sheet with tg_id from database
-                        range_name = f'{VOLUNTEER_SHEET_NAME}!A{idx}'
-                        service.spreadsheets().values().update(
-                            spreadsheetId=SPREADSHEET_ID,
-                            range=range_name,
-                            valueInputOption='RAW',
-                            body={'values': [[str(existing_user.tg_id)]]}
-                        ).execute()
-                
+                        tg_id = str(existing_user.tg_id)
+                        id_updates.append({'range': f'{VOLUNTEER_SHEET_NAME}!A{idx}', 'values': [[tg_id]]})
+                        if key in known:
+                            replaced_keys.append(key)
+                        key = tg_id
+
                 if existing_user:
                     # Update existing user if needed
-                    if (existing_user.name != name or 
+                    if (existing_user.name != name or
                         existing_user.tg_username != tg_username):
-                        await User.update(pool, existing_user.tg_id, 
-                                       tg_username=tg_username, 
+                        await User.update(pool, existing_user.tg_id,
+                                       tg_username=tg_username,
                                        name=name)
                         volunteers_updated += 1
                 else:
@@ -238,180 +358,255 @@ async def sync_volunteers_sheet_to_db(pool: asyncpg.Pool, cred: dict) -> str:
                         # Add to pending users if no tg_id found
                         await PendingUser.create(pool, tg_username, name, 'volunteer')
                         volunteers_pending += 1
-                    
+
+                synced_rows.append((key, idx, row_hash([tg_id, tg_username, name])))
+
             except Exception as e:
                 logger.error(f"Error processing volunteer row {row}: {e}")
                 continue
 
-        return f"✅ Синхронизация завершена: {volunteers_created} создано, {volunteers_updated} обновлено, {volunteers_pending} в ожидании"
+        if id_updates:
+            await sheets_batch_update(cred, SPREADSHEET_ID, id_updates)
+        if synced_rows:
+            await SheetSyncState.save(pool, VOLUNTEERS, synced_rows, replaced_keys)
+
+        if volunteers_created or volunteers_updated or volunteers_pending:
+            # Справочник пользователей перечитывается целиком после массового изменения
+            notify_user_change("reload")
+
+        return SyncResult(
+            f"✅ Синхронизация завершена: {volunteers_created} создано, {volunteers_updated} обновлено, {volunteers_pending} в ожидании",
+            volunteers_created + volunteers_updated + volunteers_pending
+        )
 
     except Exception as e:
         logger.error(f"Volunteer sync error: {e}")
         return f"❌ Ошибка синхронизации: {str(e)}"
 
-async def sync_volunteers_db_to_sheet(pool: asyncpg.Pool, cred: dict) -> str:
-    """Синхронизация волонтеров из базы данных в Google таблицу"""
+def _volunteer_values(user: User) -> List[str]:
+    return [str(user.tg_id), user.tg_username, user.name]
+
+async def _push_all_volunteers(pool: asyncpg.Pool, cred: dict) -> str:
+    """Полная перезапись листа волонтеров (первая синхронизация или full=True)"""
+    users, revision = await User.get_changed_since(pool, 0)
+    volunteers = [user for user in users if user.role == 'volunteer']
+    values = [_volunteer_values(volunteer) for volunteer in volunteers]
+
+    # Clear existing content
+    await sheets_clear(cred, SPREADSHEET_ID, VOLUNTEER_RANGE)
+
+    # Update sheet with new data
+    await sheets_update(cred, SPREADSHEET_ID, f"{VOLUNTEER_SHEET_NAME}!A2", values)
+
+    await SheetSyncState.save(
+        pool, VOLUNTEERS,
+        [(row[0], row_num, row_hash(row)) for row_num, row in enumerate(values, start=2)],
+        revision=revision, replace=True
+    )
+    return SyncResult(f"✅ Успешно синхронизировано {len(values)} волонтеров в таблицу", len(values))
+
+async def sync_volunteers_db_to_sheet(pool: asyncpg.Pool, cred: dict, full: bool = False) -> str:
+    """Синхронизация волонтеров из базы данных в Google таблицу (только измененные)"""
     try:
-        service = get_sheets_service(cred)
-        
-        # Get all volunteer users from DB
-        volunteers = await User.get_by_role(pool, 'volunteer')
-        
-        # Prepare data for sheet
-        values = []
-        for volunteer in volunteers:
-            values.append([
-                str(volunteer.tg_id),
-                volunteer.tg_username,
-                volunteer.name
-            ])
-            
-        # Clear existing content
-        service.spreadsheets().values().clear(
-            spreadsheetId=SPREADSHEET_ID,
-            range=VOLUNTEER_RANGE
-        ).execute()
-        
-        # Update sheet with new data
-        service.spreadsheets().values().update(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"{VOLUNTEER_SHEET_NAME}!A2",
-            valueInputOption='RAW',
-            body={'values': values}
-        ).execute()
-        
-        return f"✅ Успешно синхронизировано {len(values)} волонтеров в таблицу"
-        
+        revision, known = await SheetSyncState.get(pool, VOLUNTEERS)
+        if full or not known:
+            return await _push_all_volunteers(pool, cred)
+
+        changed, new_revision = await User.get_changed_since(pool, revision)
+        existing_ids = await User.get_ids(pool)
+
+        data = []
+        synced_rows = []
+        new_volunteers = []
+        # Удаленные пользователи и те, кто больше не волонтер
+        removed = [key for key in known if not key.startswith('@') and int(key) not in existing_ids]
+        replaced = []
+
+        for user in changed:
+            key = str(user.tg_id)
+            synced = known.get(key)
+            if user.role != 'volunteer':
+                if synced:
+                    removed.append(key)
+                continue
+
+            values = _volunteer_values(user)
+            values_hash = row_hash(values)
+            if synced is None:
+                # Строка ожидающего пользователя (без tg_id), который уже зарегистрировался
+                synced = known.get(f"@{user.tg_username}")
+                if synced is None:
+                    new_volunteers.append((key, values, values_hash))
+                    continue
+                replaced.append(f"@{user.tg_username}")
+            if synced[1] != values_hash:
+                data.append({'range': _row_range(VOLUNTEER_SHEET_NAME, synced[0], 'A', 'C'), 'values': [values]})
+                synced_rows.append((key, synced[0], values_hash))
+
+        if new_volunteers:
+            rows = await sheets_get(cred, SPREADSHEET_ID, VOLUNTEER_RANGE)
+            sheet_rows = {}
+            for row_num, row in enumerate(rows, start=2):
+                row = row + [''] * (VOLUNTEER_COLUMNS - len(row))
+                for cell in (row[0].strip(), row[1].strip().lstrip('@')):
+                    if cell:
+                        sheet_rows.setdefault(cell, row_num)
+            next_row = len(rows) + 2
+            for key, values, values_hash in new_volunteers:
+                row_num = sheet_rows.get(key) or sheet_rows.get(values[1])
+                if row_num is None:
+                    row_num, next_row = next_row, next_row + 1
+                data.append({'range': _row_range(VOLUNTEER_SHEET_NAME, row_num, 'A', 'C'), 'values': [values]})
+                synced_rows.append((key, row_num, values_hash))
+
+        for key in removed:
+            data.append({
+                'range': _row_range(VOLUNTEER_SHEET_NAME, known[key][0], 'A', 'C'),
+                'values': [[''] * VOLUNTEER_COLUMNS]
+            })
+
+        if data:
+            await sheets_batch_update(cred, SPREADSHEET_ID, data)
+        if synced_rows or removed or replaced or new_revision != revision:
+            await SheetSyncState.save(pool, VOLUNTEERS, synced_rows, removed + replaced, new_revision)
+
+        if not data:
+            return "✅ Синхронизация завершена: изменений нет"
+        return SyncResult(
+            f"✅ Выгружено в таблицу: {len(synced_rows)} волонтеров изменено, {len(removed)} удалено",
+            len(synced_rows) + len(removed)
+        )
+
     except Exception as e:
         logger.error(f"Volunteer sync error: {e}")
         return f"❌ Ошибка синхронизации: {str(e)}"
 
 async def sync_assignments_sheet_to_db(pool: asyncpg.Pool, cred: dict) -> str:
-    """Синхронизация назначений из Google таблицы в базу данных"""
+    """
+    Синхронизация назначений из Google таблицы в базу данных.
+    Одно чтение таблицы; заменяются назначения только тех заданий, у которых
+    колонки H-Z изменились с прошлой синхронизации, одной транзакцией.
+    """
     try:
-        service = get_sheets_service(cred)
-        
         # Get all data from sheet including assignments
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f'{SHEET_NAME}!A2:Z'  # Get all columns
-        ).execute()
-        
-        rows = result.get('values', [])
+        rows = await sheets_get(cred, SPREADSHEET_ID, f'{SHEET_NAME}!A2:Z')  # Get all columns
         if not rows:
             return "❌ Нет данных в таблице"
 
-        assignments_created = 0
-        tasks_updated = 0
-        
+        _, known = await SheetSyncState.get(pool, ASSIGNMENTS)
+
+        # task_id -> usernames из колонок H-Z
+        sheet_assignees: Dict[int, List[str]] = {}
+        sheet_rows: Dict[int, Tuple[int, str]] = {}
         for row_idx, row in enumerate(rows, start=2):
-            # Skip empty rows
-            if not row:
+            if len(row) < 7 or not row[6]:  # Column G (db_id)
                 continue
-                
-            # Pad row with empty strings if needed
-            row.extend([''] * (26 - len(row)))  # 26 columns total (A-Z)
-            
-            # Get task info
-            task_id = row[6]  # Column G (db_id)
-            if not task_id:
-                continue
-                
             try:
-                task_id = int(task_id)
-                assignees = [username for username in row[7:26] if username]  # Columns H-Z
-                
-                if assignees:
-                    # Delete existing assignments for this task
-                    await Assignment.delete_by_task(pool, task_id)
-                    tasks_updated += 1
-                    
-                    # Create new assignments
-                    task = await Task.get_by_id(pool, task_id)
-                    if not task:
-                        continue
-                        
-                    for username in assignees:
-                        username = username.lstrip('@')
-                        volunteer = await User.get_by_username(pool, username)
-                        if volunteer:
-                            await Assignment.create(
-                                pool=pool,
-                                task_id=task_id,
-                                tg_id=volunteer.tg_id,
-                                assigned_by=ADMIN_TG_ID,  # Use admin constant instead of 0
-                                start_day=task.start_day,
-                                start_time=task.start_time,
-                                end_day=task.end_day,
-                                end_time=task.end_time
-                            )
-                            assignments_created += 1
-                    
-            except Exception as e:
-                logger.error(f"Error processing assignments for task {task_id}: {e}")
+                task_id = int(row[6])
+            except ValueError:
+                logger.error(f"Invalid db_id '{row[6]}' in row {row_idx}")
                 continue
+            assignees = [username.strip().lstrip('@') for username in row[7:26] if username.strip()]
+            assignees_hash = row_hash(assignees)
+            if known.get(str(task_id)) == (row_idx, assignees_hash):
+                continue
+            # Пустой список тоже изменение: назначения задания снимаются
+            sheet_assignees[task_id] = assignees
+            sheet_rows[task_id] = (row_idx, assignees_hash)
+
+        if not sheet_assignees:
+            return "✅ Синхронизация завершена: изменений в назначениях нет"
 
-        return f"✅ Синхронизация завершена: {assignments_created} назначений создано для {tasks_updated} заданий"
+        username_map = await User.get_username_map(pool)
+        tasks = await Task.get_by_ids(pool, list(sheet_assignees))
+
+        records = []
+        unknown_users = set()
+        for task_id, assignees in sheet_assignees.items():
+            task = tasks.get(task_id)
+            if not task:
+                logger.warning(f"Task {task_id} from sheet not found in database")
+                continue
+            seen = set()
+            for username in assignees:
+                tg_id = username_map.get(username)
+                if tg_id is None:
+                    unknown_users.add(username)
+                    continue
+                if tg_id in seen:
+                    continue
+                seen.add(tg_id)
+                records.append((
+                    task_id, tg_id, ADMIN_TG_ID,
+                    task.start_day, task.start_time,
+                    task.end_day, task.end_time
+                ))
+
+        assignments_created = await Assignment.replace_for_tasks(pool, list(tasks), records)
+        await SheetSyncState.save(pool, ASSIGNMENTS, [
+            (str(task_id), *sheet_rows[task_id]) for task_id in tasks
+        ])
+
+        result = f"✅ Синхронизация завершена: {assignments_created} назначений создано для {len(tasks)} заданий"
+        if unknown_users:
+            result += f"\n⚠️ Не найдены пользователи: {', '.join(sorted(unknown_users))}"
+        return SyncResult(result, len(tasks))
     except Exception as e:
         logger.error(f"Assignment sync error: {e}")
         return f"❌ Ошибка синхронизации: {str(e)}"
 
-async def sync_assignments_db_to_sheet(pool: asyncpg.Pool, cred: dict) -> str:
-    """Синхронизация назначений из базы данных в Google таблицу"""
+async def sync_assignments_db_to_sheet(pool: asyncpg.Pool, cred: dict, full: bool = False) -> str:
+    """
+    Синхронизация назначений из базы данных в Google таблицу одним batchUpdate.
+    Строки заданий берутся из состояния синхронизации заданий; пишутся только
+    задания, чей список волонтеров отличается от выгруженного.
+    """
     try:
-        service = get_sheets_service(cred)
-        
-        # Get all tasks from sheet to get their row numbers
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f'{SHEET_NAME}!A2:G'
-        ).execute()
-        
-        rows = result.get('values', [])
-        if not rows:
-            return "❌ Нет данных в таблице"
-            
-        # Create mapping of task_id to row_number
-        task_row_map = {}
-        for idx, row in enumerate(rows, start=2):
-            if len(row) > 6 and row[6]:  # If has db_id
-                task_row_map[int(row[6])] = idx
-        
-        tasks_updated = 0
-        
-        # Process each task that exists in the sheet
+        _, known = await SheetSyncState.get(pool, ASSIGNMENTS)
+        _, task_rows = await SheetSyncState.get(pool, TASKS)
+
+        if full or not task_rows:
+            # Get all tasks from sheet to get their row numbers
+            rows = await sheets_get(cred, SPREADSHEET_ID, f'{SHEET_NAME}!A2:G')
+            if not rows:
+                return "❌ Нет данных в таблице"
+
+            # Create mapping of task_id to row_number
+            task_row_map = {}
+            for idx, row in enumerate(rows, start=2):
+                if len(row) > 6 and row[6]:  # If has db_id
+                    try:
+                        task_row_map[int(row[6])] = idx
+                    except ValueError:
+                        logger.error(f"Invalid db_id '{row[6]}' in row {idx}")
+            known = {}
+        else:
+            task_row_map = {int(key): row_num for key, (row_num, _) in task_rows.items()}
+
+        usernames_by_task = await Assignment.get_active_usernames_by_task(pool)
+
+        data = []
+        synced_rows = []
         for task_id, row_num in task_row_map.items():
-            try:
-                # Get assignments for this task
-                assignments = await Assignment.get_by_task(pool, task_id)
-                
-                # Prepare usernames list
-                usernames = []
-                for assignment in assignments:
-                    if assignment.status != 'cancelled':
-                        volunteer = await User.get_by_tg_id(pool, assignment.tg_id)
-                        if volunteer:
-                            usernames.append(volunteer.tg_username)
-                
-                # Pad with empty strings to have 19 values
-                usernames.extend([''] * (19 - len(usernames)))
-                
-                # Update sheet
-                range_name = f'{SHEET_NAME}!H{row_num}:Z{row_num}'
-                service.spreadsheets().values().update(
-                    spreadsheetId=SPREADSHEET_ID,
-                    range=range_name,
-                    valueInputOption='RAW',
-                    body={'values': [usernames]}
-                ).execute()
-                
-                tasks_updated += 1
-                
-            except Exception as e:
-                logger.error(f"Error updating assignments for task {task_id}: {e}")
+            usernames = usernames_by_task.get(task_id, [])
+            if len(usernames) > ASSIGNMENT_SLOTS:
+                logger.warning(f"Task {task_id} has more than {ASSIGNMENT_SLOTS} assignees, extra ones are not exported")
+                usernames = usernames[:ASSIGNMENT_SLOTS]
+            usernames_hash = row_hash(usernames)
+            if known.get(str(task_id)) == (row_num, usernames_hash):
                 continue
+            # Pad with empty strings to clear the rest of the row
+            data.append({
+                'range': _row_range(SHEET_NAME, row_num, ASSIGNMENT_START_COL, ASSIGNMENT_END_COL),
+                'values': [usernames + [''] * (ASSIGNMENT_SLOTS - len(usernames))]
+            })
+            synced_rows.append((str(task_id), row_num, usernames_hash))
+
+        if data:
+            await sheets_batch_update(cred, SPREADSHEET_ID, data)
+            await SheetSyncState.save(pool, ASSIGNMENTS, synced_rows, replace=full)
 
-        return f"✅ Успешно синхронизированы назначения для {tasks_updated} заданий"
+        return SyncResult(f"✅ Успешно синхронизированы назначения для {len(data)} заданий", len(data))
     except Exception as e:
         logger.error(f"Assignment sync error: {e}")
-        return f"❌ Ошибка синхронизации: {str(e)}"
\ No newline at end of file
+        return f"❌ Ошибка синхронизации: {str(e)}"
@@ -0,0 +1,168 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import gspread
+import httplib2
+from googleapiclient.discovery import build
+from oauth2client.service_account import ServiceAccountCredentials
+
+logger = logging.getLogger(__name__)
+
+SHEETS_WORKERS = 2        # Параллельных запросов к Google API
+SHEETS_TIMEOUT = 60       # Таймаут одного вызова, секунды
+SHEETS_HTTP_TIMEOUT = 30  # Таймаут сокета внутри потока, чтобы он не висел после отмены
+
+SHEETS_SCOPE = ['https://www.googleapis.com/auth/spreadsheets']
+GSPREAD_SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+
+# Все синхронные вызовы googleapiclient/gspread выполняются только здесь,
+# чтобы не блокировать event loop aiogram
+_executor = ThreadPoolExecutor(max_workers=SHEETS_WORKERS, thread_name_prefix="sheets")
+
+# Credentials разбираются один раз; service/client не потокобезопасны
+# (общий httplib2.Http), поэтому кешируются на поток
+_credentials: Dict[tuple, ServiceAccountCredentials] = {}
+_credentials_lock = threading.Lock()
+_local = threading.local()
+
+
+class QuotaState:
+    """Ответы 429 от Google API: по счетчику автосинхронизация понимает, что пора отступить"""
+
+    def __init__(self):
+        self.errors = 0
+        self.last_error_at: Optional[datetime] = None
+
+
+quota = QuotaState()
+
+
+def is_quota_error(error: Exception) -> bool:
+    # googleapiclient HttpError -> resp.status, gspread APIError -> response.status_code
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status == 429
+
+
+def _cred_key(cred: dict, scope: List[str]) -> tuple:
+    return (cred.get('client_email'), cred.get('private_key_id'), tuple(scope))
+
+
+def _get_credentials(cred: dict, scope: List[str]) -> ServiceAccountCredentials:
+    key = _cred_key(cred, scope)
+    with _credentials_lock:
+        if key not in _credentials:
+            _credentials[key] = ServiceAccountCredentials.from_json_keyfile_dict(cred, scope)
+        return _credentials[key]
+
+
+def get_sheets_service(cred: dict):
+    """Sheets API service for the current worker thread, built once per thread"""
+    services = getattr(_local, 'services', None)
+    if services is None:
+        services = _local.services = {}
+    key = _cred_key(cred, SHEETS_SCOPE)
+    if key not in services:
+        http = _get_credentials(cred, SHEETS_SCOPE).authorize(httplib2.Http(timeout=SHEETS_HTTP_TIMEOUT))
+        services[key] = build('sheets', 'v4', http=http, cache_discovery=False)
+    return services[key]
+
+
+def get_gspread_client(cred: dict) -> gspread.Client:
+    """gspread client for the current worker thread, authorized once per thread"""
+    clients = getattr(_local, 'clients', None)
+    if clients is None:
+        clients = _local.clients = {}
+    key = _cred_key(cred, GSPREAD_SCOPE)
+    if key not in clients:
+        clients[key] = gspread.authorize(_get_credentials(cred, GSPREAD_SCOPE))
+    return clients[key]
+
+
+async def run_sheets(func: Callable[..., Any], *args, timeout: float = SHEETS_TIMEOUT, **kwargs) -> Any:
+    """
+    Выполняет синхронную функцию Google API в пуле потоков с таймаутом.
+    При отмене или таймауте корутина сразу освобождается; поток завершится
+    сам по таймауту сокета.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        logger.error(f"Google Sheets call {getattr(func, '__name__', func)} timed out after {timeout}s")
+        raise
+    except Exception as e:
+        if is_quota_error(e):
+            quota.errors += 1
+            quota.last_error_at = datetime.now()
+            logger.warning(f"Google Sheets quota exceeded in {getattr(func, '__name__', func)}")
+        raise
+
+
+# ---- Синхронные операции, выполняются в потоках пула
+
+def _values_get(cred: dict, spreadsheet_id: str, range_name: str) -> List[List[str]]:
+    result = get_sheets_service(cred).spreadsheets().values().get(
+        spreadsheetId=spreadsheet_id,
+        range=range_name
+    ).execute()
+    return result.get('values', [])
+
+
+def _values_update(cred: dict, spreadsheet_id: str, range_name: str, values: List[List[Any]]) -> dict:
+    return get_sheets_service(cred).spreadsheets().values().update(
+        spreadsheetId=spreadsheet_id,
+        range=range_name,
+        valueInputOption='RAW',
+        body={'values': values}
+    ).execute()
+
+
+def _values_batch_update(cred: dict, spreadsheet_id: str, data: List[Dict[str, Any]]) -> dict:
+    """data = [{'range': 'List!G5', 'values': [[...]]}, ...] — все диапазоны одним запросом"""
+    return get_sheets_service(cred).spreadsheets().values().batchUpdate(
+        spreadsheetId=spreadsheet_id,
+        body={'valueInputOption': 'RAW', 'data': data}
+    ).execute()
+
+
+def _values_clear(cred: dict, spreadsheet_id: str, range_name: str) -> dict:
+    return get_sheets_service(cred).spreadsheets().values().clear(
+        spreadsheetId=spreadsheet_id,
+        range=range_name
+    ).execute()
+
+
+def _worksheet_records(cred: dict, spreadsheet_name: str, worksheet_name: str) -> List[Dict[str, Any]]:
+    sheet = get_gspread_client(cred).open(spreadsheet_name).worksheet(worksheet_name)
+    return sheet.get_all_records()
+
+
+# ---- Асинхронные обертки
+
+async def sheets_get(cred: dict, spreadsheet_id: str, range_name: str) -> List[List[str]]:
+    return await run_sheets(_values_get, cred, spreadsheet_id, range_name)
+
+
+async def sheets_update(cred: dict, spreadsheet_id: str, range_name: str, values: List[List[Any]]) -> dict:
+    return await run_sheets(_values_update, cred, spreadsheet_id, range_name, values)
+
+
+async def sheets_batch_update(cred: dict, spreadsheet_id: str, data: List[Dict[str, Any]]) -> dict:
+    return await run_sheets(_values_batch_update, cred, spreadsheet_id, data)
+
+
+async def sheets_clear(cred: dict, spreadsheet_id: str, range_name: str) -> dict:
+    return await run_sheets(_values_clear, cred, spreadsheet_id, range_name)
+
+
+async def worksheet_records(cred: dict, spreadsheet_name: str, worksheet_name: str) -> List[Dict[str, Any]]:
+    return await run_sheets(_worksheet_records, cred, spreadsheet_name, worksheet_name)
+
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from database.pg_model import User, SpotTaskResponse
+from services.rate_limiter import TelegramRateLimiter
+
+logger = logging.getLogger(__name__)
+
+MAX_SEND_ATTEMPTS = 3
+PROGRESS_INTERVAL = 1.0  # Как часто обновлять счетчики у админа, секунды
+SAVE_BATCH = 20          # Доставки сохраняются пачками по ходу рассылки
+
+
+@dataclass
+class BroadcastResult:
+    total: int
+    sent: List[Tuple[User, int]] = field(default_factory=list)    # (волонтер, message_id)
+    failed: List[Tuple[User, str]] = field(default_factory=list)  # (волонтер, ошибка)
+
+
+@dataclass
+class DeletionResult:
+    total: int
+    deleted: int = 0
+    failed: int = 0
+
+    @property
+    def done(self) -> int:
+        return self.deleted + self.failed
+
+
+async def _gather_with_progress(
+    aws: List[Awaitable[Any]],
+    result: Any,
+    on_progress: Optional[Callable[[Any], Awaitable[None]]]
+) -> None:
+    """Ждет все корутины, раз в PROGRESS_INTERVAL отдавая промежуточный результат"""
+    running = asyncio.gather(*aws)
+    if on_progress:
+        while not running.done():
+            await asyncio.wait([running], timeout=PROGRESS_INTERVAL)
+            try:
+                await on_progress(result)
+            except Exception as e:
+                logger.debug(f"Can't report progress: {e}")
+    await running
+
+
+class SpotBroadcaster:
+    """Параллельная рассылка срочных заданий с учетом лимитов Telegram"""
+
+    def __init__(self, bot: Bot, pool, limiter: TelegramRateLimiter, concurrency: int = 30):
+        self.bot = bot
+        self.pool = pool
+        self.limiter = limiter
+        self.concurrency = concurrency
+
+    async def _send(self, chat_id: int, text: str, reply_markup: InlineKeyboardMarkup) -> int:
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            await self.limiter.wait(chat_id)
+            try:
+                msg = await self.bot.send_message(chat_id, text, reply_markup=reply_markup)
+                return msg.message_id
+            except TelegramRetryAfter as e:
+                self.limiter.pause(e.retry_after)
+                if attempt == MAX_SEND_ATTEMPTS:
+                    raise
+
+    async def edit(self, message: Message, text: str, **kwargs) -> None:
+        """edit_text под тем же лимитером, что и рассылка (прогресс у админа)"""
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            await self.limiter.wait(message.chat.id)
+            try:
+                await message.edit_text(text, **kwargs)
+                return
+            except TelegramRetryAfter as e:
+                self.limiter.pause(e.retry_after)
+                if attempt == MAX_SEND_ATTEMPTS:
+                    raise
+
+    async def broadcast(
+        self,
+        spot_task_id: int,
+        text: str,
+        recipients: List[User],
+        reply_markup: InlineKeyboardMarkup,
+        on_progress: Optional[Callable[[BroadcastResult], Awaitable[None]]] = None
+    ) -> BroadcastResult:
+        """
+        Рассылает сообщение всем получателям. Строки spot_task_response для
+        доставленных сообщений сохраняются по ходу рассылки пачками по
+        SAVE_BATCH: ответ волонтера до конца рассылки не теряется, а при
+        падении процесса message_id уже отправленных сообщений остаются в БД
+        и SpotExpirySweeper сможет их удалить.
+        """
+        result = BroadcastResult(total=len(recipients))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        unsaved: List[Tuple[int, int]] = []
+
+        async def save(deliveries: List[Tuple[int, int]]):
+            try:
+                await SpotTaskResponse.create_many(self.pool, spot_task_id, deliveries)
+            except Exception as e:
+                logger.error(f"Error saving {len(deliveries)} deliveries of spot task {spot_task_id}: {e}")
+
+        async def deliver(volunteer: User):
+            async with semaphore:
+                try:
+                    message_id = await self._send(volunteer.tg_id, text, reply_markup)
+                except Exception as e:
+                    logger.error(f"Error sending spot task {spot_task_id} to user {volunteer.tg_username} (id={volunteer.tg_id}): {e}")
+                    result.failed.append((volunteer, str(e)))
+                    return
+                result.sent.append((volunteer, message_id))
+                unsaved.append((volunteer.tg_id, message_id))
+                if len(unsaved) >= SAVE_BATCH:
+                    batch = unsaved[:]
+                    unsaved.clear()
+                    await save(batch)
+
+        await _gather_with_progress([deliver(v) for v in recipients], result, on_progress)
+
+        if unsaved:
+            await save(unsaved)
+
+        return result
+
+    async def _delete(self, chat_id: int, message_id: int) -> None:
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            await self.limiter.wait(chat_id)
+            try:
+                await self.bot.delete_message(chat_id, message_id)
+                return
+            except TelegramRetryAfter as e:
+                self.limiter.pause(e.retry_after)
+                if attempt == MAX_SEND_ATTEMPTS:
+                    raise
+
+    async def delete_messages(
+        self,
+        messages: List[Tuple[int, int]],
+        on_progress: Optional[Callable[[DeletionResult], Awaitable[None]]] = None
+    ) -> DeletionResult:
+        """
+        Параллельно удаляет сообщения [(chat_id, message_id)] под общим лимитером.
+        У каждого волонтера одно сообщение на задание, поэтому deleteMessages
+        (пакет в пределах одного чата) здесь ничего не дает.
+        """
+        result = DeletionResult(total=len(messages))
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def delete(chat_id: int, message_id: int):
+            async with semaphore:
+                try:
+                    await self._delete(chat_id, message_id)
+                    result.deleted += 1
+                except TelegramBadRequest as e:
+                    # Сообщение уже удалено или слишком старое
+                    logger.debug(f"Can't delete message {message_id} (chat_id={chat_id}): {e}")
+                    result.failed += 1
+                except Exception as e:
+                    logger.error(f"Can't delete message {message_id} (chat_id={chat_id}): {e}")
+                    result.failed += 1
+
+        await _gather_with_progress([delete(c, m) for c, m in messages], result, on_progress)
+        return result
@@ -1,17 +1,99 @@
-from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest
 import asyncio
 import logging
+from datetime import datetime
+from typing import Optional
+
+from database.pg_model import SpotTask
+from services.runtime import job_runtime
+from services.spot_broadcast import SpotBroadcaster
+from services.spot_responses import SpotResponseAggregator
 
 logger = logging.getLogger(__name__)
 
+SWEEP_INTERVAL = 60     # Максимальная пауза между проверками, секунды
+SWEEP_BATCH_TASKS = 50  # Сколько истекших заданий обрабатывать за проход
+
+
 async def delete_spot_message(bot_token: str, chat_id: int, message_id: int):
-    bot = Bot(token=bot_token)
-    try:
-        await bot.delete_message(chat_id, message_id)
-    except TelegramBadRequest as e:
-        logger.error(f"Can't delete message {message_id} (chat_id={chat_id}): {e}")
-    except Exception as e:
-        logger.error(f"Can't delete message {message_id} (chat_id={chat_id}): {e}")
-    finally:
-        await bot.session.close()
\ No newline at end of file
+    """Job старого формата (один на сообщение); новые задания чистит SpotExpirySweeper"""
+    async with job_runtime(bot_token) as (bot, _):
+        try:
+            await bot.delete_message(chat_id, message_id)
+        except TelegramBadRequest as e:
+            logger.error(f"Can't delete message {message_id} (chat_id={chat_id}): {e}")
+        except Exception as e:
+            logger.error(f"Can't delete message {message_id} (chat_id={chat_id}): {e}")
+
+
+class SpotExpirySweeper:
+    """
+    Удаляет сообщения истекших срочных заданий одним фоновым циклом вместо
+    job'а на каждое сообщение. Спит до ближайшего expires_at (но не дольше
+    SWEEP_INTERVAL), удаляет сообщения пачкой через общий бот и помечает
+    задания как очищенные (spot_task.cleaned_at). Сводки ответов по ним
+    больше не обновляются и убираются из памяти агрегатора.
+    """
+
+    def __init__(self, pool, broadcaster: SpotBroadcaster, responses: Optional[SpotResponseAggregator] = None):
+        self.pool = pool
+        self.broadcaster = broadcaster
+        self.responses = responses
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def wake(self) -> None:
+        """Пересчитать время следующей проверки (например, после создания задания)"""
+        self._wakeup.set()
+
+    async def sweep(self) -> int:
+        """Чистит все истекшие задания, возвращает количество заданий"""
+        cleaned = 0
+        while True:
+            expired = await SpotTask.get_expired_for_cleanup(self.pool, SWEEP_BATCH_TASKS)
+            if not expired:
+                return cleaned
+
+            messages = [message for _, task_messages in expired for message in task_messages]
+            result = await self.broadcaster.delete_messages(messages)
+            await SpotTask.mark_cleaned(self.pool, [spot_task_id for spot_task_id, _ in expired])
+            if self.responses:
+                for spot_task_id, _ in expired:
+                    self.responses.forget(spot_task_id)
+            cleaned += len(expired)
+            logger.info(
+                f"Cleaned {len(expired)} expired spot tasks: "
+                f"{result.deleted} messages deleted, {result.failed} failed"
+            )
+
+    async def _next_delay(self) -> float:
+        next_expiry = await SpotTask.get_next_expiry(self.pool)
+        if next_expiry is None:
+            return SWEEP_INTERVAL
+        delay = (next_expiry - datetime.now()).total_seconds()
+        # Не меньше секунды: часы базы и бота могут немного расходиться
+        return min(max(delay, 1), SWEEP_INTERVAL)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.sweep()
+                delay = await self._next_delay()
+            except Exception as e:
+                logger.error(f"Spot expiry sweep failed: {e}")
+                delay = SWEEP_INTERVAL
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from database.pg_model import SpotTask, SpotTaskResponse, SpotTaskSummary
+from services.rate_limiter import TelegramRateLimiter
+from services.user_directory import UserDirectory
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INTERVAL = 1.0       # Не чаще одного обновления сводки задания в секунду
+SUMMARY_NAMES_LIMIT = 30     # Сколько принявших перечислять в сводке
+EXTRA_RECIPIENT_ID = 257026813  # Получает отчеты вместе с админами
+
+
+@dataclass
+class SpotResponses:
+    spot_task_id: int
+    name: str
+    responses: Dict[int, str] = field(default_factory=dict)  # volunteer_id -> response
+    summary_messages: Dict[int, int] = field(default_factory=dict)  # admin_id -> message_id
+    dirty: bool = False
+    reload: bool = False  # Перечитать ответы из БД перед следующей публикацией
+    last_render: str = ""
+    flush_task: Optional[asyncio.Task] = None
+
+
+class SpotResponseAggregator:
+    """
+    Сводка ответов на срочные задания для админов. Ответы копятся в памяти
+    (источник истины — spot_task_response), а каждому админу поддерживается
+    одно сообщение со счетчиками, которое редактируется не чаще
+    SUMMARY_INTERVAL. Волонтер не ждет рассылки админам.
+    """
+
+    def __init__(self, bot: Bot, pool, user_directory: UserDirectory, limiter: TelegramRateLimiter):
+        self.bot = bot
+        self.pool = pool
+        self.user_directory = user_directory
+        self.limiter = limiter
+        self.tasks: Dict[int, SpotResponses] = {}
+        self._load_lock = asyncio.Lock()
+
+    async def _get(self, spot_task_id: int) -> Optional[SpotResponses]:
+        if spot_task_id in self.tasks:
+            return self.tasks[spot_task_id]
+
+        async with self._load_lock:
+            if spot_task_id in self.tasks:
+                return self.tasks[spot_task_id]
+            spot = await SpotTask.get_by_id(self.pool, spot_task_id)
+            if not spot:
+                return None
+            rows = await SpotTaskResponse.get_by_task(self.pool, spot_task_id)
+            state = SpotResponses(
+                spot_task_id=spot_task_id,
+                name=spot.name,
+                responses={row['volunteer_id']: row['response'] for row in rows},
+                summary_messages=await SpotTaskSummary.get_by_task(self.pool, spot_task_id)
+            )
+            self.tasks[spot_task_id] = state
+            return state
+
+    async def record(self, spot_task_id: int, volunteer_id: int, response: str) -> None:
+        """Учитывает ответ (уже сохраненный в базе) и планирует обновление сводки"""
+        state = await self._get(spot_task_id)
+        if not state:
+            return
+        state.responses[volunteer_id] = response
+        state.dirty = True
+        if not state.flush_task or state.flush_task.done():
+            state.flush_task = asyncio.create_task(self._flush_later(state))
+
+    async def refresh(self, spot_task_id: int) -> None:
+        """
+        Рассылка закончена: строки spot_task_response сохранялись по ходу нее,
+        поэтому загруженное раньше состояние (и счетчик «без ответа») устарело.
+        Ответы перечитываются из БД при ближайшей публикации сводки.
+        """
+        state = self.tasks.get(spot_task_id)
+        if not state:
+            return
+        state.reload = True
+        state.dirty = True
+        if not state.flush_task or state.flush_task.done():
+            state.flush_task = asyncio.create_task(self._flush_later(state))
+
+    def forget(self, spot_task_id: int) -> None:
+        """Убирает закрытое или истекшее задание из памяти"""
+        state = self.tasks.pop(spot_task_id, None)
+        if state and state.flush_task and not state.flush_task.done():
+            state.flush_task.cancel()
+
+    async def _flush_later(self, state: SpotResponses) -> None:
+        # Ответы, пришедшие за время ожидания и отправки, попадут в следующую сводку
+        while state.dirty:
+            await asyncio.sleep(SUMMARY_INTERVAL)
+            state.dirty = False
+            try:
+                if state.reload:
+                    state.reload = False
+                    before = dict(state.responses)
+                    rows = await SpotTaskResponse.get_by_task(self.pool, state.spot_task_id)
+                    responses = {row['volunteer_id']: row['response'] for row in rows}
+                    # Ответы, учтенные record() во время чтения, сохраняем поверх
+                    responses.update(
+                        (volunteer_id, response) for volunteer_id, response in state.responses.items()
+                        if before.get(volunteer_id) != response
+                    )
+                    state.responses = responses
+                await self._publish(state)
+            except Exception as e:
+                logger.error(f"Failed to publish spot task {state.spot_task_id} summary: {e}")
+
+    def render(self, state: SpotResponses) -> str:
+        counts = Counter(state.responses.values())
+        accepted = [
+            self.user_directory.by_id.get(volunteer_id)
+            for volunteer_id, response in state.responses.items()
+            if response == "accepted"
+        ]
+        names = [f"{u.name} (@{u.tg_username})" for u in accepted if u]
+
+        text = (
+            f"⚡️ <b>{state.name}</b>\n"
+            f"✅ Приняли: {counts['accepted']}\n"
+            f"❌ Отказались: {counts['declined']}\n"
+            f"⏳ Без ответа: {counts['none']}"
+        )
+        if names:
+            text += "\n\nПриняли:\n" + "\n".join(f"• {name}" for name in names[:SUMMARY_NAMES_LIMIT])
+            if len(names) > SUMMARY_NAMES_LIMIT:
+                text += f"\n… и еще {len(names) - SUMMARY_NAMES_LIMIT}"
+        return text
+
+    def _recipients(self) -> List[int]:
+        admin_ids = [admin.tg_id for admin in self.user_directory.get_by_role("admin")]
+        return list(dict.fromkeys(admin_ids + [EXTRA_RECIPIENT_ID]))
+
+    async def _publish(self, state: SpotResponses) -> None:
+        text = self.render(state)
+        if text == state.last_render:
+            return
+        state.last_render = text
+        await asyncio.gather(*(self._publish_to(state, chat_id, text) for chat_id in self._recipients()))
+
+    async def _publish_to(self, state: SpotResponses, chat_id: int, text: str) -> None:
+        message_id = state.summary_messages.get(chat_id)
+        await self.limiter.wait(chat_id)
+        try:
+            if message_id:
+                try:
+                    await self.bot.edit_message_text(text, chat_id=chat_id, message_id=message_id)
+                    return
+                except TelegramBadRequest as e:
+                    if "message is not modified" in str(e):
+                        return
+                    # Сообщение удалено — отправим новое
+                    logger.debug(f"Can't edit spot summary for {chat_id}: {e}")
+                    await self.limiter.wait(chat_id)
+
+            msg = await self.bot.send_message(chat_id, text)
+            state.summary_messages[chat_id] = msg.message_id
+            await SpotTaskSummary.save(self.pool, state.spot_task_id, chat_id, msg.message_id)
+        except TelegramRetryAfter as e:
+            self.limiter.pause(e.retry_after)
+            # Повторить сводку на следующем проходе
+            state.last_render = ""
+            state.dirty = True
+        except Exception as e:
+            logger.error(f"Can't send spot summary to {chat_id}: {e}")
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from database.pg_model import SheetSyncState
+from services.sheet_sync import (
+    sync_db_to_sheet, sync_sheet_to_db,
+    sync_volunteers_db_to_sheet, sync_volunteers_sheet_to_db,
+    sync_assignments_db_to_sheet, sync_assignments_sheet_to_db
+)
+from services.sheets_executor import quota
+from utils.event_time import EventTimeManager
+
+logger = logging.getLogger(__name__)
+
+# name -> (описание для админа, запуск синхронизации с параметрами менеджера)
+SYNC_OPERATIONS: Dict[str, tuple[str, Callable[["SyncJobManager"], Awaitable[str]]]] = {
+    "tasks.to_google":         ("Выгрузка заданий",    lambda m: sync_db_to_sheet(m.pool, m.cred)),
+    "tasks.from_google":       ("Загрузка заданий",    lambda m: sync_sheet_to_db(m.pool, m.cred, m.event_manager)),
+    "volunteers.to_google":    ("Выгрузка волонтеров", lambda m: sync_volunteers_db_to_sheet(m.pool, m.cred)),
+    "volunteers.from_google":  ("Загрузка волонтеров", lambda m: sync_volunteers_sheet_to_db(m.pool, m.cred)),
+    "assignments.to_google":   ("Выгрузка назначений", lambda m: sync_assignments_db_to_sheet(m.pool, m.cred)),
+    "assignments.from_google": ("Загрузка назначений", lambda m: sync_assignments_sheet_to_db(m.pool, m.cred)),
+}
+
+# Автосинхронизация: сначала правки организаторов из таблицы, потом изменения из бота.
+# Выгрузка пишет только строки, измененные в БД, поэтому не затирает загруженное.
+# Пока у сущности нет сохраненного состояния, загрузка сочла бы измененной
+# каждую строку таблицы и перезаписала правки из бота, а первая выгрузка
+# переписывает лист целиком. Поэтому такой цикл делает один шаг: выгрузку,
+# если в БД уже есть данные, иначе загрузку (см. AutoSyncWorker.run_once)
+AUTO_SYNC_STEPS: Dict[str, List[str]] = {
+    "tasks": ["tasks.from_google", "tasks.to_google"],
+    "volunteers": ["volunteers.from_google", "volunteers.to_google"],
+    "assignments": ["assignments.from_google", "assignments.to_google"],
+}
+
+ENTITY_TITLES = {
+    "tasks": "Задания",
+    "volunteers": "Волонтеры",
+    "assignments": "Назначения",
+}
+
+STATE_LABELS = {
+    "queued": "🕓 в очереди",
+    "running": "⏳ выполняется",
+    "done": "✅ завершено",
+    "failed": "❌ ошибка",
+    "cancelled": "⛔️ отменено",
+}
+
+
+@dataclass
+class SyncJob:
+    name: str
+    title: str
+    state: str = "queued"
+    started_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+    result: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def entity(self) -> str:
+        return self.name.split(".")[0]
+
+    @property
+    def is_active(self) -> bool:
+        return self.state in ("queued", "running")
+
+    @property
+    def duration(self) -> float:
+        end = self.finished_at or datetime.now()
+        return (end - self.started_at).total_seconds()
+
+    @property
+    def changed(self) -> int:
+        # services.sheet_sync.SyncResult; у ошибок счетчика нет
+        return getattr(self.result, 'changed', 0)
+
+
+class SyncJobManager:
+    """
+    Запускает синхронизацию с Google Sheets фоновыми задачами, чтобы
+    обработчики не ждали Google API. Синхронизации одной сущности
+    (задания, волонтеры, назначения) выполняются строго по очереди.
+    """
+
+    def __init__(self, pool, cred: Optional[dict], event_manager: Optional[EventTimeManager] = None):
+        self.pool = pool
+        self.cred = cred
+        self.event_manager = event_manager
+        self.jobs: Dict[str, SyncJob] = {}
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.auto_sync: Optional["AutoSyncWorker"] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.cred)
+
+    def start(self, name: str) -> SyncJob:
+        """Запускает синхронизацию name или возвращает уже идущую"""
+        job = self.jobs.get(name)
+        if job and job.is_active:
+            return job
+
+        title, _ = SYNC_OPERATIONS[name]
+        job = SyncJob(name=name, title=title)
+        job.task = asyncio.create_task(self._run(job))
+        self.jobs[name] = job
+        return job
+
+    async def wait(self, job: SyncJob) -> SyncJob:
+        """Ждет окончания задачи; отмена ожидающего не отменяет саму синхронизацию"""
+        await asyncio.shield(job.task)
+        return job
+
+    def cancel(self, name: str) -> bool:
+        job = self.jobs.get(name)
+        if job and job.is_active and job.task:
+            job.task.cancel()
+            return True
+        return False
+
+    async def _run(self, job: SyncJob) -> None:
+        _, sync_func = SYNC_OPERATIONS[job.name]
+        lock = self.locks.setdefault(job.entity, asyncio.Lock())
+        try:
+            async with lock:
+                job.state = "running"
+                job.started_at = datetime.now()
+                job.result = await sync_func(self)
+                job.state = "failed" if job.result.startswith("❌") else "done"
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+            job.result = "Синхронизация отменена"
+        except Exception as e:
+            logger.error(f"Sync job {job.name} failed: {e}")
+            job.state = "failed"
+            job.result = f"❌ Ошибка синхронизации: {str(e)}"
+        finally:
+            job.finished_at = datetime.now()
+            logger.info(f"Sync job {job.name} finished with state '{job.state}' in {job.duration:.1f}s")
+
+    def status_text(self) -> str:
+        if not self.jobs:
+            text = "Синхронизаций еще не было."
+        else:
+            text = self._jobs_text()
+        if self.auto_sync:
+            text += f"\n\n{self.auto_sync.status_text()}"
+        return text
+
+    def _jobs_text(self) -> str:
+        lines = []
+        for name in SYNC_OPERATIONS:
+            job = self.jobs.get(name)
+            if not job:
+                continue
+            lines.append(
+                f"<b>{job.title}</b>: {STATE_LABELS[job.state]} "
+                f"({job.started_at.strftime('%H:%M:%S')}, {job.duration:.1f} с)"
+            )
+            if job.result and not job.is_active:
+                lines.append(f"  {job.result}")
+        return "\n".join(lines)
+
+
+@dataclass
+class AutoSyncStatus:
+    entity: str
+    interval: int
+    last_run: Optional[datetime] = None
+    duration: float = 0.0
+    changed: int = 0
+    error: Optional[str] = None
+    quota_failures: int = 0  # Подряд, от них растет пауза
+    next_run: Optional[datetime] = None
+
+
+class AutoSyncWorker:
+    """
+    Периодическая синхронизация с Google Sheets: по циклу на сущность со
+    своим интервалом. Шаги идут через SyncJobManager, поэтому не пересекаются
+    с ручной синхронизацией той же сущности (общая блокировка), а цикл одной
+    сущности не начинается, пока не закончился предыдущий. После ответа 429
+    от Google API пауза удваивается, но не больше max_backoff.
+    """
+
+    def __init__(self, manager: SyncJobManager, intervals: Dict[str, int], max_backoff: int = 1800):
+        self.manager = manager
+        self.max_backoff = max_backoff
+        self.statuses: Dict[str, AutoSyncStatus] = {
+            entity: AutoSyncStatus(entity=entity, interval=interval)
+            for entity, interval in intervals.items() if interval > 0
+        }
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks or not self.manager.configured:
+            return
+        self.manager.auto_sync = self
+        for status in self.statuses.values():
+            self._tasks.append(asyncio.create_task(self._run(status)))
+        logger.info(f"Auto sync started: {', '.join(f'{s.entity} every {s.interval}s' for s in self.statuses.values())}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def run_once(self, status: AutoSyncStatus) -> None:
+        """Один цикл сущности: загрузка из таблицы, затем выгрузка"""
+        started = datetime.now()
+        quota_errors = quota.errors
+        status.changed = 0
+        status.error = None
+        steps = AUTO_SYNC_STEPS[status.entity]
+        pool = self.manager.pool
+        if not await SheetSyncState.exists(pool, status.entity):
+            # Первая синхронизация или состояние сброшено полной выгрузкой
+            direction = ".to_google" if await SheetSyncState.db_has_rows(pool, status.entity) else ".from_google"
+            steps = [name for name in steps if name.endswith(direction)]
+            logger.info(f"Auto sync of {status.entity}: no sync state yet, seeding it with {steps[0]}")
+        for name in steps:
+            job = await self.manager.wait(self.manager.start(name))
+            status.changed += job.changed
+            if job.state != "done":
+                # Без загрузки выгрузка могла бы перезаписать непрочитанные правки таблицы
+                status.error = job.result
+                break
+
+        status.last_run = started
+        status.duration = (datetime.now() - started).total_seconds()
+        if quota.errors > quota_errors:
+            status.quota_failures += 1
+        else:
+            status.quota_failures = 0
+
+    def _delay(self, status: AutoSyncStatus) -> float:
+        return min(status.interval * 2 ** status.quota_failures, max(self.max_backoff, status.interval))
+
+    async def _run(self, status: AutoSyncStatus) -> None:
+        # Первый цикл через интервал: при запуске бота и так много запросов
+        delay = status.interval
+        while True:
+            status.next_run = datetime.now() + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+            status.next_run = None
+            try:
+                await self.run_once(status)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Auto sync of {status.entity} failed: {e}")
+                status.error = f"❌ Ошибка синхронизации: {str(e)}"
+            delay = self._delay(status)
+            if status.quota_failures:
+                logger.warning(f"Auto sync of {status.entity} hit Google API quota, next run in {delay:.0f}s")
+
+    def status_text(self) -> str:
+        lines = ["<b>🤖 Автосинхронизация</b>"]
+        for status in self.statuses.values():
+            title = f"<b>{ENTITY_TITLES[status.entity]}</b> (каждые {status.interval // 60 or 1} мин)"
+            if status.last_run:
+                lines.append(
+                    f"{title}: {status.last_run.strftime('%H:%M:%S')}, {status.duration:.1f} с, "
+                    f"изменено строк: {status.changed}"
+                )
+            else:
+                lines.append(f"{title}: еще не запускалась")
+            if status.error:
+                lines.append(f"  {status.error}")
+            if status.quota_failures:
+                lines.append("  ⏸ Превышена квота Google API, пауза увеличена")
+            if status.next_run:
+                lines.append(f"  Следующая: {status.next_run.strftime('%H:%M:%S')}")
+        return "\n".join(lines)
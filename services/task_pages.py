@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from cachetools import TTLCache
+
+from database.pg_model import Task, TaskOverview
+
+PAGE_SIZE = 8          # Заданий на странице: текст и клавиатура остаются в лимитах Telegram
+PAGE_CACHE_TTL = 60    # Секунды; вход в список из меню всегда читает БД заново
+PAGE_CACHE_SIZE = 2000
+
+CURSOR_FORMAT = '%Y%m%d%H%M'  # starts_at в callback data, точность — минута, как у HH:MM
+
+
+def encode_cursor(moment: datetime) -> int:
+    return int(moment.strftime(CURSOR_FORMAT))
+
+
+def decode_cursor(value: int) -> datetime:
+    return datetime.strptime(str(value), CURSOR_FORMAT)
+
+
+@dataclass(frozen=True, slots=True)
+class TaskPage:
+    number: int
+    overviews: List[TaskOverview]
+    has_prev: bool
+    has_next: bool
+
+    @property
+    def tasks(self) -> List[Task]:
+        return [overview.task for overview in self.overviews]
+
+
+class TaskPageCache:
+    """
+    Постраничный просмотр заданий по ключу (starts_at, task_id) с коротким
+    кешем страниц на админа: листание назад и вперед по уже открытым
+    страницам не ходит в БД.
+    """
+
+    def __init__(self, page_size: int = PAGE_SIZE, ttl: int = PAGE_CACHE_TTL):
+        self.page_size = page_size
+        self.pages: TTLCache = TTLCache(maxsize=PAGE_CACHE_SIZE, ttl=ttl)
+
+    def reset(self, admin_id: int) -> None:
+        """Забыть страницы админа (новый вход в список)"""
+        for key in [key for key in self.pages if key[0] == admin_id]:
+            self.pages.pop(key, None)
+
+    async def get(self, pool, admin_id: int, view: str, value=None, number: int = 0,
+                  after: Optional[tuple[datetime, int]] = None,
+                  before: Optional[tuple[datetime, int]] = None) -> TaskPage:
+        """
+        Страница number списка view (см. Task.get_overview_page). after/before —
+        ключ задания с соседней страницы, по нему страница читается при промахе кеша.
+        """
+        key = (admin_id, view, value if view == 'day' else None, number)
+        page = self.pages.get(key)
+        if page is not None:
+            return page
+
+        if number == 0 or not (after or before):
+            number, after, before = 0, None, None
+        overviews, more = await Task.get_overview_page(
+            pool, view, value, after=after, before=before, limit=self.page_size
+        )
+        if before:
+            page = TaskPage(number, overviews, has_prev=more, has_next=True)
+        else:
+            page = TaskPage(number, overviews, has_prev=number > 0, has_next=more)
+        self.pages[(admin_id, view, key[2], number)] = page
+        return page
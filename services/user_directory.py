@@ -0,0 +1,276 @@
+import asyncio
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from database.pg_model import (
+    User, PendingUser,
+    add_user_change_listener, remove_user_change_listener
+)
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_TTL = 30  # Секунды, на которые запоминается, что tg_id нет ни в users, ни в pending_users
+
+VolunteerKey = Tuple[str, int]  # Ключ сортировки и курсор страниц: (имя без регистра, tg_id)
+
+
+def volunteer_sort_key(user: User) -> VolunteerKey:
+    return ((user.name or '').casefold(), user.tg_id)
+
+
+def volunteer_page(volunteers: List[User], after: Optional[VolunteerKey] = None,
+                   limit: int = 5) -> Tuple[List[User], bool]:
+    """Страница отсортированного списка после ключа after; (волонтеры, есть ли следующая)"""
+    start = bisect_right(volunteers, tuple(after), key=volunteer_sort_key) if after else 0
+    return volunteers[start:start + limit], start + limit < len(volunteers)
+
+
+def _search_tokens(user: User) -> List[str]:
+    tokens = (user.name or '').casefold().split()
+    if user.tg_username:
+        tokens.append(user.tg_username.casefold())
+    return tokens
+
+
+class UserDirectory:
+    """
+    Все пользователи и pending-пользователи в памяти процесса: поиск по tg_id
+    и по username без запросов к базе. Загружается целиком при старте, дальше
+    обновляется по уведомлениям из моделей User/PendingUser
+    (см. database.pg_model.notify_user_change).
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.by_id: Dict[int, User] = {}
+        self.by_username: Dict[str, User] = {}
+        self.pending: Dict[str, PendingUser] = {}
+        self.loaded_at: Optional[datetime] = None
+        self.hits = 0
+        self.misses = 0
+        self.db_lookups = 0
+        # Промахи, которых нет и в базе: повторные апдейты от них не ходят в БД
+        self._unknown: TTLCache = TTLCache(maxsize=10000, ttl=UNKNOWN_TTL)
+        self._reload_task: Optional[asyncio.Task] = None
+        self._reload_again = False
+        # Изменения, пришедшие, пока load() читает базу: применяются и к старым
+        # словарям, и повторно к новым, чтобы снимок не затер их
+        self._changes_during_load: Optional[List[Tuple[str, Any]]] = None
+        # Волонтеры по volunteer_sort_key и префиксный индекс [(слово, позиция)],
+        # строятся при первом обращении после изменения пользователей
+        self._volunteers: Optional[List[User]] = None
+        self._volunteer_tokens: List[Tuple[str, int]] = []
+
+    async def load(self) -> None:
+        """Полностью перечитывает users и pending_users"""
+        self._changes_during_load = []
+        try:
+            users = await User.get_all(self.pool)
+            pending_users = await PendingUser.get_all(self.pool, role=None)
+
+            self.by_id = {user.tg_id: user for user in users}
+            self.by_username = {user.tg_username: user for user in users if user.tg_username}
+            self.pending = {pending.tg_username: pending for pending in pending_users}
+            self._volunteers = None
+            changes, self._changes_during_load = self._changes_during_load, None
+            for event, payload in changes:
+                self._apply(event, payload)
+        finally:
+            self._changes_during_load = None
+        self.loaded_at = datetime.now()
+        logger.info(f"User directory loaded: {len(self.by_id)} users, {len(self.pending)} pending")
+
+    def start(self) -> None:
+        add_user_change_listener(self.on_change)
+
+    def stop(self) -> None:
+        remove_user_change_listener(self.on_change)
+        if self._reload_task and not self._reload_task.done():
+            self._reload_task.cancel()
+
+    # ---- Поиск
+
+    def get_user(self, tg_id: int) -> Optional[User]:
+        user = self.by_id.get(tg_id)
+        if user:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return user
+
+    def get_by_username(self, tg_username: str) -> Optional[User]:
+        user = self.by_username.get(tg_username)
+        if user:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return user
+
+    def get_pending(self, tg_username: str) -> Optional[PendingUser]:
+        pending = self.pending.get(tg_username)
+        if pending:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return pending
+
+    async def resolve(self, tg_id: int, tg_username: Optional[str]) -> Tuple[Optional[User], Optional[PendingUser]]:
+        """
+        Пользователь или ожидающий пользователь для апдейта. Справочник
+        обновляется уведомлениями только своего процесса, поэтому при промахе
+        (пользователя добавил другой воркер или синхронизация с таблицей)
+        делается один запрос к users и pending_users, а результат кладется
+        в справочник. Неизвестные tg_id запоминаются на UNKNOWN_TTL.
+        """
+        user = self.get_user(tg_id)
+        if user:
+            return user, None
+        pending = self.get_pending(tg_username) if tg_username else None
+        if pending:
+            return None, pending
+        if tg_id in self._unknown:
+            return None, None
+
+        self.db_lookups += 1
+        user = await User.get_by_tg_id(self.pool, tg_id)
+        if user:
+            self.put_user(user)
+            return user, None
+        pending = await PendingUser.get_by_username(self.pool, tg_username) if tg_username else None
+        if pending:
+            self.put_pending(pending)
+            return None, pending
+        self._unknown[tg_id] = True
+        return None, None
+
+    async def get_users(self, tg_ids: List[int]) -> Dict[int, User]:
+        """
+        Пользователи по списку tg_id для экранов со списками волонтеров:
+        из памяти, промахи (добавлены другим воркером) — одним запросом
+        """
+        users = {}
+        missing = []
+        for tg_id in tg_ids:
+            user = self.get_user(tg_id)
+            if user:
+                users[tg_id] = user
+            else:
+                missing.append(tg_id)
+        if missing:
+            self.db_lookups += 1
+            for user in await User.get_by_tg_ids(self.pool, missing):
+                self.put_user(user)
+                users[user.tg_id] = user
+        return users
+
+    def get_by_role(self, role: str) -> List[User]:
+        return [user for user in self.by_id.values() if user.role == role]
+
+    def get_role(self, tg_id: int) -> Optional[str]:
+        user = self.get_user(tg_id)
+        return user.role if user else None
+
+    # ---- Волонтеры для выбора в назначениях
+
+    def volunteers(self) -> List[User]:
+        """Все волонтеры по имени (volunteer_sort_key)"""
+        if self._volunteers is None:
+            self._volunteers = sorted(self.get_by_role('volunteer'), key=volunteer_sort_key)
+            self._volunteer_tokens = sorted(
+                (token, position)
+                for position, user in enumerate(self._volunteers)
+                for token in _search_tokens(user)
+            )
+        return self._volunteers
+
+    def search_volunteers(self, query: str) -> List[User]:
+        """
+        Волонтеры, у которых каждое слово запроса — начало слова имени или
+        username, в том же порядке, что volunteers()
+        """
+        volunteers = self.volunteers()
+        words = query.casefold().lstrip('@').split()
+        if not words:
+            return volunteers
+
+        found: Optional[set] = None
+        for word in words:
+            positions = set()
+            i = bisect_left(self._volunteer_tokens, (word,))
+            while i < len(self._volunteer_tokens) and self._volunteer_tokens[i][0].startswith(word):
+                positions.add(self._volunteer_tokens[i][1])
+                i += 1
+            found = positions if found is None else found & positions
+            if not found:
+                return []
+        return [volunteers[position] for position in sorted(found)]
+
+    # ---- Инвалидация
+
+    def put_user(self, user: User) -> None:
+        self._unknown.pop(user.tg_id, None)
+        previous = self.by_id.get(user.tg_id)
+        if user.role == 'volunteer' or (previous and previous.role == 'volunteer'):
+            self._volunteers = None
+        if previous and previous.tg_username != user.tg_username:
+            self.by_username.pop(previous.tg_username, None)
+        self.by_id[user.tg_id] = user
+        if user.tg_username:
+            self.by_username[user.tg_username] = user
+
+    def put_pending(self, pending: PendingUser) -> None:
+        self.pending[pending.tg_username] = pending
+
+    def drop_pending(self, tg_username: str) -> None:
+        self.pending.pop(tg_username, None)
+
+    def on_change(self, event: str, payload: Any) -> None:
+        if self._changes_during_load is not None and event != "reload":
+            self._changes_during_load.append((event, payload))
+        self._apply(event, payload)
+
+    def _apply(self, event: str, payload: Any) -> None:
+        if event == "user":
+            self.put_user(payload)
+        elif event == "pending":
+            self.put_pending(payload)
+        elif event == "pending_deleted":
+            self.drop_pending(payload)
+        elif event == "reload":
+            self.schedule_reload()
+
+    def schedule_reload(self) -> None:
+        """
+        Перезагрузка в фоне. Запросы во время идущей перезагрузки сливаются в
+        одну следующую: изменения после ее SELECT иначе не были бы прочитаны.
+        """
+        if self._reload_task and not self._reload_task.done():
+            self._reload_again = True
+            return
+        self._reload_task = asyncio.create_task(self._reload())
+
+    async def _reload(self) -> None:
+        while True:
+            self._reload_again = False
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"User directory reload failed: {e}")
+            if not self._reload_again:
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "users": len(self.by_id),
+            "pending": len(self.pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "db_lookups": self.db_lookups,
+            "hit_rate": self.hits / total if total else 0.0,
+            "loaded_at": self.loaded_at,
+        }
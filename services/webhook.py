@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from config_data.config import WebhookConfig
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PATH = "/health"
+HEALTH_DB_TIMEOUT = 2  # секунды на SELECT 1, чтобы балансировщик не ждал
+
+
+async def health(request: web.Request) -> web.Response:
+    """Проверка для балансировщика: процесс жив и база отвечает"""
+    dp: Dispatcher = request.app["dispatcher"]
+    pool = dp.workflow_data.get("pool")
+    if pool is None:
+        return web.json_response({"status": "ok"})
+    try:
+        async with pool.acquire(timeout=HEALTH_DB_TIMEOUT) as conn:
+            await asyncio.wait_for(conn.fetchval("SELECT 1"), HEALTH_DB_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Health check failed: {e}")
+        return web.json_response({"status": "error", "db": str(e)}, status=503)
+    return web.json_response({"status": "ok", "db": "ok"})
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot, webhook: WebhookConfig) -> web.Application:
+    """
+    aiohttp-приложение с обработчиком апдейтов aiogram и health-эндпоинтом.
+    Апдейты обрабатываются в фоне: Telegram сразу получает 200, поэтому
+    долгие хендлеры не задерживают доставку следующих апдейтов.
+    """
+    if not webhook.secret:
+        raise ValueError("WEBHOOK_SECRET is required in webhook mode")
+
+    app = web.Application()
+    app["dispatcher"] = dp
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=webhook.secret,
+        handle_in_background=True
+    ).register(app, path=webhook.path)
+    app.router.add_get(HEALTH_PATH, health)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, webhook: WebhookConfig, stop_event: Optional[asyncio.Event] = None) -> None:
+    """
+    Регистрирует вебхук и обслуживает его до отмены (или до stop_event).
+    Можно запускать несколько процессов за балансировщиком: setWebhook
+    идемпотентен, а при остановке вебхук не удаляется, чтобы перезапуск
+    одного процесса не отключал остальные.
+    """
+    if not webhook.base_url:
+        raise ValueError("WEBHOOK_BASE_URL is required in webhook mode")
+
+    app = build_webhook_app(dp, bot, webhook)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=webhook.host, port=webhook.port)
+    await site.start()
+    logger.info(f"Webhook server listening on {webhook.host}:{webhook.port}{webhook.path}")
+
+    try:
+        await bot.set_webhook(
+            url=webhook.url,
+            secret_token=webhook.secret,
+            allowed_updates=dp.resolve_used_update_types()
+        )
+        logger.info(f"Webhook set to {webhook.url}")
+
+        await (stop_event or asyncio.Event()).wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,74 @@
+"""
+Микробенчмарк EventTimeManager.
+
+    python -m utils.bench_event_time [tasks]
+
+На tasks заданиях (по умолчанию 100 000) сравнивает прежний перевод
+(split 'HH:MM' и timedelta на каждый вызов) с кешированными началами дней,
+to_absolute_many и сортировку по datetime с сортировкой по minute_key.
+"""
+import gc
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+
+from utils.event_time import EventTime, EventTimeManager
+
+START = datetime(2025, 7, 4)
+DAYS = 5
+
+
+def legacy_datetime_from_event_day(day: int, time_: str) -> datetime:
+    """Реализация до кеша — для сравнения"""
+    if not (1 <= day <= DAYS):
+        raise ValueError(f"Day must be between 1 and {DAYS}")
+    hour, minute = map(int, time_.split(':'))
+    return START + timedelta(days=day - 1, hours=hour, minutes=minute)
+
+
+def make_times(count: int) -> List[Tuple[int, str]]:
+    rng = random.Random(1)
+    return [(rng.randint(1, DAYS), f"{rng.randint(0, 23):02d}:{rng.choice((0, 15, 30, 45)):02d}")
+            for _ in range(count)]
+
+
+def timed(fn: Callable, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(count: int) -> List[Tuple[str, float]]:
+    manager = EventTimeManager(START, DAYS)
+    times = make_times(count)
+    events = [EventTime(day, time_) for day, time_ in times]
+
+    cases = (
+        ('legacy convert', lambda: [legacy_datetime_from_event_day(d, t) for d, t in times]),
+        ('to_absolute_time', lambda: [manager.to_absolute_time(e) for e in events]),
+        ('to_absolute_many', lambda: manager.to_absolute_many(events)),
+        ('legacy sort', lambda: sorted(times, key=lambda x: legacy_datetime_from_event_day(*x))),
+        ('sort by minute_key', lambda: sorted(times, key=lambda x: manager.minute_key(*x))),
+        ('legacy current day', lambda: [(manager.current_time.date() - START.date()).days + 1
+                                        for _ in range(count)]),
+        ('get_current_event_day', lambda: [manager.get_current_event_day() for _ in range(count)]),
+    )
+    return [(name, timed(fn)) for name, fn in cases]
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{count} tasks, {DAYS} days")
+    for name, seconds in run(count):
+        print(f"{name:<22} {seconds * 1000:8.1f} ms  {seconds / count * 1e9:6.0f} ns/task")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
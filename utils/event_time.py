@@ -1,18 +1,40 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from dataclasses import dataclass
-from typing import Tuple
+from functools import lru_cache
+from typing import Iterable, List, Tuple, Union
+
+MINUTES_PER_DAY = 24 * 60
 
 @dataclass
 class EventTime:
     day: int      # День мероприятия (1-based)
     time: str     # Время в формате HH:MM
 
+@lru_cache(maxsize=2048)
+def parse_hhmm(time: str) -> int:
+    """'HH:MM' -> минуты от начала суток. Значений за мероприятие немного, поэтому кеш"""
+    hour, minute = time.split(':')
+    return int(hour) * 60 + int(minute)
+
 class EventTimeManager:
+    """
+    Перевод времени мероприятия (день, 'HH:MM') в абсолютное и обратно.
+    Начало каждого дня считается один раз при создании; для сортировки и
+    сравнения большого числа заданий есть целочисленные ключи minute_key
+    (минута от начала мероприятия) — без создания datetime.
+    """
+
     def __init__(self, start_date: datetime, days_count: int, debug_mode: bool = False):
         self.start_date = start_date
         self.days_count = days_count
         self.debug_mode = debug_mode
         self._debug_current_time: datetime | None = None
+        # Начало дня d — _day_starts[d - 1]
+        self._day_starts: Tuple[datetime, ...] = tuple(
+            start_date + timedelta(days=day) for day in range(days_count)
+        )
+        self._start_day = start_date.date()
+        self._current_day: Tuple[date | None, int] = (None, 0)
 
     @property
     def current_time(self) -> datetime:
@@ -20,28 +42,49 @@ class EventTimeManager:
         if self.debug_mode and self._debug_current_time:
             return self._debug_current_time
         return datetime.now()
-    
+
     def set_debug_time(self, debug_time: datetime) -> None:
         """Устанавливает отладочное время"""
         if self.debug_mode:
             self._debug_current_time = debug_time
 
-    def datetime_from_event_day(self, day: int, time: str) -> datetime:
-        """Преобразует день мероприятия и время в абсолютную дату"""
+    def _check_day(self, day: int) -> None:
         if not (1 <= day <= self.days_count):
             raise ValueError(f"Day must be between 1 and {self.days_count}")
-        
-        hour, minute = map(int, time.split(':'))
-        return self.start_date + timedelta(days=day-1, hours=hour, minutes=minute)
+
+    def datetime_from_event_day(self, day: int, time: str) -> datetime:
+        """Преобразует день мероприятия и время в абсолютную дату"""
+        self._check_day(day)
+        return self._day_starts[day - 1] + timedelta(minutes=parse_hhmm(time))
+
+    def minute_key(self, day: int, time: str) -> int:
+        """Минута от начала мероприятия: порядок такой же, как у абсолютного времени"""
+        self._check_day(day)
+        return (day - 1) * MINUTES_PER_DAY + parse_hhmm(time)
+
+    def minute_keys(self, items: Iterable[Union[EventTime, Tuple[int, str]]]) -> List[int]:
+        """minute_key для списка EventTime или пар (день, 'HH:MM')"""
+        keys = []
+        for item in items:
+            day, time = (item.day, item.time) if isinstance(item, EventTime) else item
+            keys.append(self.minute_key(day, time))
+        return keys
+
+    def to_absolute_many(self, items: Iterable[Union[EventTime, Tuple[int, str]]]) -> List[datetime]:
+        """to_absolute_time для списка EventTime или пар (день, 'HH:MM')"""
+        start = self.start_date
+        return [start + timedelta(minutes=key) for key in self.minute_keys(items)]
 
     def get_current_event_day(self) -> int:
         """Возвращает текущий день мероприятия (1-based) или 0 если не во время мероприятия"""
-        current = self.current_time
-        delta = current.date() - self.start_date.date()
-        day_num = delta.days + 1
-        if 1 <= day_num <= self.days_count:
-            return day_num
-        return 0
+        today = self.current_time.date()
+        cached_date, day_num = self._current_day
+        if cached_date != today:
+            day_num = (today - self._start_day).days + 1
+            if not (1 <= day_num <= self.days_count):
+                day_num = 0
+            self._current_day = (today, day_num)
+        return day_num
 
     def to_absolute_time(self, event_time: EventTime) -> datetime:
         """Конвертирует относительное время мероприятия в абсолютное"""
@@ -49,13 +92,12 @@ class EventTimeManager:
 
     def to_event_time(self, dt: datetime) -> EventTime:
         """Конвертирует абсолютное время в относительное время мероприятия"""
-        delta = dt.date() - self.start_date.date()
-        day = delta.days + 1
-        
+        day = (dt.date() - self._start_day).days + 1
+
         if not (1 <= day <= self.days_count):
             raise ValueError("DateTime is outside event period")
-            
-        return EventTime(day=day, time=dt.strftime("%H:%M"))
+
+        return EventTime(day=day, time=f"{dt.hour:02d}:{dt.minute:02d}")
 
     def is_valid_event_time(self, event_time: EventTime) -> bool:
         """Проверяет валидность времени мероприятия"""
@@ -69,11 +111,11 @@ class EventTimeManager:
         """Возвращает текущий статус времени"""
         current = self.current_time
         current_day = self.get_current_event_day()
-        
+
         if current_day == 0:
             if current < self.start_date:
                 return "До начала мероприятия"
             else:
                 return "После окончания мероприятия"
-        
-        return f"День {current_day} {current.strftime('%H:%M')}"
\ No newline at end of file
+
+        return f"День {current_day} {current.hour:02d}:{current.minute:02d}"
@@ -0,0 +1,165 @@
+"""
+Локальный поддельный Bot API для офлайн-проверки webhook-режима.
+
+    python -m utils.fake_telegram
+
+Поднимает fake Bot API и webhook-приложение бота (services.webhook) на
+localhost, отправляет апдейты с правильным и неправильным секретом и
+проверяет, что бот ответил через поддельный API. Ни Telegram, ни база
+не нужны.
+"""
+import asyncio
+import itertools
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import ClientSession, web
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from config_data.config import WebhookConfig
+from services.webhook import HEALTH_PATH, build_webhook_app
+
+FAKE_TOKEN = "123456:FAKE-telegram-token"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Fake bot", "username": "fake_bot"}
+
+
+class FakeTelegramServer:
+    """Принимает вызовы Bot API, записывает их и отвечает правдоподобными объектами"""
+
+    def __init__(self):
+        self.calls: List[Tuple[str, Dict[str, Any]]] = []
+        self._message_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        self.calls.append((method, params))
+        return web.json_response({"ok": True, "result": self._result(method, params)})
+
+    def _result(self, method: str, params: Dict[str, Any]) -> Any:
+        method = method.lower()
+        if method == "getme":
+            return BOT_USER
+        if method in ("sendmessage", "editmessagetext"):
+            chat_id = int(params.get("chat_id", 0))
+            return {
+                "message_id": int(params.get("message_id") or next(self._message_ids)),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        return True
+
+    def calls_of(self, method: str) -> List[Dict[str, Any]]:
+        return [params for name, params in self.calls if name.lower() == method.lower()]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> str:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host=host, port=port).start()
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+
+def make_bot(api_base_url: str, token: str = FAKE_TOKEN) -> Bot:
+    """Bot, который ходит в поддельный API вместо api.telegram.org"""
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_base_url))
+    return Bot(token=token, session=session)
+
+
+def message_update(update_id: int, chat_id: int, text: str, username: str = "volunteer") -> Dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": username, "username": username},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+            if text.startswith("/") else [],
+        },
+    }
+
+
+async def post_update(url: str, update: Dict[str, Any], secret: str) -> int:
+    """Отправляет апдейт так, как это делает Telegram; возвращает HTTP-статус"""
+    async with ClientSession() as session:
+        async with session.post(url, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": secret}) as resp:
+            return resp.status
+
+
+async def wait_for_calls(server: FakeTelegramServer, method: str, count: int, timeout: float = 5) -> bool:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while len(server.calls_of(method)) < count:
+        if asyncio.get_running_loop().time() > deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+
+async def smoke(webhook_port: int = 8082, api_port: int = 8081) -> List[Tuple[str, bool]]:
+    """Проверки webhook-режима на поддельном API: [(название, результат)]"""
+    server = FakeTelegramServer()
+    api_url = await server.start(port=api_port)
+    bot = make_bot(api_url)
+
+    router = Router()
+
+    @router.message(Command("ping"))
+    async def ping(message: Message):
+        await message.answer("pong")
+
+    dp = Dispatcher()
+    dp.include_router(router)
+
+    webhook = WebhookConfig(enabled=True, base_url=f"http://127.0.0.1:{webhook_port}", secret="harness-secret")
+    runner = web.AppRunner(build_webhook_app(dp, bot, webhook))
+    await runner.setup()
+    await web.TCPSite(runner, host="127.0.0.1", port=webhook_port).start()
+
+    results = []
+    try:
+        async with ClientSession() as session:
+            async with session.get(f"{webhook.base_url}{HEALTH_PATH}") as resp:
+                results.append(("health endpoint", resp.status == 200))
+
+        status = await post_update(webhook.url, message_update(1, 1001, "/ping"), "wrong-secret")
+        results.append(("wrong secret rejected", status == 401))
+
+        status = await post_update(webhook.url, message_update(2, 1001, "/ping"), webhook.secret)
+        results.append(("update accepted", status == 200))
+
+        answered = await wait_for_calls(server, "sendMessage", 1)
+        replies = server.calls_of("sendMessage")
+        results.append(("handler replied via Bot API", answered and replies[0].get("text") == "pong"))
+    finally:
+        await runner.cleanup()
+        await bot.session.close()
+        await server.stop()
+    return results
+
+
+def main() -> int:
+    results = asyncio.run(smoke())
+    for name, ok in results:
+        print(f"{name}: {'OK' if ok else 'FAIL'}")
+    return 0 if all(ok for _, ok in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())